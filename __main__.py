@@ -0,0 +1,9 @@
+"""
+This module runs the command line interface: python -m json_database --help
+"""
+
+import sys
+from json_database.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""
+This module provides functions for benchmarking KeyValueTable and KeyValueDatabase operations.
+
+Each case fills a table in a temporary database with 'table_size' records, then times 'repeat' calls of one
+operation and measures the peak memory of a separate call under 'tracemalloc' (kept out of the timed calls).
+Results report ops/sec, p50/p99 latency and peak memory as JSON so runs from different commits can be
+compared with '--compare'.
+
+Usage:
+    python -m json_database.benchmarks.table_benchmarks --sizes 10 1000 100000 --output results.json
+    python -m json_database.benchmarks.table_benchmarks --sizes 1000000 --repeat 5 --value-type instance
+    python -m json_database.benchmarks.table_benchmarks --output new.json --compare results.json
+"""
+
+import argparse
+import inspect
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from json_database.database.key_value_database import KeyValueDatabase
+from json_database.table.key_value_table import KeyValueTable
+from json_database.miscellaneous.programmer import Programmer
+import json_database.tools.json_backend as json_backend
+
+operations = ('set_pair', 'get_value', 'get_key', 'delete_pair', 'table_to_dictionary', 'copy_table',
+              'count_database_tables', 'count_all_records', 'copy_database')
+
+
+def make_key(index, key_size):
+    """
+    Build record key of fixed length.
+
+    :param index:       Record number.
+    :param key_size:    Key length in characters.
+    :return:            Record key.
+    """
+    return f'k{index}'.ljust(key_size, '_')
+
+
+def make_value(index, value_size, value_type):
+    """
+    Build record value.
+
+    :param index:       Record number.
+    :param value_size:  Value length in characters (instance: length of its text attribute).
+    :param value_type:  'string' or 'instance' (pickled 'Programmer' object).
+    :return:            Record value.
+    """
+    text = f'v{index}'.ljust(value_size, 'x')
+    if value_type == 'instance':
+        return Programmer(first_name=text, last_name='benchmark', language='python', age=index % 100)
+    return text
+
+
+def percentile(latencies, fraction):
+    """
+    Nearest-rank percentile.
+
+    :param latencies:   Sorted list of latencies (seconds).
+    :param fraction:    Percentile as fraction (0.5 for p50).
+    :return:            Latency at percentile (seconds).
+    """
+    rank = max(0, min(len(latencies) - 1, int(round(fraction * len(latencies) + 0.5)) - 1))
+    return latencies[rank]
+
+
+def build_operation(operation, table, database, work_directory, table_size, key_size, value_size, value_type):
+    """
+    Create a callable running one benchmarked operation (one call per invocation).
+
+    :param operation:       Operation name from 'operations'.
+    :param table:           Filled 'KeyValueTable' object.
+    :param database:        'KeyValueDatabase' object holding the table.
+    :param work_directory:  Temporary directory for copies.
+    :return:                Callable taking the call number.
+    """
+    value_is_instance = value_type == 'instance'
+    random_key = lambda: make_key(random.randrange(table_size), key_size)
+
+    if operation == 'set_pair':
+        return lambda call: table.set_pair(random_key(), make_value(call, value_size, value_type),
+                                           value_is_instance=value_is_instance)
+    if operation == 'get_value':
+        return lambda call: table.get_value(random_key(), value_is_instance=value_is_instance)
+    if operation == 'get_key':
+        # Values are read once here so the timed calls measure 'get_key' alone.
+        record_values = list(table.table_to_dictionary().values())
+        return lambda call: table.get_key(random.choice(record_values))
+    if operation == 'delete_pair':
+        # Deletes distinct keys from the end of the table so every call removes an existing record.
+        return lambda call: table.delete_pair(make_key(table_size - 1 - call, key_size))
+    if operation == 'table_to_dictionary':
+        return lambda call: table.table_to_dictionary()
+    if operation == 'copy_table':
+        return lambda call: table.copy_table(f'copy_{call}', table_file_path=work_directory)
+    if operation == 'count_database_tables':
+        return lambda call: database.count_database_tables()
+    if operation == 'count_all_records':
+        return lambda call: database.count_all_records()
+    if operation == 'copy_database':
+        return lambda call: database.copy_database(os.path.join(work_directory, f'database_copy_{call}'))
+    raise KeyError(operation)
+
+
+def run_case(operation, table_size, key_size=16, value_size=64, value_type='string', repeat=100,
+             table_options=None):
+    """
+    Benchmark one operation against a freshly filled table.
+
+    :param operation:       Operation name from 'operations'.
+    :param table_size:      Number of records in the table.
+    :param key_size:        Key length in characters.
+    :param value_size:      Value length in characters.
+    :param value_type:      'string' or 'instance'.
+    :param repeat:          Number of timed calls.
+    :param table_options:   Keyword arguments passed to 'KeyValueTable'.
+    :return:                Dictionary of case parameters and measurements.
+    """
+    table_options = table_options or {}
+    repeat = min(repeat, table_size - 1) if operation == 'delete_pair' else repeat
+    parent_directory = tempfile.mkdtemp(prefix='json_database_benchmark_')
+    try:
+        table = KeyValueTable('benchmark_database', 'benchmark_table', **table_options)
+        table.set_database_directory(use_current_directory=False, new_directory_path=parent_directory)
+        table.set_many(((make_key(index, key_size), make_value(index, value_size, value_type))
+                        for index in range(table_size)), value_is_instance=value_type == 'instance')
+        database = KeyValueDatabase('benchmark_database')
+        database.set_database_directory(use_current_directory=False, new_directory_path=parent_directory)
+        work_directory = os.path.join(parent_directory, 'work')
+        os.mkdir(work_directory)
+
+        call_operation = build_operation(operation, table, database, work_directory, table_size, key_size,
+                                         value_size, value_type)
+        latencies = []
+        for call in range(repeat):
+            start = time.perf_counter()
+            call_operation(call)
+            latencies.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        call_operation(repeat)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        shutil.rmtree(parent_directory, ignore_errors=True)
+
+    latencies.sort()
+    total = sum(latencies)
+    return dict(operation=operation, table_size=table_size, key_size=key_size, value_size=value_size,
+                value_type=value_type, repeat=repeat,
+                ops_per_sec=round(repeat / total, 3) if total else None,
+                p50_ms=round(percentile(latencies, 0.50) * 1000, 4) if latencies else None,
+                p99_ms=round(percentile(latencies, 0.99) * 1000, 4) if latencies else None,
+                peak_memory_bytes=peak_memory)
+
+
+def run_benchmarks(sizes=(10, 1000, 100000), selected_operations=operations, key_size=16, value_size=64,
+                   value_types=('string',), repeat=100, table_options=None):
+    """
+    Benchmark every combination of operation, table size and value type.
+
+    :return:                Report dictionary with environment details and list of case results.
+    """
+    results = []
+    for value_type in value_types:
+        for table_size in sizes:
+            for operation in selected_operations:
+                results.append(run_case(operation, table_size, key_size=key_size, value_size=value_size,
+                                        value_type=value_type, repeat=repeat, table_options=table_options))
+    environment = dict(python=sys.version.split()[0], platform=platform.platform(),
+                       json_backend=json_backend.backend_name, table_options=table_options or {},
+                       timestamp=time.strftime('%Y-%m-%dT%H:%M:%S'))
+    return dict(environment=environment, results=results)
+
+
+def compare_reports(report, baseline):
+    """
+    Compare ops/sec of matching cases between two reports.
+
+    :param report:          Report from 'run_benchmarks'.
+    :param baseline:        Earlier report.
+    :return:                List of (case description, baseline ops/sec, ops/sec, ratio) tuples.
+    """
+    case_key = lambda result: (result['operation'], result['table_size'], result['key_size'],
+                               result['value_size'], result['value_type'])
+    baseline_results = {case_key(result): result for result in baseline['results']}
+    comparison = []
+    for result in report['results']:
+        previous = baseline_results.get(case_key(result))
+        if previous and previous['ops_per_sec'] and result['ops_per_sec']:
+            comparison.append(('{} size={} key={} value={} {}'.format(*case_key(result)), previous['ops_per_sec'],
+                               result['ops_per_sec'], round(result['ops_per_sec'] / previous['ops_per_sec'], 3)))
+    return comparison
+
+
+def get_table_default(parameter_name):
+    """
+    Retrieve a 'KeyValueTable' parameter default, so benchmarks measure the configuration tables use by default.
+
+    :param parameter_name:  'KeyValueTable' keyword parameter name.
+    :return:                Default value.
+    """
+    return inspect.signature(KeyValueTable).parameters[parameter_name].default
+
+
+def main(arguments=None):
+    """
+    Command line entry point.
+
+    :param arguments:       Argument list. None reads 'sys.argv'.
+    :return:                Report printed (and written to '--output').
+    """
+    parser = argparse.ArgumentParser(description='Benchmark json_database table and database operations.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000],
+                        help='table sizes (records), e.g. 10 1000 1000000')
+    parser.add_argument('--operations', nargs='+', default=list(operations), choices=operations)
+    parser.add_argument('--key-size', type=int, default=16)
+    parser.add_argument('--value-size', type=int, default=64)
+    parser.add_argument('--value-type', nargs='+', default=['string'], choices=('string', 'instance'))
+    parser.add_argument('--repeat', type=int, default=100, help='timed calls per case')
+    parser.add_argument('--table-format', default=get_table_default('table_format'), choices=('text', 'json'))
+    parser.add_argument('--instance-encoding', default=get_table_default('instance_encoding'),
+                        choices=('repr', 'base85'))
+    parser.add_argument('--durability', default=get_table_default('durability'),
+                        choices=('none', 'flush', 'fsync'))
+    parser.add_argument('--output', help='write JSON report to file')
+    parser.add_argument('--compare', help='baseline JSON report to compare ops/sec against')
+    options = parser.parse_args(arguments)
+
+    table_options = dict(table_format=options.table_format, instance_encoding=options.instance_encoding,
+                         durability=options.durability)
+    report = run_benchmarks(sizes=options.sizes, selected_operations=options.operations,
+                            key_size=options.key_size, value_size=options.value_size,
+                            value_types=options.value_type, repeat=options.repeat, table_options=table_options)
+
+    document = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, 'w') as output_file_object:
+            output_file_object.write(document)
+    print(document)
+
+    if options.compare:
+        with open(options.compare) as baseline_file_object:
+            baseline = json.load(baseline_file_object)
+        for case, previous, current, ratio in compare_reports(report, baseline):
+            print(f'{case}: {previous} -> {current} ops/sec ({ratio}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,412 @@
+"""
+This module provides the command line interface run by 'python -m json_database'.
+
+The module includes one command per database or table operation (get, set, delete, scan, count, copy, stats,
+compact, bench), a 'serve' command running a database server (see 'database_server') and a 'batch' command
+reading many commands from standard input, so shell pipelines open the table once instead of spawning one
+process per key. Consecutive batched writes are saved with one table write.
+
+Table and database modules are imported inside the commands that use them, so start-up only pays for
+'argparse'.
+
+Usage:
+    python -m json_database get sample_database sample_table record_1
+    python -m json_database set sample_database sample_table record_1 value --ttl 60
+    python -m json_database scan sample_database sample_table --prefix record_ --limit 10
+    printf 'set a 1\\nset b 2\\nget a\\n' | python -m json_database batch sample_database sample_table
+    python -m json_database bench --sizes 1000 --operations get_value
+    python -m json_database serve sample_database --port 7070
+"""
+
+import argparse
+import json
+import os
+import sys
+
+
+def open_table(options):
+    """
+    Create table object from command line options (strict mode, so errors raise).
+
+    :param options:         Parsed arguments with 'database', 'table' and table options.
+    :return:                'KeyValueTable' or 'LogStructuredTable' object.
+    """
+    if options.log_structured:
+        from json_database.table.log_structured_table import LogStructuredTable
+
+        table = LogStructuredTable(options.database, options.table, strict=True)
+    else:
+        from json_database.table.key_value_table import KeyValueTable
+
+        table = KeyValueTable(options.database, options.table, table_format=options.table_format,
+                              typed_values=options.typed_values, strict=True)
+    set_directory(table, options)
+    return table
+
+
+def open_database(options):
+    """
+    Create database object from command line options (strict mode, so errors raise).
+
+    :param options:         Parsed arguments with 'database'.
+    :return:                'KeyValueDatabase' object.
+    """
+    from json_database.database.key_value_database import KeyValueDatabase
+
+    database = KeyValueDatabase(options.database, strict=True)
+    set_directory(database, options)
+    return database
+
+
+def set_directory(database, options):
+    """
+    Assign database parent directory: '--directory' or the current working directory.
+
+    :param database:        'KeyValueDatabase' or table object.
+    :param options:         Parsed arguments with 'directory'.
+    :return:                Database directory assigned.
+    """
+    if options.directory is None:
+        database.set_database_directory()
+    else:
+        database.set_database_directory(use_current_directory=False, new_directory_path=options.directory)
+
+
+def format_value(record_value):
+    """
+    Format record value for output: strings as they are, other (typed) values as JSON.
+
+    :param record_value:    Record value.
+    :return:                Output text.
+    """
+    return record_value if isinstance(record_value, str) else json.dumps(record_value)
+
+
+def parse_value(text, options):
+    """
+    Parse record value from command line text.
+
+    :param text:            Value text.
+    :param options:         Parsed arguments with 'json_value'.
+    :return:                Text, or decoded JSON value with '--json'.
+    :raises ValueError:     '--json' value is not valid JSON.
+    """
+    return json.loads(text) if options.json_value else text
+
+
+def command_get(options, output):
+    """
+    Print a record value ('repr' of instances).
+
+    :param options:         Parsed arguments.
+    :param output:          Text stream for results.
+    :return:                Value written to 'output'.
+    """
+    value = open_table(options).get_value(options.key, value_is_instance=options.instance)
+    output.write((repr(value) if options.instance else format_value(value)) + '\n')
+
+
+def command_set(options, output):
+    """
+    Write a record, with an optional expiry time.
+
+    :param options:         Parsed arguments.
+    :param output:          Text stream for results.
+    :return:                Record saved.
+    """
+    open_table(options).set_pair(options.key, parse_value(options.value, options), ttl=options.ttl)
+
+
+def command_delete(options, output):
+    """
+    Delete a record.
+
+    :param options:         Parsed arguments.
+    :param output:          Text stream for results.
+    :return:                Record deleted.
+    """
+    open_table(options).delete_pair(options.key)
+
+
+def command_scan(options, output):
+    """
+    Print records as 'key<tab>value' lines: by prefix or key range in key order, else in table order.
+
+    :param options:         Parsed arguments.
+    :param output:          Text stream for results.
+    :return:                Records written to 'output'.
+    """
+    table = open_table(options)
+    if options.prefix is not None:
+        records = table.scan_prefix(options.prefix, limit=options.limit)
+    elif options.start is not None or options.end is not None:
+        records = table.scan_range(start=options.start, end=options.end, limit=options.limit)
+    else:
+        from itertools import islice
+
+        records = islice(table.iter_items(), options.limit)
+    for record_key, record_value in records:
+        output.write(f'{record_key}\t{format_value(record_value)}\n')
+
+
+def command_count(options, output):
+    """
+    Print the number of table records, or of database tables when no table is given.
+
+    :param options:         Parsed arguments.
+    :param output:          Text stream for results.
+    :return:                Count written to 'output'.
+    """
+    if options.table is None:
+        output.write(f'{open_database(options).count_database_tables()}\n')
+    else:
+        output.write(f'{open_table(options).count_records()}\n')
+
+
+def command_copy(options, output):
+    """
+    Copy a table under a new name (into the database directory unless '--path' is given).
+
+    :param options:         Parsed arguments.
+    :param output:          Text stream for results.
+    :return:                Table copied.
+    """
+    table = open_table(options)
+    table.copy_table(options.destination, table_file_path=options.path or table.database_path)
+
+
+def command_stats(options, output):
+    """
+    Print table or database statistics as JSON.
+
+    :param options:         Parsed arguments.
+    :param output:          Text stream for results.
+    :return:                Statistics written to 'output'.
+    """
+    if options.table is None:
+        database = open_database(options)
+        record_counts = database.count_all_records()
+        database_bytes = sum(os.path.getsize(os.path.join(database.database_path, object_name))
+                             for object_name in database.list_database_objects())
+        statistics = dict(database=database.database_path, table_count=len(record_counts),
+                          record_count=sum(record_counts.values()), bytes=database_bytes, tables=record_counts)
+    else:
+        table = open_table(options)
+        table_path = table.get_table_path()
+        statistics = dict(table=table_path, table_format=table.table_format, record_count=table.count_records(),
+                          bytes=os.path.getsize(table_path) if os.path.exists(table_path) else 0,
+                          expiring_records=len(table.open_expiry_index()))
+    output.write(json.dumps(statistics, indent=2) + '\n')
+
+
+def command_compact(options, output):
+    """
+    Purge expired records and rewrite the table (log-structured tables are compacted).
+
+    :param options:         Parsed arguments.
+    :param output:          Text stream for results.
+    :return:                Record counts written to 'output'.
+    """
+    table = open_table(options)
+    if options.log_structured:
+        table.compact()
+        output.write(json.dumps(dict(record_count=table.count_records())) + '\n')
+        return
+
+    purged = table.purge_expired()
+    table.checkpoint()
+    with table.write_locked():
+        records = table.read_table_records()
+        table.write_table(records)
+    output.write(json.dumps(dict(purged_records=purged, record_count=len(records))) + '\n')
+
+
+def command_bench(options, output):
+    """
+    Run 'table_benchmarks' with the arguments following 'bench'.
+
+    :param options:         Parsed arguments.
+    :param output:          Text stream for results.
+    :return:                Benchmark report printed.
+    """
+    from json_database.benchmarks import table_benchmarks
+
+    table_benchmarks.main(options.arguments)
+
+
+def command_serve(options, output):
+    """
+    Serve the database with 'DatabaseServer' until interrupted.
+
+    :param options:         Parsed arguments.
+    :param output:          Text stream for results.
+    :return:                Server closed.
+    """
+    import asyncio
+    from json_database.database.database_server import DatabaseServer
+
+    server = DatabaseServer(options.database, host=options.host, port=options.port, unix_path=options.unix_path,
+                            table_format=options.table_format, typed_values=options.typed_values)
+    set_directory(server, options)
+
+    async def serve():
+        sys.stderr.write(f'Serving {options.database} on {await server.start()}\n')
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+def command_batch(options, output):
+    """
+    Run 'get KEY', 'set KEY VALUE' and 'delete KEY' lines from standard input against one table.
+
+    Consecutive 'set' and 'delete' lines are saved with one table write (flushed before the next 'get' and at
+    the end of input). 'get' prints 'KEY<tab>VALUE'; missing keys are reported on standard error.
+
+    :return:                Exit status: 1 if any key was missing or any line invalid. Else 0.
+    """
+    from json_database.tools.exceptions import KeyNotFound
+
+    table = open_table(options)
+    writes = []
+    status = 0
+
+    def flush_writes():
+        nonlocal status
+        with table.batch():
+            for operation, record_key, record_value in writes:
+                if operation == 'set':
+                    table.set_pair(record_key, record_value)
+                elif table.check_pending_key(record_key):
+                    table.delete_pair(record_key)
+                else:
+                    sys.stderr.write(f'Key not found: {record_key}\n')
+                    status = 1
+        writes.clear()
+
+    for line in options.input:
+        parts = line.rstrip('\r\n').split(None, 2)
+        if not parts:
+            continue
+        operation = parts[0].lower()
+        if operation == 'set' and len(parts) == 3:
+            writes.append(('set', parts[1], parse_value(parts[2], options)))
+        elif operation == 'delete' and len(parts) == 2:
+            writes.append(('delete', parts[1], None))
+        elif operation == 'get' and len(parts) == 2:
+            if writes:
+                flush_writes()
+            try:
+                record_value = table.get_value(parts[1])
+            except KeyNotFound:
+                sys.stderr.write(f'Key not found: {parts[1]}\n')
+                status = 1
+                continue
+            output.write(f'{parts[1]}\t{format_value(record_value)}\n')
+        else:
+            sys.stderr.write(f'Invalid command: {line.strip()}\n')
+            status = 1
+    if writes:
+        flush_writes()
+    return status
+
+
+def build_parser():
+    """
+    Build argument parser with one sub-command per operation.
+
+    :return:                'argparse.ArgumentParser' object.
+    """
+    parser = argparse.ArgumentParser(prog='python -m json_database',
+                                     description='Manage json_database databases and tables.')
+    parser.add_argument('--directory', help='parent directory of the database (default: current directory)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    table_options = argparse.ArgumentParser(add_help=False)
+    table_options.add_argument('--table-format', default='text', choices=('text', 'json'))
+    table_options.add_argument('--typed-values', action='store_true', help='table stores native JSON values')
+    table_options.add_argument('--log-structured', action='store_true', help='table is a LogStructuredTable')
+
+    def add_command(name, function, help_text, table=True, optional_table=False):
+        command = commands.add_parser(name, help=help_text, parents=[table_options] if table else [])
+        command.set_defaults(function=function)
+        if table:
+            command.add_argument('database')
+            command.add_argument('table', nargs='?' if optional_table else None)
+        return command
+
+    command = add_command('get', command_get, 'print record value')
+    command.add_argument('key')
+    command.add_argument('--instance', action='store_true', help='value is a pickled instance (printed as repr)')
+
+    command = add_command('set', command_set, 'write record')
+    command.add_argument('key')
+    command.add_argument('value')
+    command.add_argument('--json', dest='json_value', action='store_true', help='parse value as JSON')
+    command.add_argument('--ttl', type=float, help='seconds until the record expires')
+
+    command = add_command('delete', command_delete, 'delete record')
+    command.add_argument('key')
+
+    command = add_command('scan', command_scan, 'print records (key<tab>value) in key or table order')
+    command.add_argument('--prefix')
+    command.add_argument('--start')
+    command.add_argument('--end')
+    command.add_argument('--limit', type=int)
+
+    add_command('count', command_count, 'count table records, or database tables without TABLE',
+                optional_table=True)
+
+    command = add_command('copy', command_copy, 'copy table')
+    command.add_argument('destination', help='new table name')
+    command.add_argument('--path', help='destination directory (default: database directory)')
+
+    add_command('stats', command_stats, 'print table or database statistics as JSON', optional_table=True)
+    add_command('compact', command_compact, 'purge expired records and rewrite table')
+
+    command = add_command('batch', command_batch, 'run get/set/delete lines from standard input')
+    command.add_argument('--json', dest='json_value', action='store_true', help='parse set values as JSON')
+    command.set_defaults(input=sys.stdin)
+
+    command = add_command('serve', command_serve, 'serve database tables over TCP or a Unix socket', table=False)
+    command.add_argument('database')
+    command.add_argument('--host', default='127.0.0.1')
+    command.add_argument('--port', type=int, default=7070)
+    command.add_argument('--unix-path', help='listen on a Unix socket instead of TCP')
+    command.add_argument('--table-format', default='text', choices=('text', 'json'))
+    command.add_argument('--typed-values', action='store_true', help='tables store native JSON values')
+
+    # Benchmark options (including '--help') are parsed by 'table_benchmarks'; see 'main'.
+    commands.add_parser('bench', help='run table benchmarks (arguments of table_benchmarks)',
+                        add_help=False).set_defaults(function=command_bench)
+    return parser
+
+
+def main(arguments=None, output=None):
+    """
+    Command line entry point.
+
+    :param arguments:       Argument list. None reads 'sys.argv'.
+    :param output:          Text stream for results. None writes to standard output.
+    :return:                Exit status: 0 on success, 1 on error (message on standard error).
+    """
+    parser = build_parser()
+    options, extra_arguments = parser.parse_known_args(arguments)
+    if options.command == 'bench':
+        options.arguments = [argument for argument in extra_arguments if argument != '--']
+    elif extra_arguments:
+        parser.error(f'unrecognized arguments: {" ".join(extra_arguments)}')
+    output = output or sys.stdout
+    try:
+        return options.function(options, output) or 0
+    except (Exception, KeyboardInterrupt) as error:
+        from json_database.tools.exceptions import KeyNotFound
+
+        if isinstance(error, KeyNotFound):
+            sys.stderr.write(f'Key not found: {error}\n')
+        else:
+            sys.stderr.write(f'Error: {type(error).__name__}: {error}\n')
+        return 1
@@ -0,0 +1,144 @@
+"""
+This module provides class functions for initializing and using the AsyncKeyValueDatabase class.
+
+The module includes an asyncio interface to database (directory) management. File system calls run on a
+bounded thread pool shared with every table opened through the database object.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json_database.database.key_value_database as kvs
+import json_database.table.async_key_value_table as akvt
+
+class AsyncKeyValueDatabase:
+    def __init__(self, database_name, max_workers=4):
+        """
+        Initialize AsyncKeyValueDatabase instance.
+
+        :param database_name:   Database name.
+        :param max_workers:     Thread pool size shared by the database and its tables.
+        :returns:               Initialized 'AsyncKeyValueDatabase' object.
+        """
+        self.database = kvs.KeyValueDatabase(database_name)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.tables = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exception_type, exception_value, traceback):
+        await self.close()
+
+    def set_database_directory(self, use_current_directory=True, new_directory_path=None):
+        """
+        Assign database working directory (see 'KeyValueDatabase.set_database_directory').
+
+        :param use_current_directory:   Default true. Use current working directory as database directory location.
+        :param new_directory_path:      When 'use_current_directory' is False, provide desired path.
+        :return:                        Database directory updated.
+        """
+        self.database.set_database_directory(use_current_directory=use_current_directory,
+                                             new_directory_path=new_directory_path)
+
+    async def run(self, function, *args, **kwargs):
+        """
+        Run blocking database function on the shared executor.
+
+        :param function:        Callable.
+        :return:                Function result.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: function(*args, **kwargs))
+
+    def get_table(self, table_name, **table_options):
+        """
+        Retrieve asyncio table object for a database table, sharing the database executor.
+
+        :param table_name:      Key value store or table name (json file name).
+        :param table_options:   Keyword arguments passed to the table class (first call only).
+        :return:                'AsyncKeyValueTable' object (one per table name).
+        """
+        if table_name not in self.tables:
+            table = akvt.AsyncKeyValueTable(self.database.database_name, table_name, executor=self.executor,
+                                            **table_options)
+            table.table.database_parent_directory = self.database.database_parent_directory
+            table.table.database_path = self.database.database_path
+            self.tables[table_name] = table
+        return self.tables[table_name]
+
+    async def close(self):
+        """
+        Wait for queued table writes and shut down the executor.
+
+        :return:                Pending changes saved; executor shut down.
+        """
+        for table in self.tables.values():
+            await table.close()
+        self.executor.shutdown(wait=True)
+
+    async def create_database(self):
+        """
+        Create database (directory/ folder) at file system.
+
+        :return:                Directory (database) created in file system.
+        """
+        await self.run(self.database.create_database)
+
+    async def copy_database(self, copy_database_path):
+        """
+        Duplicate a database (directory/ folder at file system).
+
+        :param copy_database_path:  File system location for copied database files.
+        :return:                    Database directory saved to 'copy_database_path' location.
+        """
+        await self.run(self.database.copy_database, copy_database_path)
+
+    async def delete_database(self, database_location):
+        """
+        Delete a database (directory/ folder at file system).
+
+        :param database_location:   Corresponding database directory path.
+        :return:                    Delete database directory path (deleting database).
+        """
+        await self.run(self.database.delete_database, database_location)
+
+    async def rename_database(self, new_database_name):
+        """
+        Rename a database (directory/ folder at file system).
+
+        :param new_database_name:   New database name (directory name).
+        :return:                    Renamed database (directory) within current working directory.
+        """
+        await self.run(self.database.rename_database, new_database_name)
+
+    async def list_database_objects(self):
+        """
+        Catalog of database objects (list all files within database directory/ folder).
+
+        :return:                List containing all database object.
+        """
+        return await self.run(self.database.list_database_objects)
+
+    async def count_database_objects(self):
+        """
+        Summation of database objects (all files within database directory/ folder).
+
+        :return:                Sum of database (directory) objects.
+        """
+        return await self.run(self.database.count_database_objects)
+
+    async def list_database_tables(self):
+        """
+        Catalog of database tables (list all JSON files within database directory/ folder).
+
+        :return:                List containing all database table (json file) names.
+        """
+        return await self.run(self.database.list_database_tables)
+
+    async def count_database_tables(self):
+        """
+        Summation of database tables (all JSON files within database directory/ folder).
+
+        :return:                Sum of database (directory) tables (json files).
+        """
+        return await self.run(self.database.count_database_tables)
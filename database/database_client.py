@@ -0,0 +1,367 @@
+"""
+This module provides class functions for initializing and using the DatabaseClient, RemoteTable and
+TablePipeline classes.
+
+The module includes a synchronous client for 'DatabaseServer'. Connections (TCP or Unix socket) are kept in
+a pool and reused, and the client can be shared between threads. 'RemoteTable' mirrors the 'KeyValueTable'
+record API ('get_value', 'set_pair', 'delete_pair', ...) and raises 'json_database.tools.exceptions' errors,
+as tables do in strict mode. 'get_many' reads many records with one request, and 'pipeline' sends a burst of
+requests with one write, so the burst costs one network round trip.
+
+Usage:
+    with DatabaseClient(port=port) as client:
+        sample_table = client.get_table('sample_table')
+        sample_table.set_pair('record_1', 'value')
+        with sample_table.pipeline() as pipeline:
+            pipeline.set_pair('record_2', 'value')
+            pipeline.get_value('record_1')
+        print(pipeline.results)
+"""
+
+import itertools
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+import json_database.tools.json_backend as json_backend
+import json_database.tools.exceptions as exceptions
+import json_database.tools.tools as tools
+
+class DatabaseClient:
+    def __init__(self, host='127.0.0.1', port=None, unix_path=None, pool_size=4, timeout=None):
+        """
+        Initialize DatabaseClient instance. Connections are opened on first use.
+
+        :param host:            Server TCP address.
+        :param port:            Server TCP port.
+        :param unix_path:       Server Unix socket path. When given, 'host' and 'port' are ignored.
+        :param pool_size:       Maximum number of open connections; further callers wait for a free one.
+        :param timeout:         Socket timeout in seconds. None waits indefinitely.
+        :returns:               Initialized 'DatabaseClient' object.
+        """
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.timeout = timeout
+        self.idle_connections = queue.LifoQueue()
+        self.connection_slots = threading.BoundedSemaphore(pool_size)
+        self.request_ids = itertools.count(1)
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def open_connection(self):
+        """
+        Connect to the server.
+
+        :return:                Tuple of socket and binary reader of the socket.
+        :raises OSError:        Server not reachable.
+        """
+        if self.unix_path is not None:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.settimeout(self.timeout)
+            connection.connect(self.unix_path)
+        else:
+            connection = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return connection, connection.makefile('rb')
+
+    @staticmethod
+    def close_connection(connection):
+        """
+        Close pooled connection.
+
+        :param connection:      Tuple of socket and reader.
+        :return:                Socket closed.
+        """
+        connection[1].close()
+        connection[0].close()
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a pooled connection, opening one when none is idle.
+
+        A connection that fails while borrowed, or is returned after 'close', is closed instead of being kept.
+
+        :return:                Tuple of socket and reader.
+        """
+        with self.connection_slots:
+            try:
+                connection = self.idle_connections.get_nowait()
+            except queue.Empty:
+                connection = self.open_connection()
+            try:
+                yield connection
+            except BaseException:
+                self.close_connection(connection)
+                raise
+            self.idle_connections.put(connection)
+            if self.closed:
+                self.close()
+
+    def send(self, requests):
+        """
+        Send requests in one write and read their responses (pipelined on one connection).
+
+        :param requests:        List of request dictionaries ('op' and operation fields).
+        :return:                List of response dictionaries in request order.
+        :raises ConnectionError: Server closed the connection or answered out of order.
+        """
+        for request in requests:
+            request['id'] = next(self.request_ids)
+        payload = ''.join(json_backend.dumps(request) + '\n' for request in requests).encode('utf-8')
+
+        responses = []
+        with self.connection() as (connection, reader):
+            connection.sendall(payload)
+            for request in requests:
+                line = reader.readline()
+                if not line:
+                    raise ConnectionError('database server closed the connection')
+                response = json_backend.loads(line)
+                if response.get('id') != request['id']:
+                    raise ConnectionError(f'unexpected response id {response.get("id")!r}')
+                responses.append(response)
+        return responses
+
+    @staticmethod
+    def get_result(response):
+        """
+        Retrieve request result, raising the error the server reported.
+
+        :param response:        Response dictionary.
+        :return:                Operation result.
+        :raises JsonDatabaseError:  Matching 'json_database.tools.exceptions' class ('RemoteError' when the
+                                    server error has no matching class).
+        """
+        if 'error' not in response:
+            return response.get('result')
+        error_class = getattr(exceptions, response['error'], None)
+        if isinstance(error_class, type) and issubclass(error_class, exceptions.JsonDatabaseError):
+            raise error_class(response['message'])
+        raise exceptions.RemoteError(f'{response["error"]}: {response["message"]}')
+
+    def execute(self, operation, **fields):
+        """
+        Send one request and return its result.
+
+        :param operation:       Operation name (e.g. 'get').
+        :param fields:          Operation fields (e.g. 'table', 'key').
+        :return:                Operation result.
+        """
+        return self.get_result(self.send([dict(op=operation, **fields)])[0])
+
+    def ping(self):
+        """
+        Check that the server answers.
+
+        :return:                'pong'.
+        """
+        return self.execute('ping')
+
+    def get_table(self, table_name):
+        """
+        Retrieve table object for a table owned by the server.
+
+        :param table_name:      Key value store or table name (json file name).
+        :return:                'RemoteTable' object.
+        """
+        return RemoteTable(self, table_name)
+
+    def close(self):
+        """
+        Close idle pooled connections. Borrowed connections are closed when returned to a closed pool.
+
+        :return:                Idle connections closed.
+        """
+        self.closed = True
+        while True:
+            try:
+                self.close_connection(self.idle_connections.get_nowait())
+            except queue.Empty:
+                return
+
+
+class RemoteTable:
+    def __init__(self, client, table_name):
+        """
+        Initialize RemoteTable instance.
+
+        :param client:          'DatabaseClient' object.
+        :param table_name:      Key value store or table name (json file name).
+        :returns:               Initialized 'RemoteTable' object.
+        """
+        self.client = client
+        self.table_name = table_name
+
+    def run(self, operation, finish=None, **fields):
+        """
+        Send table request and return its result.
+
+        :param operation:       Operation name.
+        :param finish:          Function converting the response to the result. None uses 'get_result'.
+        :param fields:          Operation fields.
+        :return:                Operation result.
+        """
+        response = self.client.send([dict(op=operation, table=self.table_name, **fields)])[0]
+        return (finish or self.client.get_result)(response)
+
+    def set_pair(self, record_key, record_value):
+        """
+        Write record (key value pair) to database table.
+
+        :param record_key:          Key of key value pair.
+        :param record_value:        Value of key value pair (JSON value).
+        :return:                    Key value pair saved to database table (json file).
+        """
+        return self.run('set', key=tools.convert_to_string(record_key), value=record_value)
+
+    def set_many(self, records):
+        """
+        Write multiple records (key value pairs) to database table with one request.
+
+        :param records:             Dictionary (or iterable of key value tuples) of records to save.
+        :return:                    Key value pairs saved to database table (json file).
+        """
+        records = records.items() if isinstance(records, dict) else records
+        return self.run('mset', records={tools.convert_to_string(record_key): record_value
+                                         for record_key, record_value in records})
+
+    def delete_pair(self, record_key):
+        """
+        Delete record (key value pair) from database table.
+
+        :param record_key:          Key of key value pair.
+        :return:                    Key value pair removed from database table (json file).
+        :raises KeyNotFound:        Key not found in database table (json file).
+        """
+        return self.run('delete', key=tools.convert_to_string(record_key))
+
+    def delete_many(self, record_keys):
+        """
+        Delete multiple records (key value pairs) from database table. Missing keys are skipped.
+
+        :param record_keys:         Iterable of record keys.
+        :return:                    Key value pairs removed from database table (json file).
+        """
+        return self.run('mdelete', keys=[tools.convert_to_string(record_key) for record_key in record_keys])
+
+    def get_value(self, record_key, default=tools.NO_DEFAULT):
+        """
+        Retrieve corresponding record's value for provided record key.
+
+        :param record_key:          Key of key value pair.
+        :param default:             Returned when the key or table does not exist.
+        :return:                    Key value pair value.
+        :raises KeyNotFound:        Key not found in database table (json file) and no default given.
+        """
+        def finish(response):
+            if default is not tools.NO_DEFAULT and response.get('error') in ('KeyNotFound', 'TableNotFound'):
+                return default
+            return self.client.get_result(response)
+
+        return self.run('get', finish=finish, key=tools.convert_to_string(record_key))
+
+    def get_many(self, record_keys, default=None):
+        """
+        Retrieve values of many records with one request.
+
+        :param record_keys:         Iterable of record keys.
+        :param default:             Value returned for keys that do not exist.
+        :return:                    List of values in 'record_keys' order.
+        """
+        def finish(response):
+            result = self.client.get_result(response)
+            values = result['values']
+            for position in result['missing']:
+                values[position] = default
+            return values
+
+        return self.run('mget', finish=finish,
+                        keys=[tools.convert_to_string(record_key) for record_key in record_keys])
+
+    def check_key(self, record_key):
+        """
+        Search database table for provided record key.
+
+        :param record_key:          Key of key value pair.
+        :return:                    True if key found in database table (json file). Else false.
+        """
+        return self.run('check', key=tools.convert_to_string(record_key))
+
+    def count_records(self):
+        """
+        Count database table records (key value pairs).
+
+        :return:                    Number of database table records (key value pairs).
+        """
+        return self.run('count')
+
+    def get_all_keys(self):
+        """
+        List all database table record keys.
+
+        :return:                    Database table (json file) keys as list.
+        """
+        return self.run('keys')
+
+    def pipeline(self):
+        """
+        Queue table calls and send them together (see 'TablePipeline').
+
+        :return:                'TablePipeline' object.
+        """
+        return TablePipeline(self.client, self.table_name)
+
+
+class TablePipeline(RemoteTable):
+    def __init__(self, client, table_name):
+        """
+        Initialize TablePipeline instance. Table calls are queued and return None; 'execute' (or leaving the
+        'with' block) sends them in one write and collects their results in 'results'.
+
+        :param client:          'DatabaseClient' object.
+        :param table_name:      Key value store or table name (json file name).
+        :returns:               Initialized 'TablePipeline' object.
+        """
+        super().__init__(client, table_name)
+        self.queued = []
+        self.results = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        if exception_type is None:
+            self.execute()
+
+    def run(self, operation, finish=None, **fields):
+        self.queued.append((dict(op=operation, table=self.table_name, **fields), finish))
+
+    def execute(self):
+        """
+        Send queued calls and collect their results in call order.
+
+        Every call runs even when an earlier one fails; failed calls hold their exception in 'results'.
+
+        :return:                List of results.
+        :raises JsonDatabaseError:  First error of the queued calls.
+        """
+        queued, self.queued = self.queued, []
+        responses = self.client.send([request for request, finish in queued]) if queued else []
+        self.results = []
+        first_error = None
+        for (request, finish), response in zip(queued, responses):
+            try:
+                self.results.append((finish or self.client.get_result)(response))
+            except exceptions.JsonDatabaseError as error:
+                self.results.append(error)
+                first_error = first_error or error
+        if first_error is not None:
+            raise first_error
+        return self.results
@@ -0,0 +1,322 @@
+"""
+This module provides class functions for initializing and using the DatabaseServer class.
+
+The module includes an asyncio server (TCP or Unix socket) that owns a database, so worker processes share
+one in-memory copy of each table instead of each loading and parsing the table file. Tables are opened once,
+with the table cache enabled, and kept hot; writes from every connection are queued per table and saved one
+table rewrite at a time (see 'AsyncKeyValueTable'), so concurrent writers never race on the table file.
+
+Requests and responses are newline-delimited JSON objects:
+    {"id": 1, "op": "get", "table": "sample_table", "key": "record_1"}
+    {"id": 1, "result": "value"}    or    {"id": 1, "error": "KeyNotFound", "message": "record_1"}
+
+Clients may pipeline requests (send many without waiting); responses are returned in request order. Writes
+on a connection run one after another in request order (writes from different connections are still saved
+together), and a read waits for the connection's earlier writes, so every connection reads its own writes.
+"""
+
+import asyncio
+import os
+import threading
+import json_database.database.async_key_value_database as akvd
+import json_database.tools.json_backend as json_backend
+import json_database.tools.tools as tools
+
+write_operations = ('set', 'mset', 'delete', 'mdelete')
+
+class DatabaseServer:
+    def __init__(self, database_name, host='127.0.0.1', port=0, unix_path=None, max_workers=4,
+                 max_request_bytes=67108864, **table_options):
+        """
+        Initialize DatabaseServer instance.
+
+        :param database_name:   Database name.
+        :param host:            TCP address to listen on.
+        :param port:            TCP port. 0 picks a free port (see 'address').
+        :param unix_path:       Unix socket path. When given, the server listens there instead of TCP.
+        :param max_workers:     Thread pool size running table file I/O.
+        :param max_request_bytes:   Longest accepted request line.
+        :param table_options:   Keyword arguments passed to every table (e.g. 'typed_values'). Tables always run
+                                in strict mode; 'use_cache' defaults to True.
+        :returns:               Initialized 'DatabaseServer' object.
+        """
+        self.database = akvd.AsyncKeyValueDatabase(database_name, max_workers=max_workers)
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.max_request_bytes = max_request_bytes
+        self.table_options = {'use_cache': True, **table_options, 'strict': True}
+        self.server = None
+        self.address = None
+        self.connection_tasks = set()
+        self.loop = None
+        self.thread = None
+        self.operations = dict(ping=self.ping, get=self.get_value, mget=self.get_many, set=self.set_pair,
+                               mset=self.set_many, delete=self.delete_pair, mdelete=self.delete_many,
+                               check=self.check_key, count=self.count_records, keys=self.get_all_keys)
+
+    def set_database_directory(self, use_current_directory=True, new_directory_path=None):
+        """
+        Assign database working directory (see 'KeyValueDatabase.set_database_directory').
+
+        :param use_current_directory:   Default true. Use current working directory as database directory location.
+        :param new_directory_path:      When 'use_current_directory' is False, provide desired path.
+        :return:                        Database directory updated.
+        """
+        self.database.set_database_directory(use_current_directory=use_current_directory,
+                                             new_directory_path=new_directory_path)
+
+    async def start(self):
+        """
+        Start listening for connections.
+
+        :return:                Server address: (host, port) tuple, or the Unix socket path.
+        """
+        if self.unix_path is not None:
+            self.server = await asyncio.start_unix_server(self.handle_connection, path=self.unix_path,
+                                                          limit=self.max_request_bytes)
+            self.address = self.unix_path
+        else:
+            self.server = await asyncio.start_server(self.handle_connection, host=self.host, port=self.port,
+                                                     limit=self.max_request_bytes)
+            self.address = self.server.sockets[0].getsockname()[:2]
+        return self.address
+
+    async def serve_forever(self):
+        """
+        Start the server and run until cancelled, then close it.
+
+        :return:                Server closed; queued table writes saved.
+        """
+        if self.server is None:
+            await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """
+        Stop listening, close open connections and wait for queued table writes.
+
+        :return:                Server closed; connection tasks finished; executor shut down.
+        """
+        if self.server is not None:
+            self.server.close()
+            for task in list(self.connection_tasks):
+                task.cancel()
+            await asyncio.gather(*self.connection_tasks, return_exceptions=True)
+            await self.server.wait_closed()
+            self.server = None
+        await self.database.close()
+
+    def start_background(self):
+        """
+        Run the server on an event loop in a daemon thread, for synchronous programs and tests.
+
+        :return:                Server address (see 'start').
+        """
+        started = threading.Event()
+        startup_errors = []
+        self.loop = asyncio.new_event_loop()
+
+        def run_loop():
+            try:
+                self.loop.run_until_complete(self.start())
+            except Exception as error:
+                startup_errors.append(error)
+                return
+            finally:
+                started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run_loop, daemon=True)
+        self.thread.start()
+        started.wait()
+        if startup_errors:
+            self.thread.join()
+            self.loop.close()
+            raise startup_errors[0]
+        return self.address
+
+    def stop_background(self):
+        """
+        Close a server started with 'start_background' and stop its thread.
+
+        :return:                Server closed; event loop thread finished.
+        """
+        asyncio.run_coroutine_threadsafe(self.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serve one client connection: read requests, run them and send responses in request order.
+
+        :param reader:          'asyncio.StreamReader' of the connection.
+        :param writer:          'asyncio.StreamWriter' of the connection.
+        :return:                Connection closed when the client disconnects.
+        """
+        loop = asyncio.get_running_loop()
+        responses = asyncio.Queue()
+        sender = loop.create_task(self.send_responses(responses, writer))
+        request_tasks = set()
+        last_write = None
+        connection_task = asyncio.current_task()
+        self.connection_tasks.add(connection_task)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json_backend.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError(f'request is not a JSON object: {line[:80]!r}')
+                except ValueError as error:
+                    response = loop.create_future()
+                    response.set_result(self.build_error(None, error))
+                    responses.put_nowait(response)
+                    continue
+
+                if request.get('op') in write_operations:
+                    response = loop.create_task(self.execute_after(last_write, request))
+                    last_write = response
+                else:
+                    if last_write is not None:
+                        await asyncio.wait([last_write])
+                        last_write = None
+                    response = loop.create_task(self.execute(request))
+                request_tasks.add(response)
+                response.add_done_callback(request_tasks.discard)
+                responses.put_nowait(response)
+        except (ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # Server closing (see 'close'): drop unsent responses, but finish accepted requests below.
+            sender.cancel()
+        finally:
+            responses.put_nowait(None)
+            try:
+                await asyncio.gather(sender, return_exceptions=True)
+            except asyncio.CancelledError:
+                sender.cancel()
+            await asyncio.gather(*request_tasks, return_exceptions=True)
+            self.connection_tasks.discard(connection_task)
+            writer.close()
+
+    async def send_responses(self, responses, writer):
+        """
+        Write responses in request order, flushing once no further response is ready.
+
+        :param responses:       'asyncio.Queue' of response futures, ended by None.
+        :param writer:          'asyncio.StreamWriter' of the connection.
+        :return:                Every response sent.
+        """
+        while True:
+            response = await responses.get()
+            if response is None:
+                return
+            writer.write((json_backend.dumps(await response) + '\n').encode('utf-8'))
+            if responses.empty():
+                await writer.drain()
+
+    async def execute(self, request):
+        """
+        Run one request.
+
+        :param request:         Request dictionary with 'id', 'op' and operation fields.
+        :return:                Response dictionary with 'result', or 'error' and 'message'.
+        """
+        try:
+            operation = self.operations[request.get('op')]
+        except KeyError:
+            return self.build_error(request.get('id'), ValueError(f'unsupported operation: {request.get("op")!r}'))
+        try:
+            return {'id': request.get('id'), 'result': await operation(request)}
+        except Exception as error:
+            return self.build_error(request.get('id'), error)
+
+    async def execute_after(self, previous_write, request):
+        """
+        Run a write request once the connection's previous write finished, so writes keep request order.
+
+        :param previous_write:  Task of the previous write on the connection, or None.
+        :param request:         Request dictionary with 'id', 'op' and operation fields.
+        :return:                Response dictionary (see 'execute').
+        """
+        if previous_write is not None:
+            await asyncio.wait([previous_write])
+        return await self.execute(request)
+
+    @staticmethod
+    def build_error(request_id, error):
+        """
+        Format exception as error response.
+
+        :param request_id:      Request identifier (None for unparsable requests).
+        :param error:           Exception raised by the request.
+        :return:                Response dictionary with exception class name and message.
+        """
+        message = str(error.args[0]) if isinstance(error, KeyError) and error.args else str(error)
+        return {'id': request_id, 'error': type(error).__name__, 'message': message}
+
+    def get_table(self, request):
+        """
+        Retrieve hot table object for the request's table.
+
+        :param request:         Request dictionary with 'table'.
+        :return:                'AsyncKeyValueTable' object shared by every connection.
+        :raises ValueError:     Table name missing or not a plain file name.
+        """
+        table_name = request.get('table')
+        if not isinstance(table_name, str) or not table_name or os.path.basename(table_name) != table_name:
+            raise ValueError(f'invalid table name: {table_name!r}')
+        return self.database.get_table(table_name, **self.table_options)
+
+    async def ping(self, request):
+        return 'pong'
+
+    async def get_value(self, request):
+        return await self.get_table(request).get_value(request['key'])
+
+    async def get_many(self, request):
+        """
+        Retrieve values of many records from one table load.
+
+        :param request:         Request dictionary with 'table' and 'keys'.
+        :return:                Dictionary of 'values' (None for missing keys) and 'missing' key positions.
+        """
+        table = self.get_table(request)
+        records = await table.load_records()
+        values, missing = [], []
+        for position, record_key in enumerate(request['keys']):
+            record_key = tools.convert_to_string(record_key)
+            if record_key in records:
+                values.append(table.table.decode_record_value(records[record_key]))
+            else:
+                values.append(None)
+                missing.append(position)
+        return dict(values=values, missing=missing)
+
+    async def set_pair(self, request):
+        await self.get_table(request).set_pair(request['key'], request['value'])
+
+    async def set_many(self, request):
+        await self.get_table(request).set_many(request['records'])
+
+    async def delete_pair(self, request):
+        await self.get_table(request).delete_pair(request['key'])
+
+    async def delete_many(self, request):
+        await self.get_table(request).delete_many(request['keys'])
+
+    async def check_key(self, request):
+        return await self.get_table(request).check_key(request['key'])
+
+    async def count_records(self, request):
+        return await self.get_table(request).count_records()
+
+    async def get_all_keys(self, request):
+        return await self.get_table(request).get_all_keys()
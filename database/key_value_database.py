@@ -1,25 +1,32 @@
 """
 This module provides class functions for initializing and using the KeyValueDatabase class.
 
-The module includes functions for managing database(s) at the file system level.
+The module includes functions for managing database(s) at the file system level, and database-wide table
+operations run in parallel on a thread or process pool.
 """
 
 import json_database.tools.tools as tools
+import json_database.tools.exceptions as exceptions
+import json_database.database.parallel_operations as parallel_operations
 import os
 from shutil import copytree
 
 class KeyValueDatabase:
-    def __init__(self, database_name):
+    def __init__(self, database_name, strict=False):
         """
         Initialize KeyValueDatabase instance.
 
         :param database_name:   Database name.
+        :param strict:          True to raise errors as 'json_database.tools.exceptions' classes (KeyNotFound,
+                                TableNotFound, CorruptTable, LockTimeout) so callers can fail fast or retry.
+                                Else errors are printed and the operation returns None.
         :returns:               Initialized 'KeyValueDatabase' object.
         :raises KeyError:       Required positional argument 'database_name' is missing.
         """
         self.database_parent_directory = None
         self.database_name = database_name
         self.database_path = None
+        self.strict = strict
 
 
 
@@ -45,9 +52,28 @@ class KeyValueDatabase:
             self.database_path = os.path.join(self.database_parent_directory, self.database_name)
 
         except FileExistsError as error:
-            tools.print_error(error_message=error, debug='exist')
+            self.handle_error(error, debug='exist')
         except Exception as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
+
+    def handle_error(self, error, debug=None):
+        """
+        Report error caught by a database or table operation.
+
+        :param error:           Caught exception.
+        :param debug:           Debug or troubleshooting key ('tools.print_error').
+        :return:                Formatted print screen of error when strict mode is off.
+        :raises JsonDatabaseError:  Strict mode - error converted by 'exceptions.convert_error' (other
+                                    exceptions are re-raised unchanged).
+        """
+        if not self.strict:
+            tools.print_error(error_message=error, debug=debug)
+            return
+
+        converted_error = exceptions.convert_error(error, debug=debug)
+        if converted_error is error:
+            raise error
+        raise converted_error from error
 
     def create_database(self):
         """
@@ -65,15 +91,15 @@ class KeyValueDatabase:
                 os.mkdir(self.database_path)
 
         except FileExistsError('Directory already exist.') as error:
-            tools.print_error(error_message=error, debug='exist')
+            self.handle_error(error, debug='exist')
         except FileNotFoundError('Parent directory does not exist.') as error:
-            tools.print_error(error_message=error, debug='dne')
+            self.handle_error(error, debug='dne')
         except PermissionError('Insufficient permissions to directory (database)') as error:
-            tools.print_error(error_message=error, debug='access')
+            self.handle_error(error, debug='access')
         except OSError as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
         except Exception as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
 
     def copy_database(self, copy_database_path):
         """
@@ -96,13 +122,13 @@ class KeyValueDatabase:
                 raise FileExistsError()
 
         except FileExistsError('Directory already exist.') as error:
-            tools.print_error(error_message=error, debug='exist')
+            self.handle_error(error, debug='exist')
         except FileNotFoundError('Parent directory does not exist.') as error:
-            tools.print_error(error_message=error, debug='dne')
+            self.handle_error(error, debug='dne')
         except PermissionError('Insufficient permissions to directory (database)') as error:
-            tools.print_error(error_message=error, debug='access')
+            self.handle_error(error, debug='access')
         except Exception as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
 
     @classmethod
     def delete_database(cls, database_location):
@@ -157,13 +183,13 @@ class KeyValueDatabase:
             database_objects = os.listdir(self.database_path)
             return database_objects
         except FileNotFoundError as error:
-            tools.print_error(error_message=error, debug='dne')
+            self.handle_error(error, debug='dne')
         except PermissionError as error:
-            tools.print_error(error_message=error, debug='access')
+            self.handle_error(error, debug='access')
         except OSError as error:
-            tools.print_error(error_message=error, debug='os')
+            self.handle_error(error, debug='os')
         except Exception as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
 
     def count_database_objects(self):
         """
@@ -196,13 +222,13 @@ class KeyValueDatabase:
             return database_table_files_trimmed
 
         except FileNotFoundError as error:
-            tools.print_error(error_message=error, debug='dne')
+            self.handle_error(error, debug='dne')
         except PermissionError as error:
-            tools.print_error(error_message=error, debug='access')
+            self.handle_error(error, debug='access')
         except OSError as error:
-            tools.print_error(error_message=error, debug='os')
+            self.handle_error(error, debug='os')
         except Exception as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
 
     def count_database_tables(self):
         """
@@ -214,4 +240,98 @@ class KeyValueDatabase:
         :raises OSError:                Unexpected operating system error.
         :raises Exception:              Unexpected error.
         """
-        return len(self.list_database_tables())
\ No newline at end of file
+        return len(self.list_database_tables())
+
+    def run_table_operations(self, operation, *arguments, table_names=None, executor='thread', max_workers=None,
+                             table_options=None):
+        """
+        Run a table operation on every database table in parallel.
+
+        Use 'executor' 'process' for CPU-bound parsing of many large tables; 'thread' avoids process start-up
+        and suits I/O-bound or small tables.
+
+        :param operation:           Function from 'parallel_operations' taking database path, table name,
+                                    table options and 'arguments'.
+        :param arguments:           Extra positional arguments passed to 'operation'.
+        :param table_names:         Tables to process. None processes every database table.
+        :param executor:            'thread' or 'process'.
+        :param max_workers:         Pool size. None uses the executor default.
+        :param table_options:       Keyword arguments passed to each 'KeyValueTable' (e.g. 'table_format').
+        :return:                    Dictionary of table name to operation result. Failed tables are omitted
+                                    (strict mode raises the first failure).
+        :raises KeyError:           Unsupported executor.
+        """
+        try:
+            executor_class = parallel_operations.get_executor_class(executor)
+        except KeyError as error:
+            self.handle_error(error, debug='executor')
+            return {}
+
+        table_names = self.list_database_tables() if table_names is None else table_names
+        table_options = table_options or {}
+        results = {}
+        with executor_class(max_workers=max_workers) as pool:
+            futures = {table_name: pool.submit(operation, self.database_path, table_name, table_options, *arguments)
+                       for table_name in table_names or []}
+            for table_name, future in futures.items():
+                try:
+                    results[table_name] = future.result()
+                except Exception as error:
+                    if self.strict:
+                        raise
+                    tools.print_error(error_message=f'{table_name}: {error}', debug='unknown')
+        return results
+
+    def count_all_records(self, **pool_options):
+        """
+        Count records across all database tables in parallel.
+
+        :param pool_options:        'table_names', 'executor', 'max_workers' or 'table_options'
+                                    (see 'run_table_operations').
+        :return:                    Dictionary of table name to number of records.
+        """
+        return self.run_table_operations(parallel_operations.count_table_records, **pool_options)
+
+    def export_tables(self, export_directory, **pool_options):
+        """
+        Export every database table to '<export_directory>/<table_name>.json' as a standard JSON object.
+
+        :param export_directory:    Directory receiving exported tables (created when missing).
+        :param pool_options:        See 'run_table_operations'.
+        :return:                    Dictionary of table name to number of records exported.
+        """
+        os.makedirs(export_directory, exist_ok=True)
+        return self.run_table_operations(parallel_operations.export_table, export_directory, **pool_options)
+
+    def validate_tables(self, **pool_options):
+        """
+        Check every database table parses with the configured table format.
+
+        :param pool_options:        See 'run_table_operations'.
+        :return:                    Dictionary of invalid table name to error description. Empty when all valid.
+        """
+        results = self.run_table_operations(parallel_operations.validate_table, **pool_options)
+        return {table_name: error for table_name, error in results.items() if error is not None}
+
+    def rebuild_tables(self, **pool_options):
+        """
+        Read and rewrite every database table, normalizing record lines.
+
+        Pass 'table_options' with 'durability' to choose how tables are replaced.
+
+        :param pool_options:        See 'run_table_operations'.
+        :return:                    Dictionary of table name to number of records rewritten.
+        """
+        return self.run_table_operations(parallel_operations.rebuild_table, **pool_options)
+
+    def find_key(self, record_key, **pool_options):
+        """
+        Search every database table for a record key in parallel.
+
+        :param record_key:          Key of key value pair.
+        :param pool_options:        See 'run_table_operations'.
+        :return:                    Dictionary of table name to stored record value, for tables holding the key.
+        """
+        results = self.run_table_operations(parallel_operations.find_table_key, tools.convert_to_string(record_key),
+                                            **pool_options)
+        return {table_name: record_value for table_name, record_value in results.items() if record_value is not None}
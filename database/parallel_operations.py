@@ -0,0 +1,105 @@
+"""
+This module provides functions for running table operations across a database in parallel.
+
+Each function handles one database table and is defined at module level so it can be sent to a process
+pool as well as a thread pool. Tables are opened inside the worker from the database path, table name and
+table options, so nothing but plain values crosses a process boundary.
+"""
+
+import os
+import json_database.tools.json_backend as json_backend
+
+executor_names = {'thread': 'ThreadPoolExecutor', 'process': 'ProcessPoolExecutor'}
+
+
+def get_executor_class(executor):
+    """
+    Retrieve pool executor class ('concurrent.futures' is imported on first use, keeping start-up fast).
+
+    :param executor:        'thread' or 'process'.
+    :return:                'ThreadPoolExecutor' or 'ProcessPoolExecutor' class.
+    :raises KeyError:       Unsupported executor.
+    """
+    executor_name = executor_names[executor]
+    import concurrent.futures
+
+    return getattr(concurrent.futures, executor_name)
+
+
+def open_database_table(database_path, table_name, table_options):
+    """
+    Create table object for a table within a database directory.
+
+    :param database_path:   Database directory path.
+    :param table_name:      Database table (json file) name.
+    :param table_options:   Keyword arguments passed to 'KeyValueTable'.
+    :return:                'KeyValueTable' object.
+    """
+    # Imported here: 'key_value_table' imports 'key_value_database', which imports this module.
+    import json_database.table.key_value_table as kvt
+
+    table = kvt.KeyValueTable(os.path.basename(database_path), table_name, **table_options)
+    table.database_parent_directory = os.path.dirname(database_path)
+    table.database_path = database_path
+    return table
+
+
+def count_table_records(database_path, table_name, table_options):
+    """
+    Count records of one database table.
+
+    :return:                Number of records (key value pairs).
+    """
+    return len(open_database_table(database_path, table_name, table_options).load_table_records())
+
+
+def export_table(database_path, table_name, table_options, export_directory):
+    """
+    Write one database table to '<export_directory>/<table_name>.json' as a standard JSON object.
+
+    :param export_directory:    Existing directory receiving exported tables.
+    :return:                    Number of records exported.
+    """
+    records = open_database_table(database_path, table_name, table_options).load_table_records()
+    with open(os.path.join(export_directory, table_name + '.json'), 'w') as export_file_object:
+        export_file_object.write(json_backend.dumps(dict(records)))
+    return len(records)
+
+
+def validate_table(database_path, table_name, table_options):
+    """
+    Check one database table parses with the configured table format.
+
+    :return:                None when the table is valid. Else error description.
+    """
+    try:
+        open_database_table(database_path, table_name, table_options).load_table_records()
+    except Exception as error:
+        return f'{type(error).__name__}: {error}'
+    return None
+
+
+def rebuild_table(database_path, table_name, table_options):
+    """
+    Read and rewrite one database table, normalizing every record line.
+
+    :return:                Number of records rewritten.
+    """
+    table = open_database_table(database_path, table_name, table_options)
+    with table.write_locked():
+        records = table.read_table_records()
+        table.write_table(records)
+    return len(records)
+
+
+def find_table_key(database_path, table_name, table_options, record_key):
+    """
+    Search one database table for a record key.
+
+    :param record_key:      Key of key value pair (string).
+    :return:                Stored (encoded) record value. None when key not found.
+    """
+    try:
+        return open_database_table(database_path, table_name, table_options).lookup_record(record_key)
+    except KeyError:
+        return None
@@ -0,0 +1,350 @@
+"""
+This module provides class functions for initializing and using the WriteAheadLog class.
+
+The module includes a per-database write-ahead log ('<database>.wal') shared by every table of the database
+opened with 'write_ahead_log' enabled. Table changes are appended to the log and acknowledged once written
+(or, for tables with 'durability' 'fsync', once synced to disk). Writers waiting for a sync are group
+committed: one thread syncs the log on behalf of every writer whose record was appended before the sync
+started.
+
+Logged changes are kept in memory per table so reads see them, and are saved to the table files by
+checkpoints: automatically once the log reaches 'checkpoint_bytes', and on request. A checkpoint moves the
+log aside ('<database>.wal.checkpoint') so appends continue in a fresh log while tables are saved. Opening
+the log replays any records left by a previous process and checkpoints them.
+
+The log is owned by one process: it holds an exclusive file lock ('<database>.wal.lock') while the log is
+open, and opening the log in a second process raises 'LockTimeout' instead of replaying and truncating a log
+the owner is still appending to. File locks are skipped on platforms without 'fcntl' (Windows).
+"""
+
+import os
+import threading
+import json_database.tools.json_backend as json_backend
+import json_database.tools.exceptions as exceptions
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+class WriteAheadLog:
+    registry = {}
+    registry_lock = threading.Lock()
+
+    def __init__(self, database_path, checkpoint_bytes=1048576):
+        """
+        Initialize WriteAheadLog instance and replay records left in the log. Use 'for_database' to share one
+        log per database.
+
+        :param database_path:       Database directory path.
+        :param checkpoint_bytes:    Log size that triggers a background checkpoint.
+        :returns:                   Initialized 'WriteAheadLog' object.
+        """
+        self.database_path = database_path
+        self.log_path = os.path.join(database_path, os.path.basename(database_path) + '.wal')
+        self.checkpoint_path = self.log_path + '.checkpoint'
+        self.checkpoint_bytes = checkpoint_bytes
+        self.append_lock = threading.Lock()
+        self.checkpoint_lock = threading.Lock()
+        self.overlay_lock = threading.Lock()
+        self.sync_condition = threading.Condition()
+        self.written_sequence = 0
+        self.synced_sequence = 0
+        self.syncing = False
+        self.overlays = {}
+        self.checkpoint_overlays = {}
+        self.tables = {}
+        self.table_options = {}
+        self.log_size = 0
+        self.file_descriptor = None
+        self.owner_lock = None
+        self.checkpoint_thread = None
+        self.recover()
+
+    @classmethod
+    def for_database(cls, database_path, checkpoint_bytes=1048576):
+        """
+        Retrieve the process-wide write-ahead log for a database.
+
+        :param database_path:       Database directory path.
+        :param checkpoint_bytes:    Log size that triggers a background checkpoint (first call only).
+        :return:                    'WriteAheadLog' object shared by every table of the database.
+        """
+        database_path = os.path.abspath(database_path)
+        with cls.registry_lock:
+            if database_path not in cls.registry:
+                cls.registry[database_path] = cls(database_path, checkpoint_bytes=checkpoint_bytes)
+            return cls.registry[database_path]
+
+    def register(self, table):
+        """
+        Use table object to save the table's logged changes at checkpoints.
+
+        :param table:           'KeyValueTable' object.
+        :return:                Table registered under its table name.
+        """
+        self.tables[table.table_file] = table
+        self.table_options[table.table_file] = (table.table_format, table.typed_values)
+
+    def recover(self):
+        """
+        Open the log, replay complete records (an interrupted checkpoint first) and checkpoint them.
+
+        :return:                Log open for appends; replayed changes saved to table files.
+        :raises LockTimeout:    Another process has the log open.
+        """
+        os.makedirs(self.database_path, exist_ok=True)
+        self.acquire_owner_lock()
+        if os.path.exists(self.checkpoint_path):
+            self.replay(self.checkpoint_path)
+        self.file_descriptor = os.open(self.log_path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o666)
+        self.replay(self.log_path)
+
+        for table_name, changes in self.overlays.items():
+            self.get_table(table_name).write_changes(changes)
+        self.overlays = {}
+        os.ftruncate(self.file_descriptor, 0)
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def acquire_owner_lock(self):
+        """
+        Take the exclusive file lock held while the log is open. The lock file is never rotated, so the lock
+        stays valid while checkpoints replace the log file.
+
+        :return:                Lock file open and locked ('fcntl' platforms only).
+        :raises LockTimeout:    Another process holds the lock.
+        """
+        if fcntl is None:
+            return
+        lock_file_object = open(self.log_path + '.lock', 'a+')
+        try:
+            fcntl.flock(lock_file_object.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError as error:
+            lock_file_object.close()
+            raise exceptions.LockTimeout(f'Write-ahead log in use by another process: {self.log_path}') from error
+        self.owner_lock = lock_file_object
+
+    def replay(self, log_path):
+        """
+        Apply complete log records to the in-memory overlays, stopping at a partial record (interrupted append).
+
+        :param log_path:        Log file path.
+        :return:                Overlays updated.
+        """
+        with open(log_path, 'rb') as log_reader:
+            for line in log_reader:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError('Partial log record.')
+                    table_name, table_format, typed_values, changes = json_backend.loads(line)
+                except ValueError:
+                    break
+
+                self.table_options[table_name] = (table_format, typed_values)
+                self.apply_overlay(table_name, self.decode_changes(changes))
+
+    def append(self, table, changes):
+        """
+        Append table changes to the log and wait until they are acknowledged.
+
+        :param table:           'KeyValueTable' object the changes belong to.
+        :param changes:         Dictionary of record keys to normalized values or 'DELETE_RECORD'.
+        :return:                Changes logged; synced to disk when table 'durability' is 'fsync'.
+        """
+        if self.tables.get(table.table_file) is not table:
+            self.register(table)
+        line = (json_backend.dumps([table.table_file, table.table_format, table.typed_values,
+                                    self.encode_changes(changes)]) + '\n').encode('utf-8')
+
+        with self.append_lock:
+            os.write(self.file_descriptor, line)
+            self.log_size += len(line)
+            self.apply_overlay(table.table_file, changes)
+            self.written_sequence += 1
+            sequence = self.written_sequence
+
+        if table.durability == 'fsync':
+            self.sync(sequence)
+        if self.log_size >= self.checkpoint_bytes:
+            self.checkpoint(background=True)
+
+    def sync(self, sequence):
+        """
+        Wait until the log is synced to disk up to a record, syncing as group leader when no sync is running.
+
+        :param sequence:        Sequence number of the appended record.
+        :return:                Record durable on disk.
+        """
+        with self.sync_condition:
+            while self.synced_sequence < sequence:
+                if self.syncing:
+                    self.sync_condition.wait()
+                    continue
+
+                self.syncing = True
+                target_sequence = self.written_sequence
+                self.sync_condition.release()
+                try:
+                    os.fsync(self.file_descriptor)
+                finally:
+                    self.sync_condition.acquire()
+                    self.syncing = False
+                    self.sync_condition.notify_all()
+                self.synced_sequence = max(self.synced_sequence, target_sequence)
+
+    def apply_overlay(self, table_name, changes):
+        """
+        Record logged changes in the table's in-memory overlay.
+
+        :param table_name:      Database table name.
+        :param changes:         Dictionary of record keys to values or 'DELETE_RECORD'.
+        :return:                Overlay updated.
+        """
+        with self.overlay_lock:
+            overlay = self.overlays.setdefault(table_name, {})
+            for record_key, record_value in changes.items():
+                overlay.pop(record_key, None)
+                overlay[record_key] = record_value
+
+    def get_overlay(self, table_name):
+        """
+        Copy changes logged for a table and not yet saved to the table file.
+
+        :param table_name:      Database table name.
+        :return:                Dictionary of record keys to values or 'DELETE_RECORD'.
+        """
+        with self.overlay_lock:
+            overlay = dict(self.checkpoint_overlays.get(table_name, ()))
+            overlay.update(self.overlays.get(table_name, ()))
+            return overlay
+
+    def lookup(self, table_name, record_key, default=None):
+        """
+        Retrieve a change logged for a record and not yet saved to the table file.
+
+        :param table_name:      Database table name.
+        :param record_key:      Key of key value pair (string).
+        :param default:         Returned when the record has no logged change.
+        :return:                Logged value, 'DELETE_RECORD' or 'default'.
+        """
+        with self.overlay_lock:
+            for overlays in (self.overlays, self.checkpoint_overlays):
+                overlay = overlays.get(table_name)
+                if overlay is not None and record_key in overlay:
+                    return overlay[record_key]
+            return default
+
+    def checkpoint(self, background=False):
+        """
+        Save logged changes to the table files, then discard them from the log.
+
+        The current log is synced and moved aside, and appends continue in a fresh log while the tables are
+        saved (no append waits on a table lock). Reads keep using the moved changes until every table is
+        saved; a crash before then replays them again on open.
+
+        :param background:      True to checkpoint on a background thread. Else false.
+        :return:                Table files updated; checkpointed log removed.
+        """
+        if background:
+            if self.checkpoint_thread is None or not self.checkpoint_thread.is_alive():
+                self.checkpoint_thread = threading.Thread(target=self.checkpoint, daemon=True)
+                self.checkpoint_thread.start()
+            return
+
+        with self.checkpoint_lock:
+            with self.append_lock:
+                if self.log_size and not os.path.exists(self.checkpoint_path):
+                    self.rotate_log()
+                with self.overlay_lock:
+                    for table_name, overlay in self.overlays.items():
+                        self.checkpoint_overlays.setdefault(table_name, {}).update(overlay)
+                    self.overlays = {}
+
+            for table_name in list(self.checkpoint_overlays):
+                changes = self.checkpoint_overlays[table_name]
+                if changes:
+                    self.get_table(table_name).write_changes(dict(changes))
+
+            with self.overlay_lock:
+                self.checkpoint_overlays = {}
+            if os.path.exists(self.checkpoint_path):
+                os.remove(self.checkpoint_path)
+
+    def rotate_log(self):
+        """
+        Sync the log, move it to the checkpoint path and continue in an empty log. Caller holds 'append_lock'.
+
+        :return:                Fresh log open for appends; writers waiting for a sync released.
+        """
+        with self.sync_condition:
+            while self.syncing:
+                self.sync_condition.wait()
+            os.fsync(self.file_descriptor)
+            os.replace(self.log_path, self.checkpoint_path)
+            os.close(self.file_descriptor)
+            self.file_descriptor = os.open(self.log_path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o666)
+            self.log_size = 0
+            self.synced_sequence = self.written_sequence
+            self.sync_condition.notify_all()
+
+    def get_table(self, table_name):
+        """
+        Retrieve table object saving a table's logged changes.
+
+        :param table_name:      Database table name.
+        :return:                Registered 'KeyValueTable' object, or one created with the logged table options.
+        """
+        if table_name not in self.tables:
+            # Imported here: 'key_value_table' imports this module.
+            import json_database.table.key_value_table as kvt
+
+            table_format, typed_values = self.table_options.get(table_name, ('text', False))
+            table = kvt.KeyValueTable(os.path.basename(self.database_path), table_name,
+                                      table_format=table_format, typed_values=typed_values)
+            table.database_parent_directory = os.path.dirname(self.database_path)
+            table.database_path = self.database_path
+            self.tables[table_name] = table
+        return self.tables[table_name]
+
+    def close(self):
+        """
+        Checkpoint logged changes and close the log.
+
+        :return:                Log closed and removed from the process-wide registry.
+        """
+        with self.registry_lock:
+            if self.registry.get(self.database_path) is self:
+                del self.registry[self.database_path]
+        if self.file_descriptor is not None:
+            self.checkpoint()
+            os.close(self.file_descriptor)
+            self.file_descriptor = None
+        if self.owner_lock is not None:
+            self.owner_lock.close()
+            self.owner_lock = None
+
+    @staticmethod
+    def encode_changes(changes):
+        """
+        Convert changes to JSON serializable log entries.
+
+        :param changes:         Dictionary of record keys to values or 'DELETE_RECORD'.
+        :return:                List of '[key, value]' (set) and '[key]' (delete) entries.
+        """
+        import json_database.table.key_value_table as kvt
+
+        return [[record_key] if record_value is kvt.DELETE_RECORD else [record_key, record_value]
+                for record_key, record_value in changes.items()]
+
+    @staticmethod
+    def decode_changes(entries):
+        """
+        Convert log entries back to changes.
+
+        :param entries:         List of '[key, value]' and '[key]' entries.
+        :return:                Dictionary of record keys to values or 'DELETE_RECORD'.
+        """
+        import json_database.table.key_value_table as kvt
+
+        return {entry[0]: entry[1] if len(entry) > 1 else kvt.DELETE_RECORD for entry in entries}
@@ -0,0 +1,363 @@
+"""
+This module provides class functions for initializing and using the AsyncKeyValueTable class.
+
+The module includes an asyncio interface to a database table. Blocking file I/O runs on a bounded thread
+pool so the event loop is never stalled; concurrent reads share one table load and writes queued while a
+flush is pending are saved together with a single table rewrite.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json_database.table.key_value_table as kvt
+import json_database.tools.tools as tools
+
+class AsyncKeyValueTable:
+    def __init__(self, database_name, table_name, executor=None, max_workers=4, table_class=None,
+                 **table_options):
+        """
+        Initialize AsyncKeyValueTable instance.
+
+        :param database_name:   Database name.
+        :param table_name:      Key value store or table name (json file name).
+        :param executor:        Executor running blocking table I/O. None creates a private thread pool.
+        :param max_workers:     Thread pool size when 'executor' is None.
+        :param table_class:     Table class wrapped (default 'KeyValueTable').
+        :param table_options:   Keyword arguments passed to the table class (e.g. 'use_cache').
+        :returns:               Initialized 'AsyncKeyValueTable' object.
+        """
+        table_class = table_class or kvt.KeyValueTable
+        self.table = table_class(database_name, table_name, **table_options)
+        self.owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers)
+        self.pending_load = None
+        self.pending_changes = {}
+        self.flush_waiters = []
+        self.flush_task = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exception_type, exception_value, traceback):
+        await self.close()
+
+    def set_database_directory(self, use_current_directory=True, new_directory_path=None):
+        """
+        Assign database working directory (see 'KeyValueDatabase.set_database_directory').
+
+        :param use_current_directory:   Default true. Use current working directory as database directory location.
+        :param new_directory_path:      When 'use_current_directory' is False, provide desired path.
+        :return:                        Wrapped table directory updated.
+        """
+        self.table.set_database_directory(use_current_directory=use_current_directory,
+                                          new_directory_path=new_directory_path)
+
+    async def run(self, function, *args, **kwargs):
+        """
+        Run blocking table function on the executor.
+
+        :param function:        Callable.
+        :return:                Function result.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: function(*args, **kwargs))
+
+    def snapshot_records(self):
+        """
+        Load table records as a dictionary (runs on the executor).
+
+        :return:                Dictionary of records (key value pairs).
+        """
+        records = self.table.load_table_records()
+        return records if isinstance(records, dict) else dict(records)
+
+    async def load_records(self):
+        """
+        Load table records, sharing one in-flight load between concurrent callers.
+
+        :return:                Dictionary of records (key value pairs). Callers must not modify it.
+        """
+        if self.pending_load is None:
+            loop = asyncio.get_running_loop()
+            self.pending_load = loop.run_in_executor(self.executor, self.snapshot_records)
+            self.pending_load.add_done_callback(lambda future: self.clear_load(future))
+        return await asyncio.shield(self.pending_load)
+
+    def clear_load(self, future):
+        """
+        Forget completed load so later callers read the table again.
+
+        :param future:          Completed load future.
+        :return:                'pending_load' cleared when it still refers to 'future'.
+        """
+        if self.pending_load is future:
+            self.pending_load = None
+
+    async def queue_changes(self, changes):
+        """
+        Queue changes and wait until the flush that includes them is saved.
+
+        :param changes:         Dictionary of record keys to encoded values or 'DELETE_RECORD'.
+        :return:                Changes saved to database table.
+        """
+        loop = asyncio.get_running_loop()
+        for record_key, record_value in changes.items():
+            self.pending_changes.pop(record_key, None)
+            self.pending_changes[record_key] = record_value
+
+        waiter = loop.create_future()
+        self.flush_waiters.append(waiter)
+        if self.flush_task is None:
+            self.flush_task = loop.create_task(self.flush())
+        await waiter
+
+    async def flush(self):
+        """
+        Save queued changes with one table rewrite per round until the queue is empty.
+
+        :return:                Queued changes saved; waiting writers released.
+        """
+        try:
+            await asyncio.sleep(0)
+            while self.pending_changes:
+                changes, waiters = self.pending_changes, self.flush_waiters
+                self.pending_changes, self.flush_waiters = {}, []
+                try:
+                    await self.run(self.table.save_changes, changes)
+                except Exception as error:
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_exception(error)
+                else:
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_result(None)
+                self.pending_load = None
+        finally:
+            self.flush_task = None
+
+    async def close(self):
+        """
+        Wait for queued writes and release a private executor.
+
+        :return:                Pending changes saved; executor shut down when owned.
+        """
+        if self.flush_task is not None:
+            await self.flush_task
+        if self.owns_executor:
+            self.executor.shutdown(wait=True)
+
+    async def set_pair(self, record_key, record_value, value_is_instance=False):
+        """
+        Write record (key value pair) to database table.
+
+        :param record_key:          Key of key value pair.
+        :param record_value:        Value of key value pair.
+        :param value_is_instance:   True if pair value is class instance. Else false.
+        :return:                    Key value pair saved to database table (json file).
+        :raises PermissionError:    Insufficient file system permissions.
+        :raises OSError:            Unexpected operating system error.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            record_value = self.table.encode_record_value(record_value, value_is_instance=value_is_instance)
+            await self.queue_changes({tools.convert_to_string(record_key): record_value})
+
+        except PermissionError as error:
+            self.table.handle_error(error, debug='access')
+        except Exception and OSError as error:
+            self.table.handle_error(error, debug='unknown')
+
+    async def set_many(self, records, value_is_instance=False):
+        """
+        Write multiple records (key value pairs) to database table.
+
+        :param records:             Dictionary (or iterable of key value tuples) of records to save.
+        :param value_is_instance:   True if pair values are class instances. Else false.
+        :return:                    Key value pairs saved to database table (json file).
+        :raises PermissionError:    Insufficient file system permissions.
+        :raises OSError:            Unexpected operating system error.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            records = records.items() if isinstance(records, dict) else records
+            changes = {tools.convert_to_string(record_key):
+                           self.table.encode_record_value(record_value, value_is_instance=value_is_instance)
+                       for record_key, record_value in records}
+            await self.queue_changes(changes)
+
+        except PermissionError as error:
+            self.table.handle_error(error, debug='access')
+        except Exception and OSError as error:
+            self.table.handle_error(error, debug='unknown')
+
+    async def delete_pair(self, record_key):
+        """
+        Delete record (key value pair) from database table.
+
+        :param record_key:          Key of key value pair.
+        :return:                    Key value pair removed from database table (json file).
+        :raises KeyError:           Key not found in database table (json file).
+        :raises OSError:            Unexpected operating system error.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            record_key = tools.convert_to_string(record_key)
+            if record_key in self.pending_changes:
+                record_exists = self.pending_changes[record_key] is not kvt.DELETE_RECORD
+            else:
+                record_exists = record_key in await self.load_records()
+            if not record_exists:
+                raise KeyError(record_key)
+            await self.queue_changes({record_key: kvt.DELETE_RECORD})
+
+        except KeyError as error:
+            self.table.handle_error(error, debug='key')
+        except Exception and OSError as error:
+            self.table.handle_error(error, debug='unknown')
+
+    async def delete_many(self, record_keys):
+        """
+        Delete multiple records (key value pairs) from database table. Missing keys are skipped.
+
+        :param record_keys:         Iterable of record keys.
+        :return:                    Key value pairs removed from database table (json file).
+        :raises OSError:            Unexpected operating system error.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            await self.queue_changes({tools.convert_to_string(record_key): kvt.DELETE_RECORD
+                                      for record_key in record_keys})
+
+        except Exception and OSError as error:
+            self.table.handle_error(error, debug='unknown')
+
+    async def get_value(self, record_key, value_is_instance=False, default=tools.NO_DEFAULT):
+        """
+        Retrieve corresponding record's value for provided record key.
+
+        :param record_key:          Key of key value pair.
+        :param value_is_instance:   True if expected value is an instance. Else false.
+        :param default:             Returned when the key or table does not exist, without reporting an error.
+        :return:                    Key value pair value or instance.
+        :raises KeyError:           Key not found in database table (json file).
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            if default is not tools.NO_DEFAULT and not await self.run(self.table.table_exists):
+                return default
+            records = await self.load_records()
+            record_key = tools.convert_to_string(record_key)
+            if default is not tools.NO_DEFAULT and record_key not in records:
+                return default
+            record_value = records[record_key]
+            if value_is_instance:
+                # Unpickling large instances would stall the event loop; decode on the executor.
+                return await self.run(self.table.decode_record_value, record_value, value_is_instance=True)
+            return record_value
+
+        except KeyError as error:
+            self.table.handle_error(error, debug='key')
+        except TypeError as error:
+            self.table.handle_error(error, debug='type_bytes')
+        except Exception as error:
+            self.table.handle_error(error, debug='unknown')
+
+    async def get_key(self, record_value):
+        """
+        Retrieve corresponding record key(s) for provided record value.
+
+        :param record_value:        Value of key value pair.
+        :return:                    List of corresponding (key, value) tuples. 'None' when value does not exist.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            records = await self.load_records()
+            if not self.table.typed_values:
+                record_value = tools.convert_to_string(data=record_value)
+            possible_keys = [item for item in records.items() if item[1] == record_value]
+            return possible_keys or None
+
+        except Exception as error:
+            self.table.handle_error(error, debug='unknown')
+
+    async def check_key(self, record_key):
+        """
+        Search database table for provided record key.
+
+        :param record_key:          Key of key value pair.
+        :return:                    True if key found in database table (json file). Else false.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            return tools.convert_to_string(data=record_key) in await self.load_records()
+
+        except Exception as error:
+            self.table.handle_error(error, debug='unknown')
+
+    async def count_records(self):
+        """
+        Count database table records (key value pairs).
+
+        :return:                    Number of database table records (key value pairs).
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            return len(await self.load_records())
+
+        except Exception as error:
+            self.table.handle_error(error, debug='unknown')
+
+    async def get_all_keys(self):
+        """
+        List all database table record keys.
+
+        :return:                    Database table (json file) keys as list.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            return list(await self.load_records())
+
+        except Exception as error:
+            self.table.handle_error(error, debug='unknown')
+
+    async def table_to_dictionary(self):
+        """
+        Duplicate database table records to dictionary object.
+
+        :return:                    Dictionary database table (json file) records (key value pairs).
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            return dict(await self.load_records())
+
+        except Exception as error:
+            self.table.handle_error(error, debug='unknown')
+
+    async def copy_table(self, table_file_name, table_file_path='.\\'):
+        """
+        Clone database table (see 'KeyValueTable.copy_table').
+
+        :param table_file_name:     File name without extension.
+        :param table_file_path:     Full directory address.
+        :return:                    Replicated document saved to provided path.
+        """
+        await self.run(self.table.copy_table, table_file_name, table_file_path=table_file_path)
+
+    async def rename_table(self, old_table_name, new_table_name):
+        """
+        Rename database table (see 'KeyValueTable.rename_table').
+
+        :param old_table_name:      Database table name.
+        :param new_table_name:      New database table name.
+        :return:                    Renamed database table.
+        """
+        await self.run(self.table.rename_table, old_table_name, new_table_name)
+
+    async def delete_table(self, table_name):
+        """
+        Delete database table (see 'KeyValueTable.delete_table').
+
+        :param table_name:          Database table (json file) name.
+        :return:                    Delete database table (json file) from database (directory).
+        """
+        await self.run(self.table.delete_table, table_name)
@@ -0,0 +1,176 @@
+"""
+This module provides functions for bulk importing records into and exporting records from database tables.
+
+The module includes streaming readers and writers for NDJSON (one '{"key": ..., "value": ...}' object per line),
+CSV (a header row naming the key and value columns) and Python record sources (dictionaries and iterables of
+key value tuples). NDJSON lines are parsed in chunks, optionally spread over a thread or process pool; the
+chunk parser is defined at module level so it can be sent to a process pool.
+"""
+
+import csv
+import os
+from collections import deque
+from itertools import islice
+import json_database.tools.json_backend as json_backend
+import json_database.database.parallel_operations as parallel_operations
+
+data_formats = ('ndjson', 'csv', 'records')
+
+
+def open_text(target, mode):
+    """
+    Open file path for text reading or writing, or use an open file object.
+
+    :param target:          File path or open text file object.
+    :param mode:            'r' or 'w'.
+    :return:                Tuple of file object and True if it was opened here (caller closes it).
+    """
+    if isinstance(target, (str, os.PathLike)):
+        return open(target, mode, encoding='utf-8', newline='', buffering=1048576), True
+    return target, False
+
+
+def parse_ndjson_lines(lines, key_field='key', value_field='value'):
+    """
+    Parse NDJSON lines into record key and value tuples. Blank lines are skipped.
+
+    :param lines:           List of NDJSON lines.
+    :param key_field:       Object member holding the record key.
+    :param value_field:     Object member holding the record value.
+    :return:                List of (key, value) tuples.
+    :raises ValueError:     Line is not a JSON object with the key and value members.
+    """
+    records = []
+    for line in lines:
+        if not line.strip():
+            continue
+        document = json_backend.loads(line)
+        try:
+            records.append((str(document[key_field]), document[value_field]))
+        except (KeyError, TypeError) as error:
+            raise ValueError(f'NDJSON line without {key_field!r} and {value_field!r}: {line.strip()!r}') from error
+    return records
+
+
+def read_ndjson(source, key_field='key', value_field='value', chunk_size=65536, executor=None,
+                max_workers=None):
+    """
+    Stream records from NDJSON, parsing chunks of lines in source order.
+
+    With an executor, up to twice the pool size of chunks are parsed ahead, so memory stays bounded.
+
+    :param source:          File path or open text file object.
+    :param key_field:       Object member holding the record key.
+    :param value_field:     Object member holding the record value.
+    :param chunk_size:      Lines per parsed chunk.
+    :param executor:        None parses in the calling thread. 'thread' or 'process' parses chunks on a pool.
+    :param max_workers:     Pool size. None uses the number of CPUs.
+    :return:                Generator of (key, value) tuples.
+    :raises KeyError:       Unsupported executor.
+    """
+    file_object, owns_file = open_text(source, 'r')
+    try:
+        chunks = iter(lambda: list(islice(file_object, chunk_size)), [])
+        if executor is None:
+            for chunk in chunks:
+                yield from parse_ndjson_lines(chunk, key_field, value_field)
+            return
+
+        max_workers = max_workers or os.cpu_count() or 1
+        with parallel_operations.get_executor_class(executor)(max_workers=max_workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(parse_ndjson_lines, chunk, key_field, value_field))
+                if len(pending) >= 2 * max_workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+    finally:
+        if owns_file:
+            file_object.close()
+
+
+def read_csv(source, key_field='key', value_field='value'):
+    """
+    Stream records from CSV with a header row. Values are read as strings.
+
+    :param source:          File path or open text file object.
+    :param key_field:       Column holding the record key.
+    :param value_field:     Column holding the record value.
+    :return:                Generator of (key, value) tuples.
+    :raises ValueError:     Header has no key or value column.
+    """
+    file_object, owns_file = open_text(source, 'r')
+    try:
+        reader = csv.reader(file_object)
+        header = next(reader, [])
+        try:
+            key_column, value_column = header.index(key_field), header.index(value_field)
+        except ValueError as error:
+            raise ValueError(f'CSV header without {key_field!r} and {value_field!r} columns: {header}') from error
+
+        for row in reader:
+            if row:
+                yield row[key_column], row[value_column]
+    finally:
+        if owns_file:
+            file_object.close()
+
+
+def read_records(source, data_format='ndjson', key_field='key', value_field='value', chunk_size=65536,
+                 executor=None, max_workers=None):
+    """
+    Stream records from a source in any supported format.
+
+    :param source:          File path or open text file object ('ndjson', 'csv'), or dictionary or iterable of
+                            key value tuples ('records').
+    :param data_format:     'ndjson', 'csv' or 'records'.
+    :return:                Generator of (key, value) tuples.
+    :raises KeyError:       Unsupported data format.
+    """
+    if data_format == 'ndjson':
+        return read_ndjson(source, key_field=key_field, value_field=value_field, chunk_size=chunk_size,
+                           executor=executor, max_workers=max_workers)
+    if data_format == 'csv':
+        return read_csv(source, key_field=key_field, value_field=value_field)
+    if data_format == 'records':
+        return iter(source.items() if isinstance(source, dict) else source)
+    raise KeyError(data_format)
+
+
+def write_records(sink, records, data_format='ndjson', key_field='key', value_field='value'):
+    """
+    Write records to a sink in one sequential pass.
+
+    :param sink:            File path or open text file object.
+    :param records:         Iterable of (key, value) tuples.
+    :param data_format:     'ndjson' or 'csv'. CSV values that are not strings are written as JSON.
+    :param key_field:       Object member or column holding the record key.
+    :param value_field:     Object member or column holding the record value.
+    :return:                Number of records written.
+    :raises KeyError:       Unsupported data format.
+    """
+    if data_format not in ('ndjson', 'csv'):
+        raise KeyError(data_format)
+
+    record_count = 0
+    file_object, owns_file = open_text(sink, 'w')
+    try:
+        if data_format == 'ndjson':
+            for record_key, record_value in records:
+                file_object.write(json_backend.dumps({key_field: record_key, value_field: record_value}) + '\n')
+                record_count += 1
+        else:
+            writer = csv.writer(file_object)
+            writer.writerow((key_field, value_field))
+            for record_key, record_value in records:
+                if not isinstance(record_value, str):
+                    record_value = json_backend.dumps(record_value)
+                writer.writerow((record_key, record_value))
+                record_count += 1
+    finally:
+        if owns_file:
+            file_object.close()
+        else:
+            file_object.flush()
+    return record_count
@@ -0,0 +1,220 @@
+"""
+This module provides class functions for initializing and using the ExpiryIndex class.
+
+The module includes per-record expiry times for tables used as caches. Expiry times are kept in a dictionary
+(record key to expiry timestamp) for O(1) checks on read, and in a min-heap ordered by expiry time so expired
+records are found without scanning the table: purging pops entries from the top of the heap until it reaches
+a record that has not expired. Heap entries replaced by a newer expiry time are skipped when popped.
+
+Expiry times are saved as a sidecar file ('<table>.ttl') next to the table. One index is shared by every
+table object using the same file within a process, and it is reloaded whenever the sidecar's modification
+time, size or inode change, so expiry times saved by other processes are seen. Reads check the sidecar at most
+once per 'refresh_interval', so warm reads stay free of file system calls. Tables update the index under their
+write lock (forced reload, change, save), so with 'locking' enabled no process overwrites another's entries.
+"""
+
+import heapq
+import os
+import threading
+import time
+import json_database.tools.json_backend as json_backend
+
+class ExpiryIndex:
+    registry = {}
+    registry_lock = threading.Lock()
+    refresh_interval = 0.1
+
+    def __init__(self, index_path):
+        """
+        Initialize ExpiryIndex instance and load saved expiry times. Use 'for_path' to share one index per file.
+
+        :param index_path:      Sidecar index file path ('<table>.ttl').
+        :returns:               Initialized 'ExpiryIndex' object.
+        """
+        self.index_path = index_path
+        self.lock = threading.Lock()
+        self.expiry_times = {}
+        self.expiry_heap = []
+        self.file_signature = None
+        self.checked_at = None
+        self.load()
+
+    @classmethod
+    def for_path(cls, index_path):
+        """
+        Retrieve the process-wide expiry index for a sidecar file.
+
+        :param index_path:      Sidecar index file path.
+        :return:                'ExpiryIndex' object shared by all callers using 'index_path'.
+        """
+        index_path = os.path.abspath(index_path)
+        with cls.registry_lock:
+            if index_path not in cls.registry:
+                cls.registry[index_path] = cls(index_path)
+            return cls.registry[index_path]
+
+    def load(self):
+        """
+        Load expiry times from the sidecar file and rebuild the heap.
+
+        :return:                Expiry times replaced. Empty when the file is missing or unreadable.
+        """
+        file_signature = None
+        try:
+            with open(self.index_path, 'rb') as index_file_object:
+                file_signature = self.get_file_signature(os.fstat(index_file_object.fileno()))
+                expiry_times = json_backend.loads(index_file_object.read())
+        except (FileNotFoundError, ValueError):
+            expiry_times = {}
+
+        with self.lock:
+            self.file_signature = file_signature
+            self.expiry_times = expiry_times
+            self.expiry_heap = [(expires_at, record_key) for record_key, expires_at in expiry_times.items()]
+            heapq.heapify(self.expiry_heap)
+
+    @staticmethod
+    def get_file_signature(file_stat):
+        """
+        Identify sidecar file version from file system metadata.
+
+        :param file_stat:       'os.stat_result' of the sidecar file.
+        :return:                Tuple of modification time (ns), size and inode.
+        """
+        return file_stat.st_mtime_ns, file_stat.st_size, file_stat.st_ino
+
+    def refresh(self, force=False):
+        """
+        Reload expiry times when the sidecar file changed since it was last loaded or saved by this index.
+
+        :param force:           True to check the sidecar file now. Else it is checked at most once per
+                                'refresh_interval' seconds.
+        :return:                Expiry times current with the sidecar file.
+        """
+        checked_at = time.monotonic()
+        if not force and self.checked_at is not None and checked_at - self.checked_at < self.refresh_interval:
+            return
+        self.checked_at = checked_at
+        try:
+            file_signature = self.get_file_signature(os.stat(self.index_path))
+        except FileNotFoundError:
+            file_signature = None
+        if file_signature != self.file_signature:
+            self.load()
+
+    def save(self):
+        """
+        Save expiry times to the sidecar file (temporary file replaced atomically).
+
+        :return:                Sidecar file written; removed when no record has an expiry time.
+        """
+        with self.lock:
+            document = json_backend.dumps(self.expiry_times) if self.expiry_times else None
+
+        if document is None:
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+            self.file_signature = None
+            return
+
+        temporary_path = f'{self.index_path}.{os.getpid()}-{threading.get_ident()}.tmp'
+        try:
+            with open(temporary_path, 'w', encoding='utf-8') as index_file_object:
+                index_file_object.write(document)
+                index_file_object.flush()
+                file_signature = self.get_file_signature(os.fstat(index_file_object.fileno()))
+            os.replace(temporary_path, self.index_path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        self.file_signature = file_signature
+
+    def copy_expiry_times(self):
+        """
+        Copy expiry times (e.g. for a session snapshot).
+
+        :return:                Dictionary of record keys to expiry timestamps.
+        """
+        with self.lock:
+            return dict(self.expiry_times)
+
+    def update(self, expiry_times):
+        """
+        Set or clear record expiry times.
+
+        :param expiry_times:    Dictionary of record keys to expiry timestamps (seconds since the epoch).
+                                None clears a record's expiry time.
+        :return:                True if any expiry time changed. Else false.
+        """
+        changed = False
+        with self.lock:
+            for record_key, expires_at in expiry_times.items():
+                if expires_at is None:
+                    changed = self.expiry_times.pop(record_key, None) is not None or changed
+                elif self.expiry_times.get(record_key) != expires_at:
+                    self.expiry_times[record_key] = expires_at
+                    heapq.heappush(self.expiry_heap, (expires_at, record_key))
+                    changed = True
+
+            # Replaced and cleared entries stay in the heap until popped; rebuild once they dominate it.
+            if len(self.expiry_heap) > 2 * len(self.expiry_times) + 64:
+                self.expiry_heap = [(expires_at, record_key) for record_key, expires_at in self.expiry_times.items()]
+                heapq.heapify(self.expiry_heap)
+        return changed
+
+    def is_expired(self, record_key, now):
+        """
+        Determine if a record has expired.
+
+        :param record_key:      Key of key value pair (string).
+        :param now:             Current timestamp.
+        :return:                True if the record has an expiry time at or before 'now'. Else false.
+        """
+        expires_at = self.expiry_times.get(record_key)
+        return expires_at is not None and expires_at <= now
+
+    def has_expired(self, now):
+        """
+        Determine if any record has expired, from the top of the heap.
+
+        :param now:             Current timestamp.
+        :return:                True if at least one record has expired. Else false.
+        """
+        with self.lock:
+            self.drop_stale_entries()
+            return bool(self.expiry_heap) and self.expiry_heap[0][0] <= now
+
+    def pop_expired(self, now, limit=None):
+        """
+        Remove expired records from the index, earliest expiry first.
+
+        :param now:             Current timestamp.
+        :param limit:           Maximum number of records removed. None removes every expired record.
+        :return:                List of expired record keys.
+        """
+        expired_keys = []
+        with self.lock:
+            while limit is None or len(expired_keys) < limit:
+                self.drop_stale_entries()
+                if not self.expiry_heap or self.expiry_heap[0][0] > now:
+                    break
+                expires_at, record_key = heapq.heappop(self.expiry_heap)
+                del self.expiry_times[record_key]
+                expired_keys.append(record_key)
+        return expired_keys
+
+    def drop_stale_entries(self):
+        """
+        Pop heap entries whose expiry time was replaced or cleared. Caller holds 'lock'.
+
+        :return:                Heap top is a current entry (or the heap is empty).
+        """
+        while self.expiry_heap:
+            expires_at, record_key = self.expiry_heap[0]
+            if self.expiry_times.get(record_key) == expires_at:
+                return
+            heapq.heappop(self.expiry_heap)
+
+    def __len__(self):
+        return len(self.expiry_times)
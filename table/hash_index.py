@@ -0,0 +1,192 @@
+"""
+This module provides class functions for initializing and using the HashIndex class.
+
+The module includes a persistent index mapping record key hashes to record locations (byte offset and
+length) within a database table (JSON file). The index is saved as a sidecar file next to the table and
+both files are memory-mapped, so a lookup reads only the requested record.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+
+INDEX_MAGIC = b'KVHI'
+INDEX_HEADER = struct.Struct('<4sqqq')
+INDEX_ENTRY = struct.Struct('<QQI')
+
+def hash_key(record_key):
+    """
+    Hash record key to a stable 64-bit integer (identical across processes).
+
+    :param record_key:  Key of key value pair (string).
+    :return:            Unsigned 64-bit integer.
+    """
+    return int.from_bytes(hashlib.blake2b(record_key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class HashIndex:
+    def __init__(self, table_path, index_path, parse_record_line):
+        """
+        Initialize HashIndex instance.
+
+        :param table_path:          Database table (json file) path.
+        :param index_path:          Sidecar index file path.
+        :param parse_record_line:   Function splitting a table line into record key and record value.
+        :returns:                   Initialized 'HashIndex' object.
+        """
+        self.table_path = table_path
+        self.index_path = index_path
+        self.parse_record_line = parse_record_line
+        self.table_signature = None
+        self.entry_count = 0
+        self.index_file_object = None
+        self.index_map = None
+        self.table_file_object = None
+        self.table_map = None
+
+    @staticmethod
+    def get_signature(path):
+        """
+        Identify current file version from file system metadata.
+
+        :param path:                File path.
+        :return:                    Tuple of modification time (ns), size and inode. None if file does not exist.
+        """
+        try:
+            file_stat = os.stat(path)
+            return file_stat.st_mtime_ns, file_stat.st_size, file_stat.st_ino
+        except FileNotFoundError:
+            return None
+
+    def check_index(self):
+        """
+        Determine if the mapped index matches the database table (JSON file).
+
+        :return:                    True if index is current. Else false.
+        """
+        return self.index_map is not None and self.table_signature == self.get_signature(self.table_path)
+
+    def open_index(self):
+        """
+        Memory-map sidecar index and database table, rebuilding the index when the table changed.
+
+        :return:                    Index and table mapped for lookups.
+        :raises FileNotFoundError:  Database table (json file) not found.
+        """
+        if self.check_index():
+            return
+
+        self.close_index()
+        table_signature = self.get_signature(self.table_path)
+        if table_signature is None:
+            raise FileNotFoundError(self.table_path)
+
+        if not self.read_header(table_signature):
+            self.build_index(table_signature)
+            self.read_header(table_signature)
+
+        self.table_signature = table_signature
+        if table_signature[1] > 0:
+            self.table_file_object = open(self.table_path, 'rb')
+            self.table_map = mmap.mmap(self.table_file_object.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read_header(self, table_signature):
+        """
+        Map sidecar index file when its header matches the database table signature.
+
+        :param table_signature:     Current database table signature.
+        :return:                    True if index mapped. Else false (missing or stale index).
+        """
+        try:
+            index_file_object = open(self.index_path, 'rb')
+        except FileNotFoundError:
+            return False
+
+        header = index_file_object.read(INDEX_HEADER.size)
+        if len(header) < INDEX_HEADER.size or INDEX_HEADER.unpack(header) != (INDEX_MAGIC,) + table_signature:
+            index_file_object.close()
+            return False
+
+        self.index_file_object = index_file_object
+        self.index_map = mmap.mmap(index_file_object.fileno(), 0, access=mmap.ACCESS_READ)
+        self.entry_count = (len(self.index_map) - INDEX_HEADER.size) // INDEX_ENTRY.size
+        return True
+
+    def build_index(self, table_signature):
+        """
+        Scan database table (JSON file) once and save sorted key hash entries to sidecar index file.
+
+        :param table_signature:     Database table signature recorded in the index header.
+        :return:                    Sidecar index file written.
+        """
+        entries = []
+        with open(self.table_path, 'rb') as table_file_object:
+            offset = 0
+            for line in table_file_object:
+                text = line.decode('utf-8')
+                if text.strip() not in ('', '{', '}'):
+                    record_key = self.parse_record_line(text)[0]
+                    entries.append((hash_key(record_key), offset, len(line)))
+                offset += len(line)
+        entries.sort()
+
+        # Readers holding the shared table lock may rebuild the index together: one temporary file each.
+        temporary_path = f'{self.index_path}.{os.getpid()}-{threading.get_ident()}.tmp'
+        try:
+            with open(temporary_path, 'wb') as index_file_object:
+                index_file_object.write(INDEX_HEADER.pack(INDEX_MAGIC, *table_signature))
+                index_file_object.write(b''.join(INDEX_ENTRY.pack(*entry) for entry in entries))
+            os.replace(temporary_path, self.index_path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+    def lookup(self, record_key):
+        """
+        Read record value for record key from the mapped database table.
+
+        :param record_key:          Key of key value pair (string).
+        :return:                    Record value.
+        :raises KeyError:           Key not found in database table (json file).
+        """
+        self.open_index()
+        key_hash = hash_key(record_key)
+
+        low, high = 0, self.entry_count
+        while low < high:
+            middle = (low + high) // 2
+            if INDEX_ENTRY.unpack_from(self.index_map, INDEX_HEADER.size + middle * INDEX_ENTRY.size)[0] < key_hash:
+                low = middle + 1
+            else:
+                high = middle
+
+        while low < self.entry_count:
+            entry_hash, offset, length = INDEX_ENTRY.unpack_from(self.index_map,
+                                                                 INDEX_HEADER.size + low * INDEX_ENTRY.size)
+            if entry_hash != key_hash:
+                break
+            line_key, line_value = self.parse_record_line(self.table_map[offset:offset + length].decode('utf-8'))
+            if line_key == record_key:
+                return line_value
+            low += 1
+
+        raise KeyError(record_key)
+
+    def close_index(self):
+        """
+        Release memory maps and file handles.
+
+        :return:                    Index and table unmapped.
+        """
+        for mapped in (self.index_map, self.table_map, self.index_file_object, self.table_file_object):
+            if mapped is not None:
+                mapped.close()
+        self.index_map = None
+        self.table_map = None
+        self.index_file_object = None
+        self.table_file_object = None
+        self.table_signature = None
+        self.entry_count = 0
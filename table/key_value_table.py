@@ -6,24 +6,97 @@ and records (existing as key value pairs).
 """
 
 import os.path
+import shutil
+import threading
+import time
 import json_database.database.key_value_database as kvs
 import json_database.tools.tools as tools
-import pickle
+import json_database.tools.exceptions as exceptions
+import json_database.tools.json_backend as json_backend
+import json_database.table.hash_index as hash_index
+import json_database.table.table_index as table_index
+import json_database.table.expiry_index as expiry_index
+import json_database.table.bulk_transfer as bulk_transfer
+import json_database.table.table_session as table_session
+import json_database.tools.table_lock as table_lock
+import json_database.database.write_ahead_log as wal
+import json_database.tools.metrics as metrics
+from contextlib import contextmanager, nullcontext
+
+DELETE_RECORD = object()
 
 class KeyValueTable(kvs.KeyValueDatabase):
-    def __init__(self, database_name, table_name ):
-        super().__init__(database_name)
+    table_extension = '.json'
+
+    def __init__(self, database_name, table_name, use_cache=False, table_format='text',
+                 read_mode='file', value_index=False, instance_encoding='repr', locking=False,
+                 lock_timeout=None, durability='flush', key_index=False, typed_values=False,
+                 write_ahead_log=False, checkpoint_bytes=1048576, metrics=None, strict=False, object_cache=None):
+        super().__init__(database_name, strict=strict)
         """
         Initialize KeyValueTable instance.
         
         :param database_name:   Database name.
         :param table_name:      Key value store or table name (json file name).
+        :param use_cache:       True to keep table records in memory between reads. Else false.
+        :param table_format:    Table serialization - 'text' (line parser) or 'json' (JSON encoder/decoder).
+        :param read_mode:       Point lookups - 'file' (parse table) or 'mmap' (memory-mapped table and hash index).
+        :param value_index:     True to maintain a persisted value to keys index for 'get_key'. Else false.
+        :param instance_encoding:   Instance values - 'repr' (escaped bytes literal) or 'base85' (pickle protocol 5).
+        :param locking:         True to coordinate readers and writers across threads and processes. Else false.
+        :param lock_timeout:    Seconds to wait for the table lock. None waits indefinitely.
+        :param durability:      Table rewrites - 'none' (overwrite in place), 'flush' (write temporary file and
+                                replace table atomically) or 'fsync' (as 'flush', synced to disk before replace).
+        :param key_index:       True to maintain a persisted sorted key index from the first write. Else it is
+                                created on the first 'scan_prefix' or 'scan_range' call.
+        :param typed_values:    True to store values as native JSON types (numbers, booleans, null, lists and
+                                dictionaries round-trip unchanged). Implies table_format 'json'. Else values are
+                                stored as strings.
+        :param write_ahead_log: True to append changes to the database write-ahead log ('<database>.wal') and
+                                save them to the table file at checkpoints. With 'durability' 'fsync', writes
+                                are acknowledged after a group-committed sync of the log. Else false.
+        :param checkpoint_bytes:    Write-ahead log size that triggers a checkpoint.
+        :param metrics:         'MetricsRegistry' recording operation latencies and I/O counters. None disables.
+        :param strict:          True to raise 'json_database.tools.exceptions' errors instead of printing them.
+        :param object_cache:    'ObjectCache' holding decoded instance values for 'get_value'. Share one cache
+                                between every table object writing the table. None disables.
         :returns:               Initialized 'KeyValueTable' object.
+        :raises ValueError:     Unsupported durability.
         """
+        if durability not in ('none', 'flush', 'fsync'):
+            raise ValueError(f"Unsupported durability {durability!r}: use 'none', 'flush' or 'fsync'.")
         self.table_file = table_name
         self.table_file_path = None
         self.table_file_object = None
         self.working_file_modes = dict(append='a+', read='r+', write='w')
+        self.use_cache = use_cache
+        self.table_cache = None
+        self.table_cache_signature = None
+        self.pending_changes = None
+        self.pending_expiry_times = None
+        self.typed_values = typed_values
+        self.table_format = 'json' if typed_values else table_format
+        self.read_mode = read_mode
+        self.hash_index = None
+        self.reverse_index = None
+        if value_index:
+            self.reverse_index = table_index.ReverseValueIndex(index_path=None)
+        self.instance_encoding = instance_encoding
+        self.locking = locking
+        self.lock_timeout = lock_timeout
+        self.table_lock = None
+        self.durability = durability
+        self.key_index = None
+        if key_index:
+            self.key_index = table_index.SortedKeyIndex(index_path=None)
+        self.use_write_ahead_log = write_ahead_log
+        self.checkpoint_bytes = checkpoint_bytes
+        self.write_ahead_log = None
+        self.metrics = metrics
+        self.object_cache = object_cache
+        self.expiry_index = None
+        self.expiry_sweeper = None
+        self.sweeper_stop = None
 
 
     def open_table(self, mode='append'):
@@ -40,19 +113,20 @@ class KeyValueTable(kvs.KeyValueDatabase):
         """
         try:
             self.create_database()
-            self.table_file_path = os.path.join(self.database_path, self.table_file + '.json')
+            self.table_file_path = os.path.join(self.database_path, self.table_file + self.table_extension)
             self.table_file_object = open(self.table_file_path, self.working_file_modes[mode])
+            self.record_io('file_opens')
 
         except FileExistsError as error:
-            tools.print_error(error_message=error, debug='dne')
+            self.handle_error(error, debug='dne')
         except FileNotFoundError as error:
-            tools.print_error(error_message=error, debug='create_record')
+            self.handle_error(error, debug='create_record')
         except PermissionError as error:
-            tools.print_error(error_message=error, debug='access')
+            self.handle_error(error, debug='access')
         except KeyError as error:
-            tools.print_error(error_message=error, debug='file_handle')
+            self.handle_error(error, debug='file_handle')
         except Exception and OSError as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
 
     def close_table(self):
         """
@@ -69,19 +143,22 @@ class KeyValueTable(kvs.KeyValueDatabase):
             self.table_file_object = None
 
         except AttributeError as error:
-            tools.print_error(error_message=error, debug='open_table')
+            self.handle_error(error, debug='open_table')
         except FileNotFoundError as error:
-            tools.print_error(error_message=error, debug='dne')
+            self.handle_error(error, debug='dne')
         except Exception and OSError as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
 
-    def set_pair(self, record_key, record_value, value_is_instance=False):
+    @metrics.instrument
+    def set_pair(self, record_key, record_value, value_is_instance=False, ttl=None):
         """
         Write record (key value pair) to database table (JSON file).
 
         :param record_key:          Key of key value pair.
         :param record_value:        Value of key value pair.
         :param value_is_instance:   True if pair value is class instance. Else false.
+        :param ttl:                 Seconds until the record expires. None keeps the record until deleted
+                                    (and clears an earlier expiry time).
         :return:                    Key value pair saved to database table (json file).
         :raises AttributeError:     Database table (json file) closed.
         :raises FileNotFoundError:  Database table (json file) not found.
@@ -90,52 +167,67 @@ class KeyValueTable(kvs.KeyValueDatabase):
         :raises Exception:          Unexpected error.
         """
         try:
-            self.open_table()
-
-            if value_is_instance:
-                record_value = repr(pickle.dumps(record_value)).replace('\\', '\\\\')
-            data = f'\t"{record_key}": "{record_value}"'
-
-            if self.table_file_object.tell() == 0:
-                self.table_file_object.write('{\n' + data)
-            else:
-                self.table_file_object.close()
-
-                self.open_table(mode='read')
-                clean_text = lambda text: text.strip().replace('"', '').replace(',', '')
-                select_key = lambda text: clean_text(text.split(':')[0])
-                reformat_line = lambda line: line.replace('"\n','",\n')
-
-                document_lines = self.table_file_object.readlines()[:-1]
-                document_lines_new = [reformat_line(line) for line in document_lines
-                                      if line != ',\n'
-                                      and select_key(line) != str(record_key)]
-                self.table_file_object.close()
-
-                self.open_table(mode='write')
-                self.table_file_object.writelines(document_lines_new)
-                self.table_file_object.close()
-
-                self.open_table()
-                self.table_file_object.write(data)
-            self.table_file_object.write('\n}')
-            self.close_table()
+            record_key = tools.convert_to_string(record_key)
+            record_value = self.encode_record_value(record_value, value_is_instance=value_is_instance)
+            self.stage_changes({record_key: record_value}, expiry_times={record_key: self.get_expiry_time(ttl)})
 
         except AttributeError as error:
-            tools.print_error(error_message=error, debug='open_table')
+            self.handle_error(error, debug='open_table')
         except FileNotFoundError as error:
-            tools.print_error(error_message=error, debug='dne')
+            self.handle_error(error, debug='dne')
         except PermissionError as error:
-            tools.print_error(error_message=error, debug='access')
+            self.handle_error(error, debug='access')
         except Exception and OSError as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
+
+    def encode_record_value(self, record_value, value_is_instance=False):
+        """
+        Format record value for storage in database table (JSON file).
+
+        :param record_value:        Value of key value pair.
+        :param value_is_instance:   True if pair value is class instance. Else false.
+        :return:                    Record value as string. Instances are pickled and escaped
+                                    ('repr') or pickled with protocol 5 and base85 encoded ('base85').
+        """
+        if value_is_instance:
+            # 'pickle' and 'base64' are imported on first use, keeping start-up fast for tables of strings.
+            import base64
+            import pickle
 
-    def get_value(self, record_key, value_is_instance=False):
+            if self.instance_encoding == 'base85':
+                return base64.b85encode(pickle.dumps(record_value, protocol=5)).decode('ascii')
+            return repr(pickle.dumps(record_value)).replace('\\', '\\\\')
+        return record_value
+
+    @staticmethod
+    def decode_record_value(record_value, value_is_instance=False):
+        """
+        Convert stored record value back to the value saved with 'set_pair'.
+
+        Instance values in either encoding are accepted: escaped bytes literals start with "b'" or 'b"',
+        characters that never occur in base85 text.
+
+        :param record_value:        Record value read from database table (json file).
+        :param value_is_instance:   True if expected value is an instance. Else false.
+        :return:                    Record value or unpickled instance.
+        """
+        if value_is_instance:
+            import base64
+            import pickle
+
+            if record_value[:2] in ("b'", 'b"'):
+                return pickle.loads(tools.string_to_bytes(record_value))
+            return pickle.loads(base64.b85decode(record_value))
+        return record_value
+
+    @metrics.instrument
+    def get_value(self, record_key, value_is_instance=False, default=tools.NO_DEFAULT):
         """
         Retrieve corresponding record's value for provided record key.
 
         :param record_key:          Key of key value pair.
         :param value_is_instance:   True if expected value is an instance. Else false.
+        :param default:             Returned when the key or table does not exist, without reporting an error.
         :return:                    Key value pair value or instance.
         :raises FileNotFoundError:  Database table (json file) not found.
         :raises KeyError:           Key not found in database table (json file).
@@ -144,26 +236,44 @@ class KeyValueTable(kvs.KeyValueDatabase):
         :raises Exception:          Unexpected error.
         """
         try:
-            database = self.table_to_dictionary()
             record_key = tools.convert_to_string(record_key)
-            value = database[record_key]
-            if value_is_instance:
-                value = tools.string_to_bytes(value)
-                return pickle.loads(value)
+            use_object_cache = value_is_instance and self.object_cache is not None
+            if use_object_cache:
+                table_path = self.get_table_path()
+                table_signature = self.get_table_signature()
+                cached_value = self.object_cache.get(table_path, record_key, default=tools.NO_DEFAULT,
+                                                     signature=table_signature)
+                if cached_value is not tools.NO_DEFAULT and not self.is_expired(record_key):
+                    return cached_value
+                cache_version = self.object_cache.get_version(table_path)
+
+            if default is not tools.NO_DEFAULT:
+                if not self.table_exists():
+                    return default
+                try:
+                    value = self.lookup_record(record_key)
+                except KeyError:
+                    return default
             else:
-                return value
+                value = self.lookup_record(record_key)
+            decoded_value = self.decode_record_value(value, value_is_instance=value_is_instance)
+            if use_object_cache:
+                self.object_cache.put(table_path, record_key, decoded_value, len(value), version=cache_version,
+                                      signature=table_signature)
+            return decoded_value
 
         except KeyError as error:
-            tools.print_error(error_message=error, debug='key')
+            self.handle_error(error, debug='key')
         except TypeError as error:
-            tools.print_error(error_message=error, debug='type_bytes')
+            self.handle_error(error, debug='type_bytes')
         except FileNotFoundError as error:
-            tools.print_error(error_message=error, debug='create_record')
+            self.handle_error(error, debug='create_record')
         except OSError as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
         except Exception as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
 
+    @metrics.instrument
     def get_key(self, record_value):
         """
         Retrieve corresponding record key(s) for provided record value.
@@ -178,8 +288,16 @@ class KeyValueTable(kvs.KeyValueDatabase):
         :raises Exception:          Unexpected error.
         """
         try:
-            database_table = self.table_to_dictionary()
-            record_value = tools.convert_to_string(data=record_value)
+            if not self.typed_values:
+                record_value = tools.convert_to_string(data=record_value)
+            if self.reverse_index is not None:
+                self.checkpoint_pending()
+                with self.read_locked():
+                    self.open_table_indexes(self.get_table_signature())
+                    record_keys = self.drop_expired_keys(self.reverse_index.lookup(record_value))
+                return [(record_key, record_value) for record_key in record_keys] or None
+
+            database_table = self.load_table_records()
             if record_value in database_table.values():
                 possible_keys = [item for item in database_table.items() if item[1] == record_value]
                 return possible_keys
@@ -187,12 +305,82 @@ class KeyValueTable(kvs.KeyValueDatabase):
                 return None
 
         except FileNotFoundError and AttributeError as error:
-            tools.print_error(error_message=error, debug='create_record')
+            self.handle_error(error, debug='create_record')
         except OSError as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
+        except Exception as error:
+            self.handle_error(error, debug='unknown')
+
+    @metrics.instrument
+    def incr(self, record_key, amount=1):
+        """
+        Add amount to a numeric record value and save the result. A missing record counts as 0.
+
+        The read and the write happen under one exclusive table lock (with 'locking' enabled), so concurrent
+        counters do not lose updates. Inside 'batch' the new value is staged with the open batch.
+
+        :param record_key:          Key of key value pair.
+        :param amount:              Number added (int or float).
+        :return:                    New record value. Stored as a string unless 'typed_values' is enabled.
+        :raises TypeError:          Record value is not a number.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            record_key = tools.convert_to_string(record_key)
+            with self.write_locked():
+                # A counter keeps its expiry time; an expired counter restarts from 0 without one.
+                expiry_times = {record_key: None} if self.is_expired(record_key) else {}
+                record_value = self.read_number(record_key) + amount
+                self.stage_changes({record_key: record_value if self.typed_values else str(record_value)},
+                                   expiry_times=expiry_times)
+            return record_value
+
+        except (TypeError, ValueError) as error:
+            self.handle_error(error, debug='number')
         except Exception as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
+
+    def decr(self, record_key, amount=1):
+        """
+        Subtract amount from a numeric record value and save the result (see 'incr').
+
+        :param record_key:          Key of key value pair.
+        :param amount:              Number subtracted (int or float).
+        :return:                    New record value.
+        """
+        return self.incr(record_key, amount=-amount)
+
+    def read_number(self, record_key):
+        """
+        Read record value as a number, including changes staged in the open batch.
+
+        :param record_key:          Key of key value pair (string).
+        :return:                    Record value as int or float. 0 when the record does not exist.
+        :raises TypeError:          Record value is not a number.
+        :raises ValueError:         String record value is not a number.
+        """
+        if self.pending_changes is not None and record_key in self.pending_changes:
+            record_value = self.pending_changes[record_key]
+            if record_value is DELETE_RECORD:
+                return 0
+        elif not self.table_exists():
+            return 0
+        else:
+            try:
+                record_value = self.lookup_record(record_key)
+            except KeyError:
+                return 0
+
+        if isinstance(record_value, str):
+            try:
+                return int(record_value)
+            except ValueError:
+                return float(record_value)
+        if isinstance(record_value, bool) or not isinstance(record_value, (int, float)):
+            raise TypeError(f'Record value is not a number: {record_key}')
+        return record_value
 
+    @metrics.instrument
     def delete_pair(self, record_key):
         """
         Delete record (key value pair) from database table (JSON file).
@@ -206,25 +394,367 @@ class KeyValueTable(kvs.KeyValueDatabase):
         :raises Exception:          Unexpected error.
         """
         try:
-            database_dictionary = self.table_to_dictionary()
-
             record_key = tools.convert_to_string(record_key)
-            database_dictionary.pop(record_key)
+            if not self.check_pending_key(record_key):
+                raise KeyError(record_key)
+            self.stage_changes({record_key: DELETE_RECORD})
+
+        except KeyError as error:
+            self.handle_error(error, debug='key')
+        except FileNotFoundError as error:
+            self.handle_error(error, debug='create_record')
+        except AttributeError as error:
+            self.handle_error(error, debug='open_table')
+        except Exception and OSError as error:
+            self.handle_error(error, debug='unknown')
+
+    def session(self):
+        """
+        Open long-lived table handle that keeps the file open and records in memory.
+
+        Use as a context manager: changes are saved when the block exits, or with 'commit'.
+
+        :return:                    'TableSession' object.
+        """
+        return table_session.TableSession(self)
+
+    @metrics.instrument
+    def set_many(self, records, value_is_instance=False, ttl=None):
+        """
+        Write multiple records (key value pairs) to database table (JSON file) with one table rewrite.
+
+        :param records:             Dictionary (or iterable of key value tuples) of records to save.
+        :param value_is_instance:   True if pair values are class instances. Else false.
+        :param ttl:                 Seconds until the records expire. None keeps them until deleted.
+        :return:                    Key value pairs saved to database table (json file).
+        :raises FileNotFoundError:  Database table (json file) not found.
+        :raises PermissionError:    Insufficient file system permissions.
+        :raises OSError:            Unexpected operating system error.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            records = records.items() if isinstance(records, dict) else records
+            changes = {tools.convert_to_string(record_key):
+                           self.encode_record_value(record_value, value_is_instance=value_is_instance)
+                       for record_key, record_value in records}
+            expiry_times = None if ttl is None else dict.fromkeys(changes, self.get_expiry_time(ttl))
+            self.stage_changes(changes, expiry_times=expiry_times)
+
+        except FileNotFoundError as error:
+            self.handle_error(error, debug='dne')
+        except PermissionError as error:
+            self.handle_error(error, debug='access')
+        except Exception and OSError as error:
+            self.handle_error(error, debug='unknown')
+
+    @metrics.instrument
+    def delete_many(self, record_keys):
+        """
+        Delete multiple records (key value pairs) from database table (JSON file) with one table rewrite.
+
+        Keys not found in the database table are skipped.
+
+        :param record_keys:         Iterable of record keys.
+        :return:                    Key value pairs removed from database table (json file).
+        :raises FileNotFoundError:  Database table (json file) not found.
+        :raises PermissionError:    Insufficient file system permissions.
+        :raises OSError:            Unexpected operating system error.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            changes = {tools.convert_to_string(record_key): DELETE_RECORD for record_key in record_keys}
+            self.stage_changes(changes)
+
+        except FileNotFoundError as error:
+            self.handle_error(error, debug='create_record')
+        except PermissionError as error:
+            self.handle_error(error, debug='access')
+        except Exception and OSError as error:
+            self.handle_error(error, debug='unknown')
+
+    @contextmanager
+    def batch(self):
+        """
+        Group 'set_pair', 'delete_pair', 'set_many' and 'delete_many' calls into one table rewrite.
+
+        Changes are held in memory and saved when the 'with' block exits. Changes are discarded
+        if the block raises an exception.
+
+        :return:                    Table object staging changes until block exits.
+        """
+        if self.pending_changes is not None:
+            yield self
+            return
+
+        self.pending_changes = {}
+        self.pending_expiry_times = {}
+        try:
+            yield self
+            changes, expiry_times = self.pending_changes, self.pending_expiry_times
+            self.pending_changes = self.pending_expiry_times = None
+            self.save_changes(changes, expiry_times=expiry_times)
+        finally:
+            self.pending_changes = self.pending_expiry_times = None
+
+    def stage_changes(self, changes, expiry_times=None):
+        """
+        Hold changes in the open batch, or save them immediately when no batch is open.
+
+        :param changes:             Dictionary of record keys to encoded values or 'DELETE_RECORD'.
+        :param expiry_times:        Expiry time updates (see 'update_expiry_times').
+        :return:                    Changes staged or saved to database table (json file).
+        """
+        if self.pending_changes is not None:
+            for record_key, record_value in changes.items():
+                self.pending_changes.pop(record_key, None)
+                self.pending_changes[record_key] = record_value
+            self.pending_expiry_times.update(dict.fromkeys(changes) if expiry_times is None else expiry_times)
+        else:
+            self.save_changes(changes, expiry_times=expiry_times)
+
+    def save_changes(self, changes, expiry_times=None):
+        """
+        Save changes and their record expiry times together (under one exclusive lock with 'locking' enabled).
+
+        :param changes:             Dictionary of record keys to encoded values or 'DELETE_RECORD'.
+        :param expiry_times:        Expiry time updates (see 'update_expiry_times').
+        :return:                    Changes saved; expiry index updated.
+        """
+        if not changes:
+            return
+        with self.write_locked():
+            self.apply_changes(changes)
+            self.update_expiry_times(changes, expiry_times=expiry_times)
+        self.invalidate_objects(changes)
+
+    def check_pending_key(self, record_key):
+        """
+        Determine if record key exists, including changes staged in the open batch.
+
+        :param record_key:          Key of key value pair (string).
+        :return:                    True if key exists. Else false.
+        """
+        if self.pending_changes is not None and record_key in self.pending_changes:
+            return self.pending_changes[record_key] is not DELETE_RECORD
+        if not self.table_exists():
+            return False
+        return record_key in self.load_table_records()
+
+    def apply_changes(self, changes):
+        """
+        Save changes: append them to the write-ahead log when enabled, else rewrite the table once.
+
+        :param changes:             Dictionary of record keys to encoded values or 'DELETE_RECORD'.
+        :return:                    Changes saved to write-ahead log or database table (json file).
+        """
+        if not changes:
+            return
+
+        if self.use_write_ahead_log:
+            logged_changes = {}
+            for record_key, record_value in changes.items():
+                if record_value is not DELETE_RECORD:
+                    record_key, record_value = self.normalize_record(record_key, record_value)
+                logged_changes[record_key] = record_value
+            self.get_write_ahead_log().append(self, logged_changes)
+            return
+
+        self.write_changes(changes)
+
+    def write_changes(self, changes):
+        """
+        Merge changes into table records and save them with a single table rewrite.
+
+        :param changes:             Dictionary of record keys to encoded values or 'DELETE_RECORD'.
+        :return:                    Changes saved to database table (json file); secondary indexes updated.
+        """
+        with self.write_locked():
+            table_signature = self.get_table_signature()
+            if table_signature is None:
+                records = {}
+            else:
+                records = dict(self.load_file_records())
+            table_indexes = self.open_table_indexes(table_signature, load_records=lambda: records)
+            # Bulk changes (e.g. 'import_table') rebuild the indexes once instead of updating them per record.
+            rebuild_indexes = len(changes) > 1024 and 2 * len(changes) > len(records)
+            updated_indexes = () if rebuild_indexes else table_indexes
+
+            for record_key, record_value in changes.items():
+                if record_value is DELETE_RECORD:
+                    old_value = records.pop(record_key, table_index.MISSING_RECORD)
+                    record_value = table_index.MISSING_RECORD
+                else:
+                    record_key, record_value = self.normalize_record(record_key, record_value)
+                    old_value = records.pop(record_key, table_index.MISSING_RECORD)
+                    records[record_key] = record_value
+
+                for index in updated_indexes:
+                    index.apply_change(record_key, old_value, record_value)
+
+            if rebuild_indexes:
+                for index in table_indexes:
+                    index.build(records)
+            self.write_table(records)
+            table_signature = self.get_table_signature()
+            for index in table_indexes:
+                index.save(table_signature)
+
+    def write_table(self, records):
+        """
+        Serialize records and overwrite database table (JSON file) with a single write.
+
+        :param records:             Dictionary of records (key value pairs).
+        :return:                    Database table (json file) replaced and table cache updated.
+        """
+        if self.durability == 'none':
             self.open_table(mode='write')
+            self.record_io('bytes_written', self.table_file_object.write(self.serialize_records(records)))
             self.close_table()
+        else:
+            self.create_database()
+            self.table_file_path = self.get_table_path()
+            self.replace_file(self.table_file_path, self.serialize_records(records))
+        self.update_cache(records=records)
+
+    def replace_file(self, file_path, text):
+        """
+        Atomically replace file contents: write temporary file in the same directory, then rename over original.
+
+        A crash leaves either the previous or the new file, never a truncated one. With 'durability' set to
+        'fsync', the temporary file and the directory entry are synced to disk.
+
+        :param file_path:           Destination file path.
+        :param text:                New file contents.
+        :return:                    File replaced.
+        :raises OSError:            Temporary file could not be written or renamed.
+        """
+        temporary_path = f'{file_path}.{os.getpid()}-{threading.get_ident()}.tmp'
+        file_descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            with open(file_descriptor, 'w') as temporary_file_object:
+                self.record_io('file_opens')
+                self.record_io('bytes_written', temporary_file_object.write(text))
+                temporary_file_object.flush()
+                if self.durability == 'fsync':
+                    os.fsync(temporary_file_object.fileno())
+            os.replace(temporary_path, file_path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+        if self.durability == 'fsync' and hasattr(os, 'O_DIRECTORY'):
+            directory_descriptor = os.open(os.path.dirname(file_path), os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(directory_descriptor)
+            finally:
+                os.close(directory_descriptor)
+
+    def serialize_records(self, records):
+        """
+        Format records as database table (JSON file) text, one record per line.
+
+        :param records:             Dictionary of records (key value pairs).
+        :return:                    Table text. Empty string when there are no records.
+        """
+        data = ',\n'.join(self.format_record_line(record_key, record_value)
+                          for record_key, record_value in records.items())
+        return '{\n' + data + '\n}' if data else ''
+
+    def normalize_record(self, record_key, record_value):
+        """
+        Convert record to the key and value a table read would return after saving it.
+
+        :param record_key:          Key of key value pair (string).
+        :param record_value:        Encoded value of key value pair.
+        :return:                    Tuple of record key and record value.
+        """
+        if isinstance(record_value, str) and (self.table_format == 'json' or (
+                self.is_text_safe(record_key) and self.is_text_safe(record_value))):
+            return record_key, record_value
+        return self.parse_record_line(self.format_record_line(record_key, record_value))
+
+    @staticmethod
+    def is_text_safe(text):
+        """
+        Determine if the text table format saves a string unchanged.
+
+        :param text:                Record key or value (string).
+        :return:                    True if text has no '"', ',', ':' or line break and no surrounding whitespace.
+                                    Else false.
+        """
+        return (not ('"' in text or ',' in text or ':' in text or '\n' in text or '\r' in text)
+                and text == text.strip())
+
+    @metrics.instrument
+    def migrate_table(self, table_format):
+        """
+        Convert database table (JSON file) to another table format.
 
-            for key, value in database_dictionary.items():
-                self.set_pair(record_key= key, record_value= value)
+        Records are read with the current 'table_format' and rewritten with the new one. Migrating to 'text' is
+        refused, leaving the table unchanged, when any record would not survive the text format.
+
+        :param table_format:        New table serialization - 'text' or 'json'.
+        :return:                    Database table (json file) rewritten; 'table_format' updated.
+        :raises KeyError:           Unsupported table format.
+        :raises ValueError:         Record not text-safe ('is_text_safe') or typed value, migrating to 'text'.
+        :raises FileNotFoundError:  Database table (json file) not found.
+        :raises PermissionError:    Insufficient file system permissions.
+        :raises OSError:            Unexpected operating system error.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            if table_format not in ('text', 'json'):
+                raise KeyError(table_format)
+
+            with self.write_locked():
+                records = self.read_table_records()
+                if table_format == 'text':
+                    self.check_text_safe(records)
+                self.table_format = table_format
+                self.write_table(records)
 
         except KeyError as error:
-            tools.print_error(error_message=error, debug='key')
+            self.handle_error(error, debug='table_format')
+        except ValueError as error:
+            self.handle_error(error, debug='text_unsafe')
         except FileNotFoundError as error:
-            tools.print_error(error_message=error, debug='create_record')
-        except AttributeError as error:
-            tools.print_error(error_message=error, debug='open_table')
+            self.handle_error(error, debug='dne')
+        except PermissionError as error:
+            self.handle_error(error, debug='access')
         except Exception and OSError as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
 
+    def check_text_safe(self, records):
+        """
+        Verify that records survive the text table format unchanged.
+
+        :param records:             Dictionary of records (key value pairs).
+        :return:                    Every record key and value is a text-safe string.
+        :raises ValueError:         Typed values table, or record key or value not text-safe.
+        """
+        if self.typed_values:
+            raise ValueError(f'{self.table_file}: typed values tables must keep the \'json\' table format.')
+        for record_key, record_value in records.items():
+            if not (isinstance(record_value, str) and self.is_text_safe(record_key)
+                    and self.is_text_safe(record_value)):
+                raise ValueError(f'{self.table_file}: record {record_key!r} cannot be stored in the text table format.')
+
+    def format_record_line(self, record_key, record_value):
+        """
+        Format record (key value pair) as database table (JSON file) line.
+
+        :param record_key:          Key of key value pair.
+        :param record_value:        Encoded value of key value pair.
+        :return:                    Table line formatted as '"key": "value"'.
+        """
+        if self.table_format == 'json':
+            if not self.typed_values:
+                record_value = tools.convert_to_string(record_value)
+            return '\t' + json_backend.dumps(record_key) + ': ' + json_backend.dumps(record_value)
+        return f'\t"{record_key}": "{record_value}"'
+
+    @metrics.instrument
     def check_key(self, record_key):
         """
         Search database table (JSON file) for provided record key.
@@ -238,20 +768,20 @@ class KeyValueTable(kvs.KeyValueDatabase):
         :raises Exception:          Unexpected error.
         """
         try:
-            database_table = self.table_to_dictionary()
             record_key = tools.convert_to_string(data=record_key)
-            if record_key in database_table.keys():
+            if self.has_record(record_key):
                 return True
             else:
                 return False
 
         except FileNotFoundError and AttributeError as error:
-            tools.print_error(error_message=error, debug='create_record')
+            self.handle_error(error, debug='create_record')
         except OSError as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
         except Exception as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
 
+    @metrics.instrument
     def count_records(self):
         """
         Count database table (JSON file) records (key value pairs).
@@ -264,12 +794,13 @@ class KeyValueTable(kvs.KeyValueDatabase):
         :raises Exception:          Unexpected error.
         """
         try:
-            key_value_pair_count = len(self.table_to_dictionary())
+            key_value_pair_count = len(self.load_table_records())
             return key_value_pair_count
 
         except Exception as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
 
+    @metrics.instrument
     def get_all_keys(self):
         """
         List all database table (JSON file) record (key value pairs) keys.
@@ -282,13 +813,230 @@ class KeyValueTable(kvs.KeyValueDatabase):
         :raises Exception:          Unexpected error.
         """
         try:
-            database_table = self.table_to_dictionary()
-            return database_table.keys()
+            database_table = self.load_table_records()
+            return list(database_table.keys())
+
+        except Exception as error:
+            self.handle_error(error, debug='unknown')
+
+
+    @metrics.instrument
+    def scan_prefix(self, prefix, limit=None):
+        """
+        Retrieve records whose key starts with prefix, in sorted key order.
+
+        Keys are located with the sorted key index ('<table>.keys') in O(log n + k).
+
+        :param prefix:              Key prefix (e.g. 'user/123/').
+        :param limit:               Maximum number of records. None returns every match.
+        :return:                    List of (key, value) tuples.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            self.checkpoint_pending()
+            with self.read_locked():
+                record_keys = self.open_key_index().prefix_keys(tools.convert_to_string(prefix), limit=limit)
+                return self.fetch_records(record_keys)
+
+        except Exception as error:
+            self.handle_error(error, debug='unknown')
+
+    @metrics.instrument
+    def scan_range(self, start=None, end=None, limit=None):
+        """
+        Retrieve records with keys from 'start' (inclusive) up to 'end' (exclusive), in sorted key order.
+
+        Keys are located with the sorted key index ('<table>.keys') in O(log n + k).
+
+        :param start:               First key of range. None starts at the smallest key.
+        :param end:                 Key ending the range. None ends after the largest key.
+        :param limit:               Maximum number of records. None returns every record in range.
+        :return:                    List of (key, value) tuples.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            start = None if start is None else tools.convert_to_string(start)
+            end = None if end is None else tools.convert_to_string(end)
+            self.checkpoint_pending()
+            with self.read_locked():
+                record_keys = self.open_key_index().range_keys(start=start, end=end, limit=limit)
+                return self.fetch_records(record_keys)
+
+        except Exception as error:
+            self.handle_error(error, debug='unknown')
+
+    def open_key_index(self):
+        """
+        Open sorted key index, creating it on first use. Once open it is maintained by every write.
+
+        :return:                    'SortedKeyIndex' object current for the database table.
+        """
+        if self.key_index is None:
+            self.key_index = table_index.SortedKeyIndex(index_path=None)
+        self.open_table_indexes(self.get_table_signature())
+        return self.key_index
+
+    def fetch_records(self, record_keys):
+        """
+        Retrieve encoded values for record keys known to exist.
+
+        With 'read_mode' set to 'mmap' each value is read through the hash index; otherwise the table
+        records are loaded once.
+
+        :param record_keys:         List of record keys.
+        :return:                    List of (key, value) tuples.
+        """
+        record_keys = self.drop_expired_keys(record_keys)
+        if not record_keys:
+            return []
+        if self.read_mode == 'mmap':
+            return [(record_key, self.lookup_record(record_key)) for record_key in record_keys]
+        records = self.load_table_records()
+        return [(record_key, records[record_key]) for record_key in record_keys]
+
+    def iter_items(self, buffer_size=65536):
+        """
+        Stream database table (JSON file) records without loading the whole table.
+
+        Records are parsed one line at a time through a read buffer of 'buffer_size' bytes. Tables
+        replaced atomically while iterating (default 'durability') are read as of the moment iteration began.
+
+        :param buffer_size:         File read buffer size in bytes.
+        :return:                    Generator of (key, value) tuples.
+        :raises FileNotFoundError:  Database table (json file) not found.
+        :raises PermissionError:    Insufficient file system permissions.
+        :raises OSError:            Unexpected operating system error.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            self.checkpoint_pending()
+            with self.read_locked():
+                table_file_object = open(self.get_table_path(), 'r', buffering=buffer_size)
+                self.record_io('file_opens')
+
+            with table_file_object:
+                first_line = table_file_object.readline()
+                if first_line.strip() != '{':
+                    table_text = first_line + table_file_object.read()
+                    yield from self.drop_expired(self.parse_table_text(table_text)).items()
+                    return
+
+                for line in table_file_object:
+                    if line.strip() not in ('', '}'):
+                        record_key, record_value = self.parse_record_line(line)
+                        if not self.is_expired(record_key):
+                            yield record_key, record_value
+
+        except FileNotFoundError as error:
+            self.handle_error(error, debug='create_record')
+        except PermissionError as error:
+            self.handle_error(error, debug='access')
+        except Exception and OSError as error:
+            self.handle_error(error, debug='unknown')
+
+    def iter_keys(self, buffer_size=65536):
+        """
+        Stream database table (JSON file) record keys.
+
+        :param buffer_size:         File read buffer size in bytes.
+        :return:                    Generator of record keys.
+        """
+        for record_key, record_value in self.iter_items(buffer_size=buffer_size):
+            yield record_key
+
+    def iter_values(self, buffer_size=65536):
+        """
+        Stream database table (JSON file) record values.
+
+        :param buffer_size:         File read buffer size in bytes.
+        :return:                    Generator of record values.
+        """
+        for record_key, record_value in self.iter_items(buffer_size=buffer_size):
+            yield record_value
+
+    @metrics.instrument
+    def import_table(self, source, data_format='ndjson', replace=False, value_is_instance=False, key_field='key',
+                     value_field='value', chunk_size=65536, executor=None, max_workers=None):
+        """
+        Load records from NDJSON, CSV or a Python record source with a single table write.
+
+        Records are streamed from the source and merged into the table at once, instead of one table
+        rewrite per 'set_pair' call. Later records replace earlier records with the same key.
+
+        :param source:              File path or open text file object ('ndjson', 'csv'), or dictionary or
+                                    iterable of key value tuples ('records').
+        :param data_format:         'ndjson' (lines of '{"key": ..., "value": ...}'), 'csv' (header row with
+                                    key and value columns) or 'records'.
+        :param replace:             True to delete table records missing from the source. Else records are merged.
+        :param value_is_instance:   True if 'records' values are class instances. Else false.
+        :param key_field:           NDJSON member or CSV column holding the record key.
+        :param value_field:         NDJSON member or CSV column holding the record value.
+        :param chunk_size:          NDJSON lines parsed per chunk.
+        :param executor:            None parses NDJSON in the calling thread. 'process' (or 'thread') parses
+                                    chunks on a pool of 'max_workers'.
+        :param max_workers:         Pool size. None uses the number of CPUs.
+        :return:                    Number of records imported.
+        :raises FileNotFoundError:  Source file not found.
+        :raises KeyError:           Unsupported data format or executor.
+        :raises ValueError:         Source line or header is malformed.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            changes = {}
+            for record_key, record_value in bulk_transfer.read_records(source, data_format=data_format,
+                                                                       key_field=key_field,
+                                                                       value_field=value_field,
+                                                                       chunk_size=chunk_size, executor=executor,
+                                                                       max_workers=max_workers):
+                if data_format == 'records':
+                    record_key = tools.convert_to_string(record_key)
+                    record_value = self.encode_record_value(record_value, value_is_instance=value_is_instance)
+                changes[record_key] = record_value
+            record_count = len(changes)
+
+            with self.write_locked():
+                if replace and self.table_exists():
+                    for record_key in self.load_table_records():
+                        if record_key not in changes:
+                            changes[record_key] = DELETE_RECORD
+                self.stage_changes(changes)
+            return record_count
 
+        except FileNotFoundError as error:
+            self.handle_error(error, debug='dne')
+        except KeyError as error:
+            self.handle_error(error, debug='data_format')
         except Exception as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
+
+    @metrics.instrument
+    def export_table(self, sink, data_format='ndjson', key_field='key', value_field='value'):
+        """
+        Stream table records to NDJSON or CSV in one sequential write, without loading the whole table.
+
+        Values are written as stored (instance values stay encoded), so 'import_table' restores them exactly.
+
+        :param sink:                File path or open text file object.
+        :param data_format:         'ndjson' or 'csv'.
+        :param key_field:           NDJSON member or CSV column holding the record key.
+        :param value_field:         NDJSON member or CSV column holding the record value.
+        :return:                    Number of records exported.
+        :raises KeyError:           Unsupported data format.
+        :raises PermissionError:    Insufficient file system permissions.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            return bulk_transfer.write_records(sink, self.iter_items(), data_format=data_format,
+                                               key_field=key_field, value_field=value_field)
 
+        except KeyError as error:
+            self.handle_error(error, debug='data_format')
+        except PermissionError as error:
+            self.handle_error(error, debug='access')
+        except Exception as error:
+            self.handle_error(error, debug='unknown')
 
+    @metrics.instrument
     def copy_table(self, table_file_name, table_file_path='.\\'):
         """
         Clone database table (JSON file).
@@ -303,25 +1051,27 @@ class KeyValueTable(kvs.KeyValueDatabase):
         :raises Exception:          Unexpected occurs.
         """
         try:
-            self.open_table(mode='read')
+            self.checkpoint_pending()
+            with self.read_locked():
+                self.open_table(mode='read')
 
-            if not os.path.exists(table_file_path):
-                os.mkdir(table_file_path)
+                if not os.path.exists(table_file_path):
+                    os.mkdir(table_file_path)
 
-            destination = os.path.join(table_file_path, table_file_name + '.json')
-            with open(destination, 'w') as outfile:
-                for line in self.table_file_object.readlines():
-                    outfile.write(line)
+                destination = os.path.join(table_file_path, table_file_name + self.table_extension)
+                with open(destination, 'w') as outfile:
+                    shutil.copyfileobj(self.table_file_object, outfile)
 
-            self.close_table()
+                self.close_table()
 
         except FileNotFoundError and AttributeError as error:
-            tools.print_error(error_message=error, debug='dne')
+            self.handle_error(error, debug='dne')
         except Exception and OSError as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
         except PermissionError as error:
-            tools.print_error(error_message=error, debug='access')
+            self.handle_error(error, debug='access')
 
+    @metrics.instrument
     def rename_table(self, old_table_name, new_table_name):
         """
         Rename database table (JSON file).
@@ -336,19 +1086,20 @@ class KeyValueTable(kvs.KeyValueDatabase):
         :raises Exception:          Unexpected error
         """
         try:
-            source = os.path.join(tools.trim_folder_location(self.table_file_path), old_table_name + '.json')
-            destination = os.path.join(tools.trim_folder_location(self.table_file_path), new_table_name + '.json')
+            source = os.path.join(tools.trim_folder_location(self.table_file_path), old_table_name + self.table_extension)
+            destination = os.path.join(tools.trim_folder_location(self.table_file_path), new_table_name + self.table_extension)
             os.rename(src=source, dst=destination)
 
         except FileNotFoundError as error:
-            tools.print_error(error_message=error, debug='dne')
+            self.handle_error(error, debug='dne')
         except PermissionError as error:
-            tools.print_error(error_message=error, debug='access')
+            self.handle_error(error, debug='access')
         except FileExistsError as error:
-            tools.print_error(error_message=error, debug='exist')
+            self.handle_error(error, debug='exist')
         except Exception and OSError as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
 
+    @metrics.instrument
     def delete_table(self, table_name):
         """
         Delete database table (JSON file).
@@ -362,19 +1113,22 @@ class KeyValueTable(kvs.KeyValueDatabase):
         """
         try:
             database_folder_path = tools.trim_folder_location(self.table_file_path)
-            table_file_path = os.path.join(database_folder_path, table_name + '.json')
+            table_file_path = os.path.join(database_folder_path, table_name + self.table_extension)
             if os.path.exists(table_file_path):
                 os.remove(table_file_path)
+                if self.object_cache is not None:
+                    self.object_cache.invalidate_table(table_file_path)
             else:
                 raise FileNotFoundError
 
         except FileNotFoundError as error:
-            tools.print_error(error_message=error, debug='dne')
+            self.handle_error(error, debug='dne')
         except PermissionError as error:
-            tools.print_error(error_message=error, debug='access')
+            self.handle_error(error, debug='access')
         except Exception and OSError as error:
-            tools.print_error(error_message=error, debug='unknown')
+            self.handle_error(error, debug='unknown')
 
+    @metrics.instrument
     def table_to_dictionary(self):
         """
         Read database table (JSON file) and duplicate records to dictionary object.
@@ -386,17 +1140,501 @@ class KeyValueTable(kvs.KeyValueDatabase):
         :raises Exception:          Unexpected error.
         """
         try:
-            self.open_table(mode='read')
+            records_dictionary = self.load_table_records()
+            if self.use_cache:
+                records_dictionary = dict(records_dictionary)
+
+            return records_dictionary
+
+        except Exception as error:
+            self.handle_error(error, debug='unknown')
+
+    def read_table_records(self):
+        """
+        Read and parse every database table (JSON file) record (key value pair).
+
+        :return:                    Dictionary database table (json file) records (key value pairs).
+        """
+        self.open_table(mode='read')
+        table_text = self.table_file_object.read()
+        self.record_io('bytes_read', len(table_text))
+        try:
+            records_dictionary = self.parse_table_text(table_text)
+        finally:
+            self.close_table()
+
+        return records_dictionary
+
+    def parse_table_text(self, table_text):
+        """
+        Parse database table (JSON file) text into records.
+
+        :param table_text:          Table file contents.
+        :return:                    Dictionary database table (json file) records (key value pairs).
+        :raises CorruptTable:       Table text is not a valid table.
+        """
+        if self.table_format == 'json':
+            try:
+                return json_backend.loads(table_text) if table_text.strip() else {}
+            except ValueError as error:
+                raise exceptions.CorruptTable(f'{self.table_file}: {error}') from error
+
+        records_dictionary = {}
+        for line in table_text.split('\n')[1:-1]:
+            record_key, record_value = self.parse_record_line(line)
+            records_dictionary.update({record_key: record_value})
+        return records_dictionary
+
+    def load_table_records(self):
+        """
+        Retrieve database table records, including changes held in the write-ahead log.
+
+        Callers must not modify the returned dictionary.
+
+        :return:                    Dictionary database table (json file) records (key value pairs).
+        """
+        with self.read_locked():
+            log_overlay = self.get_log_overlay()
+            if not log_overlay:
+                return self.drop_expired(self.load_file_records())
+
+            records = dict(self.load_file_records()) if self.get_table_signature() is not None else {}
+            for record_key, record_value in log_overlay.items():
+                records.pop(record_key, None)
+                if record_value is not DELETE_RECORD:
+                    records[record_key] = record_value
+            return self.drop_expired(records)
+
+    def load_file_records(self):
+        """
+        Retrieve database table (JSON file) records, served from the table cache when enabled.
+
+        Cached records are reloaded only when the table's modification time, size or inode change.
+        Callers must not modify the returned dictionary.
+
+        :return:                    Dictionary database table (json file) records (key value pairs).
+        """
+        with self.read_locked():
+            if not self.use_cache:
+                return self.read_table_records()
+
+            if not self.check_cache():
+                self.record_io('cache_misses')
+                table_signature = self.get_table_signature()
+                self.table_cache = self.read_table_records()
+                self.table_cache_signature = table_signature
+            else:
+                self.record_io('cache_hits')
+
+            return self.table_cache
+
+    def parse_record_line(self, line):
+        """
+        Split database table (JSON file) line into record key and record value.
+
+        :param line:                Table line formatted as '"key": "value",'.
+        :return:                    Tuple of record key and record value.
+        :raises CorruptTable:       Line is not a table record.
+        """
+        try:
+            if self.table_format == 'json':
+                record = json_backend.loads('{' + line.strip().rstrip(',') + '}')
+                return next(iter(record.items()))
+
             clean_line = lambda text: text.strip().replace('"', '').replace(',', '')
             split_key = lambda text: clean_line(text.split(':')[0])
             split_value = lambda text: clean_line(text.split(':')[1])
 
-            records_dictionary = {}
-            for line in self.table_file_object.readlines()[1:-1]:
-                records_dictionary.update({split_key(line): split_value(line)})
-            self.close_table()
+            return split_key(line), split_value(line)
+        except (ValueError, IndexError, StopIteration) as error:
+            raise exceptions.CorruptTable(f'{self.table_file}: malformed record line {line!r}') from error
 
-            return records_dictionary
+    def lookup_record(self, record_key):
+        """
+        Retrieve encoded record value for record key.
 
-        except Exception as error:
-            tools.print_error(error_message=error, debug='unknown')
\ No newline at end of file
+        With 'read_mode' set to 'mmap', only the requested record is read from the memory-mapped table.
+
+        :param record_key:          Key of key value pair (string).
+        :return:                    Encoded record value.
+        :raises KeyError:           Key not found in database table (json file) or record expired.
+        """
+        if self.is_expired(record_key):
+            raise KeyError(record_key)
+        if self.read_mode == 'mmap':
+            if self.use_write_ahead_log:
+                not_logged = object()
+                record_value = self.get_write_ahead_log().lookup(self.table_file, record_key, default=not_logged)
+                if record_value is DELETE_RECORD:
+                    raise KeyError(record_key)
+                if record_value is not not_logged:
+                    return record_value
+                if self.get_table_signature() is None:
+                    raise KeyError(record_key)
+            with self.read_locked():
+                return self.open_hash_index().lookup(record_key)
+        return self.load_table_records()[record_key]
+
+    def has_record(self, record_key):
+        """
+        Determine if record key exists in database table (JSON file).
+
+        :param record_key:          Key of key value pair (string).
+        :return:                    True if key found. Else false.
+        """
+        if self.read_mode == 'mmap':
+            try:
+                self.lookup_record(record_key)
+                return True
+            except KeyError:
+                return False
+        return record_key in self.load_table_records()
+
+    def open_hash_index(self):
+        """
+        Open persistent hash index ('<table>.idx') for memory-mapped lookups.
+
+        :return:                    'HashIndex' object, rebuilt when the database table changed.
+        """
+        if self.hash_index is None:
+            self.hash_index = hash_index.HashIndex(table_path=self.get_table_path(),
+                                                   index_path=self.get_sidecar_path('.idx'),
+                                                   parse_record_line=self.parse_record_line)
+        self.hash_index.open_index()
+        return self.hash_index
+
+    def open_table_indexes(self, table_signature, load_records=None):
+        """
+        Bring enabled secondary indexes up to date with the database table (JSON file).
+
+        :param table_signature:     Current database table signature.
+        :param load_records:        Function returning table records when an index must be rebuilt.
+        :return:                    List of enabled 'TableIndex' objects.
+        """
+        table_indexes = [index for index in (self.reverse_index, self.key_index) if index is not None]
+        for index in table_indexes:
+            if index.index_path is None:
+                index.index_path = self.get_sidecar_path(index.index_extension)
+            index.open(table_signature, load_records=load_records or self.load_table_records)
+        return table_indexes
+
+    def record_io(self, counter, amount=1):
+        """
+        Add to a table I/O counter of the metrics registry (no-op without one).
+
+        :param counter:             'bytes_read', 'bytes_written', 'file_opens', 'cache_hits' or 'cache_misses'.
+        :param amount:              Amount added.
+        :return:                    Counter updated.
+        """
+        if self.metrics is not None:
+            self.metrics.record_io(self.table_file, counter, amount)
+
+    def get_write_ahead_log(self):
+        """
+        Open the database write-ahead log, replaying records left by a previous process on first use.
+
+        :return:                    'WriteAheadLog' object shared by every table of the database.
+        """
+        if self.write_ahead_log is None:
+            self.create_database()
+            self.write_ahead_log = wal.WriteAheadLog.for_database(self.database_path,
+                                                                  checkpoint_bytes=self.checkpoint_bytes)
+            self.write_ahead_log.register(self)
+        return self.write_ahead_log
+
+    def get_log_overlay(self):
+        """
+        Retrieve changes held in the write-ahead log and not yet saved to the table file.
+
+        :return:                    Dictionary of record keys to values or 'DELETE_RECORD'. Empty when the
+                                    write-ahead log is disabled.
+        """
+        if not self.use_write_ahead_log:
+            return {}
+        return self.get_write_ahead_log().get_overlay(self.table_file)
+
+    def checkpoint(self):
+        """
+        Save changes held in the database write-ahead log to the table files.
+
+        :return:                    Table files updated; write-ahead log emptied. No-op when disabled.
+        """
+        if self.use_write_ahead_log:
+            self.get_write_ahead_log().checkpoint()
+
+    def checkpoint_pending(self):
+        """
+        Checkpoint before reads served from the table file alone (indexes, streaming, copies).
+
+        :return:                    Table file includes every logged change of this table.
+        """
+        if self.get_log_overlay():
+            self.checkpoint()
+
+    def table_exists(self):
+        """
+        Determine if the table holds data: a table file or changes in the write-ahead log.
+
+        :return:                    True if table exists. Else false.
+        """
+        return self.get_table_signature() is not None or bool(self.get_log_overlay())
+
+    def get_expiry_time(self, ttl):
+        """
+        Convert time to live to an expiry timestamp.
+
+        :param ttl:                 Seconds until expiry. None for no expiry.
+        :return:                    Expiry timestamp (seconds since the epoch) or None.
+        """
+        return None if ttl is None else time.time() + ttl
+
+    def open_expiry_index(self, force_refresh=False):
+        """
+        Open record expiry index ('<table>.ttl'), shared by every table object using this table in the process.
+
+        :param force_refresh:       True to check the sidecar file now (writers under the write lock). Else
+                                    reads check it at most once per 'ExpiryIndex.refresh_interval'.
+        :return:                    'ExpiryIndex' object, reloaded when another process saved the sidecar file.
+        """
+        if self.expiry_index is None:
+            self.expiry_index = expiry_index.ExpiryIndex.for_path(self.get_sidecar_path('.ttl'))
+        self.expiry_index.refresh(force=force_refresh)
+        return self.expiry_index
+
+    def update_expiry_times(self, changes, expiry_times=None):
+        """
+        Update record expiry times for saved changes. Deleted records always lose their expiry time.
+
+        Caller holds the write lock, so the sidecar is reloaded, merged and saved without losing entries written
+        by other processes (with 'locking' enabled).
+
+        :param changes:             Dictionary of record keys to encoded values or 'DELETE_RECORD'.
+        :param expiry_times:        Dictionary of record keys to expiry timestamps (None clears one); keys
+                                    not listed keep their expiry time. None clears every changed record's.
+        :return:                    Expiry index updated and saved when it changed.
+        """
+        index = self.open_expiry_index(force_refresh=True)
+        updates = {}
+        if len(index):
+            updates = {record_key: None for record_key, record_value in changes.items()
+                       if expiry_times is None or record_value is DELETE_RECORD}
+        if expiry_times:
+            updates.update(expiry_times)
+        if updates and index.update(updates):
+            index.save()
+
+    def is_expired(self, record_key):
+        """
+        Determine if a record's expiry time has passed (the record may not be purged yet).
+
+        :param record_key:          Key of key value pair (string).
+        :return:                    True if record expired. Else false.
+        """
+        index = self.open_expiry_index()
+        return bool(len(index)) and index.is_expired(record_key, time.time())
+
+    def drop_expired(self, records):
+        """
+        Filter expired records out of table records.
+
+        :param records:             Mapping of records (key value pairs).
+        :return:                    'records' itself when no record has expired, else a filtered dictionary.
+        """
+        index = self.open_expiry_index()
+        now = time.time()
+        if not len(index) or not index.has_expired(now):
+            return records
+        return {record_key: records[record_key] for record_key in records
+                if not index.is_expired(record_key, now)}
+
+    def drop_expired_keys(self, record_keys):
+        """
+        Filter expired record keys out of a list of keys.
+
+        :param record_keys:         List of record keys.
+        :return:                    List of record keys that have not expired.
+        """
+        index = self.open_expiry_index()
+        now = time.time()
+        if not len(index) or not index.has_expired(now):
+            return record_keys
+        return [record_key for record_key in record_keys if not index.is_expired(record_key, now)]
+
+    def get_ttl(self, record_key):
+        """
+        Retrieve seconds left until a record expires.
+
+        :param record_key:          Key of key value pair.
+        :return:                    Seconds until expiry (0 once expired). None if the record has no expiry time.
+        """
+        expires_at = self.open_expiry_index(force_refresh=True).expiry_times.get(tools.convert_to_string(record_key))
+        return None if expires_at is None else max(expires_at - time.time(), 0)
+
+    def purge_expired(self, limit=None):
+        """
+        Delete expired records, earliest expiry first, with one table rewrite.
+
+        Expired records are popped from the expiry heap, so purging never scans the table.
+
+        :param limit:               Maximum number of records deleted. None deletes every expired record.
+        :return:                    Number of records deleted.
+        """
+        with self.write_locked():
+            index = self.open_expiry_index(force_refresh=True)
+            expired_keys = index.pop_expired(time.time(), limit=limit)
+            if expired_keys:
+                self.apply_changes(dict.fromkeys(expired_keys, DELETE_RECORD))
+                index.save()
+        self.invalidate_objects(expired_keys)
+        return len(expired_keys)
+
+    def start_expiry_sweeper(self, interval=1.0, batch_size=1000):
+        """
+        Purge expired records on a background thread.
+
+        Every 'interval' seconds, expired records are deleted in batches of 'batch_size' (one table rewrite
+        per batch) until none remain. Enable 'locking' when other threads write the table.
+
+        :param interval:            Seconds between sweeps.
+        :param batch_size:          Maximum records deleted per table rewrite.
+        :return:                    Sweeper thread started (no-op when already running).
+        """
+        if self.expiry_sweeper is not None and self.expiry_sweeper.is_alive():
+            return
+        self.sweeper_stop = threading.Event()
+        self.expiry_sweeper = threading.Thread(target=self.run_expiry_sweeper,
+                                               args=(self.sweeper_stop, interval, batch_size), daemon=True)
+        self.expiry_sweeper.start()
+
+    def run_expiry_sweeper(self, stop_event, interval, batch_size):
+        """
+        Sweeper thread loop (see 'start_expiry_sweeper').
+
+        :param stop_event:          Event set by 'stop_expiry_sweeper'.
+        :param interval:            Seconds between sweeps.
+        :param batch_size:          Maximum records deleted per table rewrite.
+        :return:                    Loop ended when 'stop_event' is set.
+        """
+        while not stop_event.wait(interval):
+            try:
+                while self.purge_expired(limit=batch_size) == batch_size and not stop_event.is_set():
+                    pass
+            except Exception as error:
+                tools.print_error(error_message=error, debug='unknown')
+
+    def stop_expiry_sweeper(self):
+        """
+        Stop the background sweeper and wait for it to finish its current batch.
+
+        :return:                    Sweeper thread stopped.
+        """
+        if self.expiry_sweeper is not None:
+            self.sweeper_stop.set()
+            self.expiry_sweeper.join()
+            self.expiry_sweeper = None
+
+    def invalidate_objects(self, record_keys=None):
+        """
+        Drop decoded instance values of changed records from the object cache (no-op without one).
+
+        :param record_keys:         Iterable of changed record keys. None drops every record of the table.
+        :return:                    Object cache entries removed.
+        """
+        if self.object_cache is None:
+            return
+        if record_keys is None:
+            self.object_cache.invalidate_table(self.get_table_path())
+        else:
+            self.object_cache.invalidate(self.get_table_path(), record_keys)
+
+    def get_table_lock(self):
+        """
+        Retrieve reader-writer lock for database table (lock file '<table>.lock').
+
+        :return:                    'TableLock' object shared by every table object using this table.
+        """
+        if self.table_lock is None:
+            self.create_database()
+            self.table_lock = table_lock.TableLock.for_path(self.get_sidecar_path('.lock'))
+        return self.table_lock
+
+    def read_locked(self):
+        """
+        Context manager holding the shared table lock when 'locking' is enabled.
+
+        :return:                    Shared lock context (no-op when locking is disabled).
+        :raises LockTimeout:        Lock not acquired within 'lock_timeout'.
+        """
+        if not self.locking:
+            return nullcontext()
+        return self.get_table_lock().read_lock(timeout=self.lock_timeout)
+
+    def write_locked(self):
+        """
+        Context manager holding the exclusive table lock when 'locking' is enabled.
+
+        :return:                    Exclusive lock context (no-op when locking is disabled).
+        :raises LockTimeout:        Lock not acquired within 'lock_timeout'.
+        """
+        if not self.locking:
+            return nullcontext()
+        return self.get_table_lock().write_lock(timeout=self.lock_timeout)
+
+    def get_sidecar_path(self, extension):
+        """
+        Build path of a file stored next to the database table (JSON file).
+
+        :param extension:           Sidecar file extension (e.g. '.idx').
+        :return:                    Full sidecar file path.
+        """
+        return os.path.join(self.database_path, self.table_file + extension)
+
+    def get_table_path(self):
+        """
+        Build database table (JSON file) path.
+
+        :return:                    Full database table (json file) path.
+        """
+        return os.path.join(self.database_path, self.table_file + self.table_extension)
+
+    def get_table_signature(self):
+        """
+        Identify current database table (JSON file) version from file system metadata.
+
+        :return:                    Tuple of modification time (ns), size and inode. None if table does not exist.
+        """
+        try:
+            table_stat = os.stat(self.get_table_path())
+            return table_stat.st_mtime_ns, table_stat.st_size, table_stat.st_ino
+        except FileNotFoundError:
+            return None
+
+    def check_cache(self):
+        """
+        Determine if table cache matches the database table (JSON file).
+
+        :return:                    True if cached records are current. Else false.
+        """
+        return (self.use_cache
+                and self.table_cache is not None
+                and self.table_cache_signature == self.get_table_signature())
+
+    def update_cache(self, records):
+        """
+        Replace table cache with records just written to database table (JSON file).
+
+        :param records:             Dictionary of records (key value pairs) saved to table.
+        :return:                    Table cache and signature updated when caching is enabled.
+        """
+        if self.use_cache:
+            self.table_cache = records
+            self.table_cache_signature = self.get_table_signature()
+
+    def clear_cache(self):
+        """
+        Discard table cache. Next read reloads the database table (JSON file).
+
+        :return:                    Table cache emptied.
+        """
+        self.table_cache = None
+        self.table_cache_signature = None
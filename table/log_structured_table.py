@@ -0,0 +1,359 @@
+"""
+This module provides class functions for initializing and using the LogStructuredTable class.
+
+The module includes an append-only storage backend for database tables. Records (key value pairs)
+are appended to a log file, deletions are written as tombstones, and an in-memory index maps each
+record key to the location of its latest record. Compaction rewrites the log with live records only.
+"""
+
+import os
+import threading
+from collections.abc import Mapping
+import json_database.table.key_value_table as kvt
+import json_database.tools.tools as tools
+import json_database.tools.json_backend as json_backend
+import json_database.tools.metrics as metrics
+
+class LogRecords(Mapping):
+    def __init__(self, table):
+        """
+        Initialize read-only view of log structured table records.
+
+        :param table:           'LogStructuredTable' object.
+        :returns:               Mapping reading record values from the log on access.
+        """
+        self.table = table
+
+    def __getitem__(self, record_key):
+        return self.table.read_log_value(record_key)
+
+    def __contains__(self, record_key):
+        return record_key in self.table.record_index
+
+    def __iter__(self):
+        return iter(list(self.table.record_index))
+
+    def __len__(self):
+        return len(self.table.record_index)
+
+
+class LogStructuredTable(kvt.KeyValueTable):
+    table_extension = '.log'
+
+    def __init__(self, database_name, table_name, auto_compact=True, compaction_minimum_bytes=65536,
+                 instance_encoding='repr', locking=False, lock_timeout=None, durability='flush', metrics=None,
+                 strict=False, object_cache=None):
+        """
+        Initialize LogStructuredTable instance.
+
+        :param database_name:               Database name.
+        :param table_name:                  Key value store or table name (log file name).
+        :param auto_compact:                True to compact when dead records outweigh live records. Else false.
+        :param compaction_minimum_bytes:    Log size below which automatic compaction is skipped.
+        :param instance_encoding:           Instance values - 'repr' (escaped bytes literal) or 'base85'.
+        :param locking:                     True to coordinate writers across threads and processes. Else false.
+        :param lock_timeout:                Seconds to wait for the table lock. None waits indefinitely.
+        :param durability:                  Appends - 'none' or 'flush' (flushed to the operating system)
+                                            or 'fsync' (synced to disk before returning).
+        :param metrics:                     'MetricsRegistry' recording operation latencies and I/O counters.
+        :param strict:                      True to raise 'json_database.tools.exceptions' errors instead of
+                                            printing them.
+        :param object_cache:                'ObjectCache' holding decoded instance values for 'get_value'.
+        :returns:                           Initialized 'LogStructuredTable' object.
+        :raises ValueError:                 Unsupported durability.
+        """
+        super().__init__(database_name, table_name, instance_encoding=instance_encoding, locking=locking,
+                         lock_timeout=lock_timeout, durability=durability, metrics=metrics, strict=strict,
+                         object_cache=object_cache)
+        self.auto_compact = auto_compact
+        self.compaction_minimum_bytes = compaction_minimum_bytes
+        self.record_index = {}
+        self.log_size = 0
+        self.live_bytes = 0
+        self.log_signature = None
+        self.log_reader = None
+        self.log_writer = None
+        self.log_lock = threading.RLock()
+        self.compaction_lock = threading.Lock()
+        self.compaction_thread = None
+
+    def open_log(self):
+        """
+        Open log file handles and bring the in-memory index up to date.
+
+        The index is rebuilt when the log was replaced (compacted elsewhere) and extended
+        with any records appended since the last call.
+
+        :return:                    Log reader and writer opened; 'record_index' current.
+        """
+        with self.log_lock:
+            self.create_database()
+            table_path = self.get_table_path()
+            if not os.path.exists(table_path):
+                open(table_path, 'ab').close()
+
+            table_signature = self.get_table_signature()
+            if self.log_reader is not None and table_signature == self.log_signature:
+                return
+
+            table_inode = table_signature[2]
+            if self.log_reader is None or self.log_signature is None or self.log_signature[2] != table_inode:
+                self.close_log()
+                self.record_index = {}
+                self.log_size = 0
+                self.live_bytes = 0
+                self.log_reader = open(table_path, 'rb')
+                self.log_writer = open(table_path, 'ab')
+                self.record_io('file_opens', 2)
+
+            self.scan_log(start_offset=self.log_size)
+            self.log_signature = self.get_table_signature()
+
+    def scan_log(self, start_offset):
+        """
+        Apply log records from 'start_offset' onward to the in-memory index.
+
+        A trailing partial record (interrupted append) is truncated from the log.
+
+        :param start_offset:        Byte offset of first record to read.
+        :return:                    'record_index', 'log_size' and 'live_bytes' updated.
+        """
+        self.log_reader.seek(start_offset)
+        offset = start_offset
+        for line in self.log_reader:
+            try:
+                if not line.endswith(b'\n'):
+                    raise ValueError('Partial log record.')
+                record = json_backend.loads(line)
+            except ValueError:
+                self.log_writer.truncate(offset)
+                break
+
+            self.apply_log_record(record, offset, len(line))
+            offset += len(line)
+
+        self.log_size = offset
+
+    def apply_log_record(self, record, offset, length):
+        """
+        Update the in-memory index for one log record.
+
+        :param record:              Decoded log record - ['set', key, value] or ['delete', key].
+        :param offset:              Byte offset of record within log.
+        :param length:              Record length in bytes.
+        :return:                    'record_index' and 'live_bytes' updated.
+        """
+        previous = self.record_index.pop(record[1], None)
+        if previous is not None:
+            self.live_bytes -= previous[1]
+
+        if record[0] == 'set':
+            self.record_index[record[1]] = (offset, length)
+            self.live_bytes += length
+
+    def append_log_records(self, records):
+        """
+        Append encoded records to the log with a single write.
+
+        :param records:             List of log records - ['set', key, value] or ['delete', key].
+        :return:                    Records saved to log and index updated.
+        """
+        with self.log_lock:
+            self.open_log()
+            data = [(json_backend.dumps(record) + '\n').encode('utf-8') for record in records]
+            self.record_io('bytes_written', self.log_writer.write(b''.join(data)))
+            self.log_writer.flush()
+            if self.durability == 'fsync':
+                os.fsync(self.log_writer.fileno())
+
+            offset = self.log_size
+            for record, line in zip(records, data):
+                self.apply_log_record(record, offset, len(line))
+                offset += len(line)
+            self.log_size = offset
+            self.log_signature = self.get_table_signature()
+
+        if self.auto_compact and self.needs_compaction():
+            self.compact(background=True)
+
+    def read_log_value(self, record_key):
+        """
+        Read latest value for record key directly from its log location.
+
+        :param record_key:          Key of key value pair.
+        :return:                    Record value.
+        :raises KeyError:           Key not found in database table (log file).
+        """
+        with self.log_lock:
+            offset, length = self.record_index[record_key]
+            self.log_reader.seek(offset)
+            self.record_io('bytes_read', length)
+            return json_backend.loads(self.log_reader.read(length))[2]
+
+    def close_log(self):
+        """
+        Close log file handles.
+
+        :return:                    Log reader and writer closed.
+        """
+        with self.log_lock:
+            for handle in (self.log_reader, self.log_writer):
+                if handle is not None:
+                    handle.close()
+            self.log_reader = None
+            self.log_writer = None
+            self.log_signature = None
+
+    def apply_changes(self, changes):
+        """
+        Append changes to database table (log file) with a single write.
+
+        :param changes:             Dictionary of record keys to encoded values or 'DELETE_RECORD'.
+        :return:                    Set records and tombstones appended to log.
+        """
+        with self.write_locked(), self.log_lock:
+            self.open_log()
+            log_records = []
+            for record_key, record_value in changes.items():
+                if record_value is kvt.DELETE_RECORD:
+                    if record_key in self.record_index:
+                        log_records.append(['delete', record_key])
+                else:
+                    log_records.append(['set', record_key, tools.convert_to_string(record_value)])
+
+            if log_records:
+                self.append_log_records(log_records)
+
+    def load_table_records(self):
+        """
+        Retrieve database table (log file) records as a mapping backed by the in-memory index.
+
+        :return:                    Mapping of record keys to values read from the log on access.
+        """
+        self.open_log()
+        return self.drop_expired(LogRecords(self))
+
+    def read_table_records(self):
+        """
+        Read every live database table (log file) record (key value pair).
+
+        :return:                    Dictionary database table (log file) records (key value pairs).
+        """
+        return dict(self.load_table_records())
+
+    @metrics.instrument
+    def table_to_dictionary(self):
+        """
+        Read database table (log file) and duplicate live records to dictionary object.
+
+        :return:                    Dictionary database table (log file) records (key value pairs).
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            return self.read_table_records()
+
+        except Exception as error:
+            self.handle_error(error, debug='unknown')
+
+    def iter_items(self, buffer_size=65536):
+        """
+        Stream live database table (log file) records in key order of the in-memory index.
+
+        :param buffer_size:         Unused; records are read individually from their log locations.
+        :return:                    Generator of (key, value) tuples.
+        """
+        records = self.load_table_records()
+        for record_key in records:
+            try:
+                yield record_key, records[record_key]
+            except KeyError:
+                continue
+
+    def needs_compaction(self):
+        """
+        Determine if dead records (overwritten or deleted) outweigh live records.
+
+        :return:                    True if log should be compacted. Else false.
+        """
+        return (self.log_size >= self.compaction_minimum_bytes
+                and self.log_size - self.live_bytes > self.live_bytes
+                and (self.compaction_thread is None or not self.compaction_thread.is_alive()))
+
+    def compact(self, background=False):
+        """
+        Rewrite database table (log file) with live records only.
+
+        Live records are copied without holding the log lock; records appended meanwhile
+        are replayed before the compacted log replaces the original. One compaction runs per
+        table object at a time, and a compaction is dropped when another table object or
+        process replaced the log since the copy started.
+
+        :param background:          True to compact on a background thread. Else false.
+        :return:                    Compacted log replaces original log file. Left untouched on failure
+                                    or when another compaction is running.
+        :raises ValueError:         Malformed log record.
+        :raises OSError:            Unexpected operating system error.
+        :raises Exception:          Unexpected error.
+        """
+        if background:
+            self.compaction_thread = threading.Thread(target=self.compact, daemon=True)
+            self.compaction_thread.start()
+            return
+
+        if not self.compaction_lock.acquire(blocking=False):
+            return
+        compact_path = None
+        try:
+            with self.log_lock:
+                self.open_log()
+                snapshot_index = dict(self.record_index)
+                snapshot_size = self.log_size
+                snapshot_signature = self.log_signature
+
+            table_path = self.get_table_path()
+            compact_path = f'{table_path}.{os.getpid()}-{threading.get_ident()}.compact'
+            compact_index = {}
+            with open(table_path, 'rb') as source, open(compact_path, 'wb') as destination:
+                # Offsets belong to the snapshot's log file (inode); a replaced log was already compacted.
+                if os.fstat(source.fileno()).st_ino != snapshot_signature[2]:
+                    return
+                for record_key, (offset, length) in snapshot_index.items():
+                    source.seek(offset)
+                    compact_index[record_key] = (destination.tell(), length)
+                    destination.write(source.read(length))
+
+                with self.write_locked(), self.log_lock:
+                    table_signature = self.get_table_signature()
+                    if table_signature is None or table_signature[2] != snapshot_signature[2]:
+                        return
+                    source.seek(snapshot_size)
+                    for line in source:
+                        record = json_backend.loads(line)
+                        compact_index.pop(record[1], None)
+                        if record[0] == 'set':
+                            compact_index[record[1]] = (destination.tell(), len(line))
+                            destination.write(line)
+
+                    destination.flush()
+                    os.fsync(destination.fileno())
+                    self.close_log()
+                    os.replace(compact_path, table_path)
+
+                    self.record_index = compact_index
+                    self.log_size = destination.tell()
+                    self.live_bytes = sum(length for offset, length in compact_index.values())
+                    self.log_reader = open(table_path, 'rb')
+                    self.log_writer = open(table_path, 'ab')
+                    self.log_signature = self.get_table_signature()
+
+        except FileNotFoundError as error:
+            self.handle_error(error, debug='dne')
+        except PermissionError as error:
+            self.handle_error(error, debug='access')
+        except (ValueError, OSError) as error:
+            self.handle_error(error, debug='unknown')
+        finally:
+            # A failed compaction leaves the log as it was; drop the partial copy.
+            if compact_path is not None and os.path.exists(compact_path):
+                os.remove(compact_path)
+            self.compaction_lock.release()
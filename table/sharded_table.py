@@ -0,0 +1,360 @@
+"""
+This module provides class functions for initializing and using the ShardedKeyValueTable class.
+
+The module includes a logical table hash-partitioned across several database tables (JSON files) within one
+database directory. Each record key is hashed to exactly one shard, so an upsert rewrites only that shard.
+Table-wide reads scan the shards in parallel. The shard count is saved in '<table>.shards' and can be
+changed with 'reshard'.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import json_database.database.key_value_database as kvs
+import json_database.table.key_value_table as kvt
+import json_database.table.hash_index as hash_index
+import json_database.tools.tools as tools
+import json_database.tools.json_backend as json_backend
+
+class ShardedKeyValueTable(kvs.KeyValueDatabase):
+    sidecar_extensions = ('.ttl', '.idx', '.rev', '.keys')
+
+    def __init__(self, database_name, table_name, shard_count=8, max_workers=None, **table_options):
+        """
+        Initialize ShardedKeyValueTable instance.
+
+        :param database_name:   Database name.
+        :param table_name:      Logical table name. Shards are named '<table>_shard<index>of<count>'.
+        :param shard_count:     Number of shards for a new table. An existing table keeps its saved count.
+        :param max_workers:     Threads used for table-wide scans. None uses the shard count.
+        :param table_options:   Keyword arguments passed to each shard 'KeyValueTable' (e.g. 'use_cache').
+                                'strict' also applies to the sharded table itself.
+        :returns:               Initialized 'ShardedKeyValueTable' object.
+        """
+        super().__init__(database_name, strict=table_options.get('strict', False))
+        self.table_name = table_name
+        self.shard_count = shard_count
+        self.max_workers = max_workers
+        self.table_options = table_options
+        self.shards = None
+
+    def set_database_directory(self, use_current_directory=True, new_directory_path=None):
+        """
+        Assign database working directory and load the saved shard count.
+
+        :param use_current_directory:   Default true. Use current working directory as database directory location.
+        :param new_directory_path:      When 'use_current_directory' is False, provide desired path.
+        :return:                        Directory assigned; shard tables reopened on next use.
+        """
+        super().set_database_directory(use_current_directory=use_current_directory,
+                                       new_directory_path=new_directory_path)
+        self.shards = None
+        saved_shard_count = self.read_shard_count()
+        if saved_shard_count is not None:
+            self.shard_count = saved_shard_count
+
+    def get_metadata_path(self):
+        """
+        Build shard metadata file path.
+
+        :return:                Full '<table>.shards' path.
+        """
+        return os.path.join(self.database_path, self.table_name + '.shards')
+
+    def read_shard_count(self):
+        """
+        Read saved shard count.
+
+        :return:                Shard count. None if the sharded table has no metadata yet.
+        """
+        try:
+            with open(self.get_metadata_path(), 'rb') as metadata_file_object:
+                return json_backend.loads(metadata_file_object.read())['shard_count']
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def write_shard_count(self, shard_count):
+        """
+        Save shard count (temporary file replaced atomically).
+
+        :param shard_count:     Number of shards.
+        :return:                '<table>.shards' written.
+        """
+        self.create_database()
+        temporary_path = f'{self.get_metadata_path()}.{os.getpid()}-{threading.get_ident()}.tmp'
+        try:
+            with open(temporary_path, 'w') as metadata_file_object:
+                metadata_file_object.write(json_backend.dumps(dict(shard_count=shard_count)))
+            os.replace(temporary_path, self.get_metadata_path())
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+    def build_shards(self, shard_count):
+        """
+        Create shard table objects for a shard count.
+
+        :param shard_count:     Number of shards.
+        :return:                List of 'KeyValueTable' objects sharing this object's database directory.
+        """
+        shards = []
+        for index in range(shard_count):
+            shard = kvt.KeyValueTable(self.database_name, f'{self.table_name}_shard{index:03d}of{shard_count:03d}',
+                                      **self.table_options)
+            shard.database_parent_directory = self.database_parent_directory
+            shard.database_path = self.database_path
+            shards.append(shard)
+        return shards
+
+    def open_shards(self):
+        """
+        Retrieve shard table objects, saving the shard count on first use.
+
+        :return:                List of 'KeyValueTable' objects.
+        """
+        if self.shards is None:
+            if self.read_shard_count() is None:
+                self.write_shard_count(self.shard_count)
+            self.shards = self.build_shards(self.shard_count)
+        return self.shards
+
+    def get_shard(self, record_key):
+        """
+        Select the shard holding a record key.
+
+        :param record_key:      Key of key value pair.
+        :return:                Shard 'KeyValueTable' object.
+        """
+        shards = self.open_shards()
+        return shards[hash_index.hash_key(tools.convert_to_string(record_key)) % len(shards)]
+
+    def group_by_shard(self, record_keys):
+        """
+        Partition record keys by shard.
+
+        :param record_keys:     Iterable of record keys or (key, value) tuples.
+        :return:                Dictionary of shard index to list of entries.
+        """
+        shard_count = len(self.open_shards())
+        groups = {}
+        for entry in record_keys:
+            record_key = entry[0] if isinstance(entry, tuple) else entry
+            index = hash_index.hash_key(tools.convert_to_string(record_key)) % shard_count
+            groups.setdefault(index, []).append(entry)
+        return groups
+
+    def map_shards(self, function, shards=None):
+        """
+        Call function on every shard in parallel.
+
+        :param function:        Callable taking a shard 'KeyValueTable' (or whatever 'shards' holds).
+        :param shards:          Shards (or shard indexes) to process. None processes all shards.
+        :return:                List of results in shard order.
+        """
+        shards = self.open_shards() if shards is None else shards
+        with ThreadPoolExecutor(max_workers=self.max_workers or len(shards) or 1) as executor:
+            return list(executor.map(function, shards))
+
+    @staticmethod
+    def read_shard(shard):
+        """
+        Read shard records, treating a shard without a table file as empty.
+
+        :param shard:           Shard 'KeyValueTable' object.
+        :return:                Dictionary of shard records.
+        """
+        if not shard.table_exists():
+            return {}
+        return shard.load_table_records()
+
+    @classmethod
+    def remove_shard_files(cls, shard):
+        """
+        Remove a shard table file and its sidecar files (expiry times and indexes).
+
+        :param shard:           Shard 'KeyValueTable' object.
+        :return:                Shard files removed; in-memory expiry times and cached objects dropped.
+        """
+        file_paths = [shard.get_table_path()] + [shard.get_sidecar_path(extension)
+                                                 for extension in cls.sidecar_extensions]
+        for file_path in file_paths:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        shard.open_expiry_index().load()
+        shard.clear_cache()
+        shard.invalidate_objects()
+
+    def set_pair(self, record_key, record_value, value_is_instance=False, ttl=None):
+        """
+        Write record (key value pair) to its shard.
+
+        :param record_key:          Key of key value pair.
+        :param record_value:        Value of key value pair.
+        :param value_is_instance:   True if pair value is class instance. Else false.
+        :param ttl:                 Seconds until the record expires. None keeps the record until deleted.
+        :return:                    Key value pair saved; only its shard is rewritten.
+        """
+        self.get_shard(record_key).set_pair(record_key, record_value, value_is_instance=value_is_instance, ttl=ttl)
+
+    def set_many(self, records, value_is_instance=False):
+        """
+        Write multiple records, rewriting each affected shard once (shards written in parallel).
+
+        :param records:             Dictionary (or iterable of key value tuples) of records to save.
+        :param value_is_instance:   True if pair values are class instances. Else false.
+        :return:                    Key value pairs saved.
+        """
+        records = records.items() if isinstance(records, dict) else records
+        groups = self.group_by_shard(tuple(record) for record in records)
+        shards = self.open_shards()
+        self.map_shards(lambda index: shards[index].set_many(groups[index], value_is_instance=value_is_instance),
+                        shards=list(groups))
+
+    def get_value(self, record_key, value_is_instance=False, default=tools.NO_DEFAULT):
+        """
+        Retrieve corresponding record's value for provided record key.
+
+        :param record_key:          Key of key value pair.
+        :param value_is_instance:   True if expected value is an instance. Else false.
+        :param default:             Returned when the key does not exist, without reporting an error.
+        :return:                    Key value pair value or instance.
+        """
+        return self.get_shard(record_key).get_value(record_key, value_is_instance=value_is_instance,
+                                                    default=default)
+
+    def check_key(self, record_key):
+        """
+        Search the key's shard for provided record key.
+
+        :param record_key:          Key of key value pair.
+        :return:                    True if key found. Else false.
+        """
+        shard = self.get_shard(record_key)
+        if not shard.table_exists():
+            return False
+        return shard.check_key(record_key)
+
+    def delete_pair(self, record_key):
+        """
+        Delete record (key value pair) from its shard.
+
+        :param record_key:          Key of key value pair.
+        :return:                    Key value pair removed; only its shard is rewritten.
+        """
+        self.get_shard(record_key).delete_pair(record_key)
+
+    def delete_many(self, record_keys):
+        """
+        Delete multiple records, rewriting each affected shard once. Missing keys are skipped.
+
+        :param record_keys:         Iterable of record keys.
+        :return:                    Key value pairs removed.
+        """
+        groups = self.group_by_shard(record_keys)
+        shards = self.open_shards()
+        self.map_shards(lambda index: shards[index].delete_many(groups[index]), shards=list(groups))
+
+    def get_key(self, record_value):
+        """
+        Retrieve corresponding record key(s) for provided record value (shards scanned in parallel).
+
+        :param record_value:        Value of key value pair.
+        :return:                    List of corresponding (key, value) tuples. 'None' when value does not exist.
+        """
+        if not self.table_options.get('typed_values', False):
+            record_value = tools.convert_to_string(data=record_value)
+        matches = self.map_shards(lambda shard: [item for item in self.read_shard(shard).items()
+                                                 if item[1] == record_value])
+        possible_keys = [item for shard_matches in matches for item in shard_matches]
+        return possible_keys or None
+
+    def count_records(self):
+        """
+        Count records across all shards (shards scanned in parallel).
+
+        :return:                Number of records (key value pairs).
+        """
+        return sum(self.map_shards(lambda shard: len(self.read_shard(shard))))
+
+    def get_all_keys(self):
+        """
+        List record keys across all shards (shards scanned in parallel).
+
+        :return:                Record keys as list.
+        """
+        shard_keys = self.map_shards(lambda shard: list(self.read_shard(shard)))
+        return [record_key for keys in shard_keys for record_key in keys]
+
+    def table_to_dictionary(self):
+        """
+        Merge all shard records into one dictionary (shards read in parallel).
+
+        :return:                Dictionary of records (key value pairs).
+        """
+        records_dictionary = {}
+        for shard_records in self.map_shards(self.read_shard):
+            records_dictionary.update(shard_records)
+        return records_dictionary
+
+    def iter_items(self, buffer_size=65536):
+        """
+        Stream records shard by shard.
+
+        :param buffer_size:     File read buffer size in bytes.
+        :return:                Generator of (key, value) tuples.
+        """
+        for shard in self.open_shards():
+            if shard.table_exists():
+                yield from shard.iter_items(buffer_size=buffer_size)
+
+    def reshard(self, shard_count):
+        """
+        Redistribute records across a new number of shards.
+
+        New shard tables are written first (one write each, starting from empty files so leftovers of an
+        interrupted reshard are discarded), then the saved shard count is switched and the old shard tables and
+        their sidecar files removed, so an interrupted reshard leaves the previous layout readable. Record expiry
+        times move with their records.
+
+        :param shard_count:         New number of shards.
+        :return:                    Records moved to new shard tables.
+        :raises PermissionError:    Insufficient file system permissions.
+        :raises OSError:            Unexpected operating system error.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            old_shards = self.open_shards()
+            if shard_count == len(old_shards):
+                return
+
+            new_shards = self.build_shards(shard_count)
+            for shard in new_shards:
+                self.remove_shard_files(shard)
+
+            groups = {}
+            expiry_groups = {}
+            for shard in old_shards:
+                if not shard.table_exists():
+                    continue
+                expiry_times = shard.open_expiry_index(force_refresh=True).copy_expiry_times()
+                for record_key, record_value in shard.iter_items():
+                    index = hash_index.hash_key(record_key) % shard_count
+                    groups.setdefault(index, {})[record_key] = record_value
+                    if record_key in expiry_times:
+                        expiry_groups.setdefault(index, {})[record_key] = expiry_times[record_key]
+
+            self.map_shards(lambda index: new_shards[index].save_changes(groups[index],
+                                                                         expiry_times=expiry_groups.get(index)),
+                            shards=list(groups))
+            self.write_shard_count(shard_count)
+            self.shard_count = shard_count
+            self.shards = new_shards
+
+            for shard in old_shards:
+                self.remove_shard_files(shard)
+
+        except PermissionError as error:
+            self.handle_error(error, debug='access')
+        except Exception and OSError as error:
+            self.handle_error(error, debug='unknown')
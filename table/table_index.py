@@ -0,0 +1,245 @@
+"""
+This module provides class functions for initializing and using secondary table indexes.
+
+The module includes indexes kept in sync with database table (JSON file) writes and persisted as
+sidecar files next to the table. A saved index is reused while the table signature it was saved
+with still matches the table; otherwise it is rebuilt from the table records.
+"""
+
+import os
+import threading
+from bisect import bisect_left, insort
+import json_database.tools.json_backend as json_backend
+
+# Placeholder for 'apply_change' values: record absent (None is a valid typed value).
+MISSING_RECORD = object()
+
+def value_token(record_value):
+    """
+    Convert record value to a string usable as an index entry key.
+
+    Strings are kept as they are. Typed values (numbers, lists, dictionaries) are encoded as canonical JSON
+    behind a NUL prefix, so they are hashable and never collide with a string value.
+
+    :param record_value:    Record value.
+    :return:                Index entry key.
+    """
+    if isinstance(record_value, str):
+        return record_value
+    return '\x00' + json_backend.dumps(record_value, sort_keys=True)
+
+
+class TableIndex:
+    index_extension = None
+
+    def __init__(self, index_path):
+        """
+        Initialize TableIndex instance.
+
+        :param index_path:      Sidecar index file path.
+        :returns:               Initialized 'TableIndex' object.
+        """
+        self.index_path = index_path
+        self.table_signature = None
+
+    def build(self, records):
+        """
+        Rebuild index from every table record.
+
+        :param records:         Dictionary of records (key value pairs).
+        :return:                Index entries replaced.
+        """
+        raise NotImplementedError
+
+    def apply_change(self, record_key, old_value, new_value):
+        """
+        Update index for one changed record.
+
+        :param record_key:      Key of key value pair.
+        :param old_value:       Previous record value. 'MISSING_RECORD' if record is new.
+        :param new_value:       New record value. 'MISSING_RECORD' if record was deleted.
+        :return:                Index entries updated.
+        """
+        raise NotImplementedError
+
+    def dump_entries(self):
+        """
+        Convert index entries to a JSON serializable object.
+
+        :return:                Index entries.
+        """
+        raise NotImplementedError
+
+    def load_entries(self, entries):
+        """
+        Restore index entries saved by 'dump_entries'.
+
+        :param entries:         Index entries.
+        :return:                Index entries replaced.
+        """
+        raise NotImplementedError
+
+    def open(self, table_signature, load_records):
+        """
+        Bring index up to date with the database table.
+
+        :param table_signature:     Current database table signature.
+        :param load_records:        Function returning table records, called only when the index is rebuilt.
+        :return:                    Index current for 'table_signature'.
+        """
+        if self.table_signature is not None and self.table_signature == table_signature:
+            return
+        if self.load(table_signature):
+            return
+
+        self.build(load_records() if table_signature is not None else {})
+        self.save(table_signature)
+
+    def load(self, table_signature):
+        """
+        Load sidecar index file when it was saved for the current database table.
+
+        :param table_signature:     Current database table signature.
+        :return:                    True if index loaded. Else false.
+        """
+        try:
+            with open(self.index_path, 'rb') as index_file_object:
+                document = json_backend.loads(index_file_object.read())
+        except (FileNotFoundError, ValueError):
+            return False
+
+        if table_signature is None or document.get('table_signature') != list(table_signature):
+            return False
+
+        self.load_entries(document['entries'])
+        self.table_signature = table_signature
+        return True
+
+    def save(self, table_signature):
+        """
+        Save index entries to sidecar index file (temporary file replaced atomically).
+
+        :param table_signature:     Database table signature the entries belong to.
+        :return:                    Sidecar index file written.
+        """
+        self.table_signature = table_signature
+        if table_signature is None:
+            return
+
+        document = dict(table_signature=list(table_signature), entries=self.dump_entries())
+        # Readers holding the shared table lock may rebuild the index together: one temporary file each.
+        temporary_path = f'{self.index_path}.{os.getpid()}-{threading.get_ident()}.tmp'
+        try:
+            with open(temporary_path, 'w', encoding='utf-8') as index_file_object:
+                index_file_object.write(json_backend.dumps(document))
+            os.replace(temporary_path, self.index_path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+
+class ReverseValueIndex(TableIndex):
+    index_extension = '.rev'
+
+    def __init__(self, index_path):
+        """
+        Initialize ReverseValueIndex instance (record value to record keys).
+
+        :param index_path:      Sidecar index file path ('<table>.rev').
+        :returns:               Initialized 'ReverseValueIndex' object.
+        """
+        super().__init__(index_path)
+        self.value_keys = {}
+
+    def build(self, records):
+        self.value_keys = {}
+        for record_key, record_value in records.items():
+            self.value_keys.setdefault(value_token(record_value), {})[record_key] = None
+
+    def apply_change(self, record_key, old_value, new_value):
+        if old_value is not MISSING_RECORD:
+            keys = self.value_keys.get(value_token(old_value), {})
+            keys.pop(record_key, None)
+            if not keys:
+                self.value_keys.pop(value_token(old_value), None)
+        if new_value is not MISSING_RECORD:
+            self.value_keys.setdefault(value_token(new_value), {})[record_key] = None
+
+    def dump_entries(self):
+        return {record_value: list(keys) for record_value, keys in self.value_keys.items()}
+
+    def load_entries(self, entries):
+        self.value_keys = {record_value: dict.fromkeys(keys) for record_value, keys in entries.items()}
+
+    def lookup(self, record_value):
+        """
+        Retrieve record keys holding record value.
+
+        :param record_value:    Value of key value pair.
+        :return:                List of record keys in table order. Empty if value does not exist.
+        """
+        return list(self.value_keys.get(value_token(record_value), ()))
+
+
+class SortedKeyIndex(TableIndex):
+    index_extension = '.keys'
+
+    def __init__(self, index_path):
+        """
+        Initialize SortedKeyIndex instance (record keys in sorted order).
+
+        :param index_path:      Sidecar index file path ('<table>.keys').
+        :returns:               Initialized 'SortedKeyIndex' object.
+        """
+        super().__init__(index_path)
+        self.sorted_keys = []
+
+    def build(self, records):
+        self.sorted_keys = sorted(records)
+
+    def apply_change(self, record_key, old_value, new_value):
+        if old_value is MISSING_RECORD and new_value is not MISSING_RECORD:
+            insort(self.sorted_keys, record_key)
+        elif old_value is not MISSING_RECORD and new_value is MISSING_RECORD:
+            position = bisect_left(self.sorted_keys, record_key)
+            if position < len(self.sorted_keys) and self.sorted_keys[position] == record_key:
+                del self.sorted_keys[position]
+
+    def dump_entries(self):
+        return self.sorted_keys
+
+    def load_entries(self, entries):
+        self.sorted_keys = list(entries)
+
+    def range_keys(self, start=None, end=None, limit=None):
+        """
+        Retrieve record keys from 'start' (inclusive) up to 'end' (exclusive) in sorted order.
+
+        :param start:           First key of range. None starts at the smallest key.
+        :param end:             Key ending the range. None ends after the largest key.
+        :param limit:           Maximum number of keys. None returns every key in range.
+        :return:                List of record keys.
+        """
+        first = 0 if start is None else bisect_left(self.sorted_keys, start)
+        last = len(self.sorted_keys) if end is None else bisect_left(self.sorted_keys, end)
+        if limit is not None:
+            last = min(last, first + max(limit, 0))
+        return self.sorted_keys[first:last]
+
+    def prefix_keys(self, prefix, limit=None):
+        """
+        Retrieve record keys starting with prefix in sorted order.
+
+        :param prefix:          Key prefix.
+        :param limit:           Maximum number of keys. None returns every matching key.
+        :return:                List of record keys.
+        """
+        keys = []
+        position = bisect_left(self.sorted_keys, prefix)
+        while position < len(self.sorted_keys) and self.sorted_keys[position].startswith(prefix):
+            if limit is not None and len(keys) >= limit:
+                break
+            keys.append(self.sorted_keys[position])
+            position += 1
+        return keys
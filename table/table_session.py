@@ -0,0 +1,270 @@
+"""
+This module provides class functions for initializing and using the TableSession class.
+
+The module includes a long-lived handle on one database table (JSON file). The table file is opened and
+parsed once; reads are answered from memory and writes are held until 'commit'. Commit merges only the keys
+the session changed into the current table, under the table write lock, so writes made by others since the
+session opened are kept. Record expiry times are copied when the records are loaded, so reads only compare
+the clock with the earliest expiry time.
+"""
+
+import os
+import time
+import json_database.tools.tools as tools
+
+class TableSession:
+    def __init__(self, table):
+        """
+        Initialize TableSession instance and load table records.
+
+        :param table:           'KeyValueTable' object.
+        :returns:               Initialized 'TableSession' object.
+        """
+        self.table = table
+        self.table_file_object = None
+        self.records = {}
+        self.changed_keys = set()
+        self.expiry_times = {}
+        self.next_expiry = None
+        self.open_session()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        if exception_type is None:
+            self.close()
+        else:
+            self.rollback()
+            self.close()
+
+    def open_session(self):
+        """
+        Open database table (JSON file) handle and read records into memory.
+
+        :return:                    Table handle opened and records loaded.
+        :raises FileNotFoundError:  Parent directory does not exist.
+        :raises PermissionError:    Insufficient file system permissions.
+        :raises OSError:            Unexpected operating system error.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            self.table.create_database()
+            table_path = self.table.get_table_path()
+            if not os.path.exists(table_path):
+                open(table_path, 'w').close()
+
+            self.table_file_object = open(table_path, 'r+')
+            self.rollback()
+
+        except FileNotFoundError as error:
+            self.table.handle_error(error, debug='dne')
+        except PermissionError as error:
+            self.table.handle_error(error, debug='access')
+        except Exception and OSError as error:
+            self.table.handle_error(error, debug='unknown')
+
+    def rollback(self):
+        """
+        Discard uncommitted changes and reload records through the open table handle.
+
+        :return:                    In-memory records match the database table (json file), without expired
+                                    records.
+        """
+        self.table.checkpoint_pending()
+        with self.table.read_locked():
+            self.table_file_object.seek(0)
+            self.records = self.table.parse_table_text(self.table_file_object.read())
+            expiry_times = self.table.open_expiry_index(force_refresh=True).copy_expiry_times()
+        self.expiry_times = {record_key: expires_at for record_key, expires_at in expiry_times.items()
+                             if record_key in self.records}
+        self.next_expiry = min(self.expiry_times.values(), default=None)
+        self.changed_keys = set()
+        self.drop_expired()
+
+    def drop_expired(self):
+        """
+        Remove records that expired since they were loaded. Records written in the session do not expire.
+
+        :return:                    In-memory records without expired records.
+        """
+        if self.next_expiry is None or self.next_expiry > time.time():
+            return self.records
+        now = time.time()
+        for record_key in [record_key for record_key, expires_at in self.expiry_times.items() if expires_at <= now]:
+            del self.expiry_times[record_key]
+            self.records.pop(record_key, None)
+        self.next_expiry = min(self.expiry_times.values(), default=None)
+        return self.records
+
+    def commit(self):
+        """
+        Save the records set or deleted in the session with a single table rewrite.
+
+        The table is re-read under the write lock and only the session's changes are applied, so records written
+        by others since the session opened are kept. Saved records lose their expiry time. The session then
+        reloads the merged table through a reopened handle.
+
+        :return:                    Database table (json file) rewritten when records changed.
+        :raises PermissionError:    Insufficient file system permissions.
+        :raises OSError:            Unexpected operating system error.
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            if not self.changed_keys:
+                return
+
+            # Imported here: 'key_value_table' imports this module.
+            import json_database.table.key_value_table as kvt
+
+            changes = {record_key: self.records.get(record_key, kvt.DELETE_RECORD)
+                       for record_key in self.changed_keys}
+            self.table.save_changes(changes)
+            self.table_file_object.close()
+            self.table_file_object = open(self.table.get_table_path(), 'r+')
+            self.rollback()
+
+        except PermissionError as error:
+            self.table.handle_error(error, debug='access')
+        except Exception and OSError as error:
+            self.table.handle_error(error, debug='unknown')
+
+    def close(self):
+        """
+        Commit changes and close the table handle.
+
+        :return:                    Table handle closed.
+        """
+        if self.table_file_object is not None:
+            self.commit()
+            self.table_file_object.close()
+            self.table_file_object = None
+
+    def set_pair(self, record_key, record_value, value_is_instance=False):
+        """
+        Write record (key value pair) to the session.
+
+        :param record_key:          Key of key value pair.
+        :param record_value:        Value of key value pair.
+        :param value_is_instance:   True if pair value is class instance. Else false.
+        :return:                    Key value pair saved in memory until commit.
+        """
+        record_value = self.table.encode_record_value(record_value, value_is_instance=value_is_instance)
+        record_key, record_value = self.table.normalize_record(tools.convert_to_string(record_key), record_value)
+        self.records.pop(record_key, None)
+        self.records[record_key] = record_value
+        self.expiry_times.pop(record_key, None)
+        self.changed_keys.add(record_key)
+
+    def set_many(self, records, value_is_instance=False):
+        """
+        Write multiple records (key value pairs) to the session.
+
+        :param records:             Dictionary (or iterable of key value tuples) of records to save.
+        :param value_is_instance:   True if pair values are class instances. Else false.
+        :return:                    Key value pairs saved in memory until commit.
+        """
+        records = records.items() if isinstance(records, dict) else records
+        for record_key, record_value in records:
+            self.set_pair(record_key, record_value, value_is_instance=value_is_instance)
+
+    def delete_pair(self, record_key):
+        """
+        Delete record (key value pair) from the session.
+
+        :param record_key:          Key of key value pair.
+        :return:                    Key value pair removed in memory until commit.
+        :raises KeyError:           Key not found in database table (json file).
+        """
+        try:
+            record_key = tools.convert_to_string(record_key)
+            del self.drop_expired()[record_key]
+            self.changed_keys.add(record_key)
+
+        except KeyError as error:
+            self.table.handle_error(error, debug='key')
+
+    def delete_many(self, record_keys):
+        """
+        Delete multiple records (key value pairs) from the session. Missing keys are skipped.
+
+        :param record_keys:         Iterable of record keys.
+        :return:                    Key value pairs removed in memory until commit.
+        """
+        records = self.drop_expired()
+        for record_key in record_keys:
+            record_key = tools.convert_to_string(record_key)
+            if record_key in records:
+                del records[record_key]
+                self.changed_keys.add(record_key)
+
+    def get_value(self, record_key, value_is_instance=False, default=tools.NO_DEFAULT):
+        """
+        Retrieve corresponding record's value for provided record key.
+
+        :param record_key:          Key of key value pair.
+        :param value_is_instance:   True if expected value is an instance. Else false.
+        :param default:             Returned when the key does not exist, without reporting an error.
+        :return:                    Key value pair value or instance.
+        :raises KeyError:           Key not found in database table (json file).
+        :raises Exception:          Unexpected error.
+        """
+        try:
+            record_key = tools.convert_to_string(record_key)
+            records = self.drop_expired()
+            if default is not tools.NO_DEFAULT and record_key not in records:
+                return default
+            record_value = records[record_key]
+            return self.table.decode_record_value(record_value, value_is_instance=value_is_instance)
+
+        except KeyError as error:
+            self.table.handle_error(error, debug='key')
+        except TypeError as error:
+            self.table.handle_error(error, debug='type_bytes')
+        except Exception as error:
+            self.table.handle_error(error, debug='unknown')
+
+    def get_key(self, record_value):
+        """
+        Retrieve corresponding record key(s) for provided record value.
+
+        :param record_value:        Value of key value pair.
+        :return:                    List of corresponding (key, value) tuples. 'None' when value does not exist.
+        """
+        if not self.table.typed_values:
+            record_value = tools.convert_to_string(data=record_value)
+        possible_keys = [item for item in self.drop_expired().items() if item[1] == record_value]
+        return possible_keys or None
+
+    def check_key(self, record_key):
+        """
+        Search session records for provided record key.
+
+        :param record_key:          Key of key value pair.
+        :return:                    True if key found. Else false.
+        """
+        return tools.convert_to_string(data=record_key) in self.drop_expired()
+
+    def count_records(self):
+        """
+        Count session records (key value pairs).
+
+        :return:                    Number of records.
+        """
+        return len(self.drop_expired())
+
+    def get_all_keys(self):
+        """
+        List all session record keys.
+
+        :return:                    Record keys as list.
+        """
+        return list(self.drop_expired().keys())
+
+    def table_to_dictionary(self):
+        """
+        Duplicate session records to dictionary object.
+
+        :return:                    Dictionary of records (key value pairs).
+        """
+        return dict(self.drop_expired())
@@ -0,0 +1,62 @@
+"""
+This module provides the exception classes raised by database and table objects in strict mode.
+
+Each exception also derives from the built-in exception it replaces (KeyError, FileNotFoundError, ValueError,
+TimeoutError), so existing 'except' clauses keep working. 'convert_error' maps built-in exceptions raised
+inside table operations to these classes.
+"""
+
+class JsonDatabaseError(Exception):
+    """
+    Base class of json_database errors.
+    """
+
+
+class KeyNotFound(JsonDatabaseError, KeyError):
+    """
+    Record key not found in database table.
+    """
+
+
+class TableNotFound(JsonDatabaseError, FileNotFoundError):
+    """
+    Database table (or database directory) not found.
+    """
+
+
+class CorruptTable(JsonDatabaseError, ValueError):
+    """
+    Database table file could not be parsed.
+    """
+
+
+class LockTimeout(JsonDatabaseError, TimeoutError):
+    """
+    Table lock not acquired within the lock timeout.
+    """
+
+
+class RemoteError(JsonDatabaseError):
+    """
+    Database server rejected a request with an error that has no json_database exception class.
+    """
+
+
+def convert_error(error, debug=None):
+    """
+    Map built-in exception to its json_database exception class.
+
+    :param error:       Exception raised inside a database or table operation.
+    :param debug:       Debug key of the error ('tools.print_error'). A KeyError is a missing record key only
+                        for debug key 'key' (else it reports an unsupported option).
+    :return:            'JsonDatabaseError' subclass instance, or 'error' unchanged when no class applies.
+    """
+    if isinstance(error, JsonDatabaseError):
+        return error
+    if isinstance(error, KeyError) and debug == 'key':
+        return KeyNotFound(*error.args)
+    if isinstance(error, FileNotFoundError):
+        return TableNotFound(error.errno, error.strerror, error.filename)
+    if isinstance(error, TimeoutError):
+        return LockTimeout(*error.args)
+    return error
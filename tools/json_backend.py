@@ -0,0 +1,52 @@
+"""
+This module provides functions to encode and decode JSON documents with the fastest available library.
+
+The module prefers 'orjson', then 'ujson', when installed. The standard library 'json' module is used otherwise.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+if orjson is not None:
+    backend_name = 'orjson'
+elif ujson is not None:
+    backend_name = 'ujson'
+else:
+    backend_name = 'json'
+
+def loads(data):
+    """
+    Decode JSON document.
+
+    :param data:    JSON document as string or bytes.
+    :return:        Python object.
+    :raises ValueError: Document is not valid JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if ujson is not None:
+        return ujson.loads(data)
+    return json.loads(data)
+
+def dumps(data, sort_keys=False):
+    """
+    Encode Python object as compact JSON document.
+
+    :param data:        Python object (dictionary keys must be strings).
+    :param sort_keys:   True to order dictionary keys (canonical output). Else insertion order.
+    :return:            JSON document as string.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS if sort_keys else None).decode('utf-8')
+    if ujson is not None:
+        return ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False, sort_keys=sort_keys)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=sort_keys)
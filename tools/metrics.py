@@ -0,0 +1,236 @@
+"""
+This module provides class functions for initializing and using the MetricsRegistry class.
+
+The module includes per-operation call counts and latency histograms, per-table I/O counters (bytes read and
+written, file opens, cache hits and misses) and pluggable hooks called after every instrumented operation.
+Tables record metrics only when created with a 'metrics' registry, so uninstrumented tables pay nothing.
+
+'profile_call' runs a single call under 'cProfile' or 'tracemalloc' to find hot spots under real load.
+"""
+
+import functools
+import threading
+import time
+import json_database.tools.tools as tools
+
+latency_buckets_ms = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+io_counters = ('bytes_read', 'bytes_written', 'file_opens', 'cache_hits', 'cache_misses')
+
+
+class MetricsRegistry:
+    def __init__(self, capture_errors=False):
+        """
+        Initialize MetricsRegistry instance.
+
+        :param capture_errors:  True to count errors reported through 'tools.print_error' by debug key.
+        :returns:               Initialized 'MetricsRegistry' object.
+        """
+        self.lock = threading.Lock()
+        self.operations = {}
+        self.tables = {}
+        self.errors = {}
+        self.hooks = []
+        if capture_errors:
+            tools.error_hooks.append(self.record_error)
+
+    def add_hook(self, hook):
+        """
+        Call hook after every instrumented operation.
+
+        :param hook:            Callable taking (operation, table name, seconds, error). 'error' is the exception
+                                raised by the operation, else None.
+        :return:                Hook registered.
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """
+        Stop calling a registered hook.
+
+        :param hook:            Callable passed to 'add_hook'.
+        :return:                Hook removed.
+        """
+        self.hooks.remove(hook)
+
+    def record_operation(self, operation, table_name, seconds, error=None):
+        """
+        Count an operation call and add its latency to the operation histogram.
+
+        :param operation:       Operation (method) name.
+        :param table_name:      Database table name.
+        :param seconds:         Call duration.
+        :param error:           Exception raised by the call. None if it returned.
+        :return:                Counters updated and hooks called.
+        """
+        milliseconds = seconds * 1000
+        bucket = next(index for index, bound in enumerate(latency_buckets_ms) if milliseconds <= bound)
+        with self.lock:
+            statistics = self.operations.get(operation)
+            if statistics is None:
+                statistics = self.operations[operation] = dict(count=0, errors=0, total_ms=0.0, max_ms=0.0,
+                                                               histogram=[0] * len(latency_buckets_ms))
+            statistics['count'] += 1
+            statistics['errors'] += error is not None
+            statistics['total_ms'] += milliseconds
+            statistics['max_ms'] = max(statistics['max_ms'], milliseconds)
+            statistics['histogram'][bucket] += 1
+
+        for hook in self.hooks:
+            hook(operation, table_name, seconds, error)
+
+    def record_io(self, table_name, counter, amount=1):
+        """
+        Add to a table I/O counter.
+
+        :param table_name:      Database table name.
+        :param counter:         Counter name from 'io_counters'.
+        :param amount:          Amount added.
+        :return:                Counter updated.
+        """
+        with self.lock:
+            counters = self.tables.get(table_name)
+            if counters is None:
+                counters = self.tables[table_name] = dict.fromkeys(io_counters, 0)
+            counters[counter] += amount
+
+    def record_error(self, error_message, debug):
+        """
+        Count an error reported through 'tools.print_error'.
+
+        :param error_message:   Error message.
+        :param debug:           Debug key (None when not provided).
+        :return:                Error counter updated.
+        """
+        with self.lock:
+            self.errors[debug] = self.errors.get(debug, 0) + 1
+
+    def snapshot(self):
+        """
+        Copy current metrics, with latency percentiles estimated from the histograms.
+
+        :return:                Dictionary with 'operations', 'tables' and 'errors' entries.
+        """
+        with self.lock:
+            operations = {}
+            for operation, statistics in self.operations.items():
+                operations[operation] = dict(statistics, histogram=list(statistics['histogram']),
+                                             mean_ms=statistics['total_ms'] / statistics['count'],
+                                             p50_ms=self.histogram_percentile(statistics, 0.50),
+                                             p99_ms=self.histogram_percentile(statistics, 0.99))
+            tables = {}
+            for table_name, counters in self.tables.items():
+                lookups = counters['cache_hits'] + counters['cache_misses']
+                tables[table_name] = dict(counters,
+                                          cache_hit_rate=counters['cache_hits'] / lookups if lookups else None)
+            return dict(operations=operations, tables=tables, errors=dict(self.errors),
+                        latency_buckets_ms=list(latency_buckets_ms))
+
+    @staticmethod
+    def histogram_percentile(statistics, fraction):
+        """
+        Estimate latency percentile as the upper bound of the histogram bucket holding it.
+
+        :param statistics:      Operation statistics.
+        :param fraction:        Percentile as fraction (0.99 for p99).
+        :return:                Latency bound in milliseconds (the maximum for the last bucket).
+        """
+        rank = fraction * statistics['count']
+        seen = 0
+        for bound, count in zip(latency_buckets_ms, statistics['histogram']):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, statistics['max_ms'])
+        return statistics['max_ms']
+
+    def reset(self):
+        """
+        Clear all metrics. Hooks stay registered.
+
+        :return:                Counters emptied.
+        """
+        with self.lock:
+            self.operations = {}
+            self.tables = {}
+            self.errors = {}
+
+    def close(self):
+        """
+        Stop counting errors reported through 'tools.print_error'.
+
+        :return:                Error hook removed.
+        """
+        if self.record_error in tools.error_hooks:
+            tools.error_hooks.remove(self.record_error)
+
+
+def instrument(method):
+    """
+    Decorate table method to record its call count and latency when the table has a metrics registry.
+
+    :param method:          Table method.
+    :return:                Wrapped method.
+    """
+    operation = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        registry = self.metrics
+        if registry is None:
+            return method(self, *args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        except BaseException as error:
+            registry.record_operation(operation, self.table_file, time.perf_counter() - start, error)
+            raise
+        registry.record_operation(operation, self.table_file, time.perf_counter() - start)
+        return result
+
+    return wrapper
+
+
+def profile_call(function, *args, mode='cprofile', top=20, **kwargs):
+    """
+    Run one call under a profiler.
+
+    :param function:        Callable to profile (e.g. 'table.get_value').
+    :param args:            Positional arguments for 'function'.
+    :param mode:            'cprofile' (function timings) or 'tracemalloc' (allocations by line).
+    :param top:             Number of entries in the report.
+    :param kwargs:          Keyword arguments for 'function'.
+    :return:                Tuple of call result and report text.
+    :raises KeyError:       Unsupported profiling mode.
+    """
+    # Profilers are imported here: they are slow to import and only needed when profiling.
+    if mode == 'cprofile':
+        import cProfile
+        import io
+        import pstats
+
+        profiler = cProfile.Profile()
+        result = profiler.runcall(function, *args, **kwargs)
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(top)
+        return result, report.getvalue()
+
+    if mode == 'tracemalloc':
+        import tracemalloc
+
+        already_tracing = tracemalloc.is_tracing()
+        if not already_tracing:
+            tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            result = function(*args, **kwargs)
+            peak = tracemalloc.get_traced_memory()[1]
+            after = tracemalloc.take_snapshot()
+        finally:
+            if not already_tracing:
+                tracemalloc.stop()
+        lines = [f'Peak traced memory: {peak} bytes']
+        lines.extend(str(statistic) for statistic in after.compare_to(before, 'lineno')[:top])
+        return result, '\n'.join(lines)
+
+    raise KeyError(mode)
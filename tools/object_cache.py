@@ -0,0 +1,217 @@
+"""
+This module provides class functions for initializing and using the ObjectCache class.
+
+The module includes a bounded cache of decoded record values (unpickled instances) keyed by table and record
+key, so hot instance values skip reading, parsing and unpickling. Entries are charged the length of their
+encoded value against a byte budget and evicted least recently used ('lru') or least frequently used ('lfu')
+first; both policies run in O(1) per operation.
+
+Tables drop entries when they write or delete the record, so one cache should be shared by every table object
+writing a cached table. Each entry also keeps the table file signature (modification time, size, inode) it was
+read from, and is treated as a miss once the file changed, so writes by other processes or by table objects
+not sharing the cache are never hidden. Cached objects are returned as they are; callers must not modify them.
+"""
+
+import threading
+from collections import OrderedDict
+
+class ObjectCache:
+    def __init__(self, max_bytes=16777216, policy='lru'):
+        """
+        Initialize ObjectCache instance.
+
+        :param max_bytes:       Byte budget for cached entries (sum of encoded value lengths).
+        :param policy:          Eviction policy - 'lru' (least recently used) or 'lfu' (least frequently used).
+        :returns:               Initialized 'ObjectCache' object.
+        :raises KeyError:       Unsupported eviction policy.
+        """
+        if policy not in ('lru', 'lfu'):
+            raise KeyError(policy)
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.recent_keys = OrderedDict()
+        self.frequency_keys = {}
+        self.minimum_frequency = 0
+        self.used_bytes = 0
+        self.table_versions = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, table_path, record_key, default=None, signature=None):
+        """
+        Retrieve cached object.
+
+        :param table_path:      Database table file path.
+        :param record_key:      Key of key value pair (string).
+        :param default:         Returned on a cache miss.
+        :param signature:       Current table file signature. An entry cached from another signature is dropped
+                                and reported as a miss.
+        :return:                Cached object or 'default'.
+        """
+        cache_key = (table_path, record_key)
+        with self.lock:
+            entry = self.entries.get(cache_key)
+            if entry is not None and entry[3] != signature:
+                self.remove(cache_key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.touch(cache_key, entry)
+            return entry[0]
+
+    def get_version(self, table_path):
+        """
+        Retrieve table invalidation counter. Read it before reading a record and pass it to 'put'.
+
+        :param table_path:      Database table file path.
+        :return:                Number of invalidations of the table.
+        """
+        return self.table_versions.get(table_path, 0)
+
+    def put(self, table_path, record_key, value, size, version=None, signature=None):
+        """
+        Cache decoded object, evicting entries until it fits the byte budget.
+
+        :param table_path:      Database table file path.
+        :param record_key:      Key of key value pair (string).
+        :param value:           Decoded object.
+        :param size:            Bytes charged (encoded value length). Objects larger than the budget are skipped.
+        :param version:         Table version ('get_version') read before the record. The object is skipped when
+                                the table was written since, so a concurrent write is never hidden by an older
+                                value. None caches unconditionally.
+        :param signature:       Table file signature read before the record (see 'get').
+        :return:                Object cached.
+        """
+        if size > self.max_bytes:
+            return
+        cache_key = (table_path, record_key)
+        with self.lock:
+            if version is not None and version != self.table_versions.get(table_path, 0):
+                return
+            self.remove(cache_key)
+            while self.used_bytes + size > self.max_bytes and self.entries:
+                self.remove(self.select_victim())
+                self.evictions += 1
+
+            self.entries[cache_key] = [value, size, 1, signature]
+            self.used_bytes += size
+            if self.policy == 'lru':
+                self.recent_keys[cache_key] = None
+            else:
+                self.frequency_keys.setdefault(1, OrderedDict())[cache_key] = None
+                self.minimum_frequency = 1
+
+    def invalidate(self, table_path, record_keys):
+        """
+        Drop cached objects of changed records.
+
+        :param table_path:      Database table file path.
+        :param record_keys:     Iterable of record keys.
+        :return:                Entries removed.
+        """
+        with self.lock:
+            self.table_versions[table_path] = self.table_versions.get(table_path, 0) + 1
+            if not self.entries:
+                return
+            for record_key in record_keys:
+                self.remove((table_path, record_key))
+
+    def invalidate_table(self, table_path):
+        """
+        Drop every cached object of a table.
+
+        :param table_path:      Database table file path.
+        :return:                Entries removed.
+        """
+        with self.lock:
+            self.table_versions[table_path] = self.table_versions.get(table_path, 0) + 1
+            for cache_key in [cache_key for cache_key in self.entries if cache_key[0] == table_path]:
+                self.remove(cache_key)
+
+    def clear(self):
+        """
+        Drop every cached object. Counters are kept.
+
+        :return:                Cache emptied.
+        """
+        with self.lock:
+            self.entries = {}
+            self.recent_keys = OrderedDict()
+            self.frequency_keys = {}
+            self.minimum_frequency = 0
+            self.used_bytes = 0
+
+    def stats(self):
+        """
+        Report cache counters.
+
+        :return:                Dictionary of entries, used bytes, hits, misses, hit rate and evictions.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return dict(entries=len(self.entries), used_bytes=self.used_bytes, max_bytes=self.max_bytes,
+                        policy=self.policy, hits=self.hits, misses=self.misses,
+                        hit_rate=self.hits / lookups if lookups else None, evictions=self.evictions)
+
+    def touch(self, cache_key, entry):
+        """
+        Record an access for the eviction policy. Caller holds 'lock'.
+
+        :param cache_key:       Tuple of table path and record key.
+        :param entry:           Cache entry (value, size, frequency, table signature).
+        :return:                Entry moved to most recent position or next frequency bucket.
+        """
+        if self.policy == 'lru':
+            self.recent_keys.move_to_end(cache_key)
+            return
+
+        frequency = entry[2]
+        bucket = self.frequency_keys[frequency]
+        del bucket[cache_key]
+        if not bucket:
+            del self.frequency_keys[frequency]
+            if self.minimum_frequency == frequency:
+                self.minimum_frequency = frequency + 1
+        entry[2] = frequency + 1
+        self.frequency_keys.setdefault(frequency + 1, OrderedDict())[cache_key] = None
+
+    def select_victim(self):
+        """
+        Choose entry to evict. Caller holds 'lock'.
+
+        :return:                Least recently used key ('lru'), or least recently used key among the least
+                                frequently used ('lfu').
+        """
+        if self.policy == 'lru':
+            return next(iter(self.recent_keys))
+        if self.minimum_frequency not in self.frequency_keys:
+            self.minimum_frequency = min(self.frequency_keys)
+        return next(iter(self.frequency_keys[self.minimum_frequency]))
+
+    def remove(self, cache_key):
+        """
+        Remove entry when cached. Caller holds 'lock'.
+
+        :param cache_key:       Tuple of table path and record key.
+        :return:                Entry and its policy bookkeeping removed.
+        """
+        entry = self.entries.pop(cache_key, None)
+        if entry is None:
+            return
+        self.used_bytes -= entry[1]
+        if self.policy == 'lru':
+            del self.recent_keys[cache_key]
+            return
+
+        bucket = self.frequency_keys[entry[2]]
+        del bucket[cache_key]
+        if not bucket:
+            del self.frequency_keys[entry[2]]
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,220 @@
+"""
+This module provides class functions for initializing and using the TableLock class.
+
+The module includes a reader-writer lock shared by every table object using the same lock file within a
+process, combined with 'fcntl' advisory file locks so readers and writers in other processes are
+coordinated as well. Many readers may hold the lock at once; writers hold it alone.
+
+File locks are skipped on platforms without 'fcntl' (Windows); the in-process lock still applies.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+import json_database.tools.exceptions as exceptions
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+class TableLock:
+    registry = {}
+    registry_lock = threading.Lock()
+
+    def __init__(self, lock_path):
+        """
+        Initialize TableLock instance. Use 'for_path' to share one lock per lock file.
+
+        :param lock_path:       Lock file path ('<table>.lock').
+        :returns:               Initialized 'TableLock' object.
+        """
+        self.lock_path = lock_path
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writer = None
+        self.waiting_writers = 0
+        self.thread_state = threading.local()
+
+    @classmethod
+    def for_path(cls, lock_path):
+        """
+        Retrieve the process-wide lock for a lock file.
+
+        :param lock_path:       Lock file path.
+        :return:                'TableLock' object shared by all callers using 'lock_path'.
+        """
+        lock_path = os.path.abspath(lock_path)
+        with cls.registry_lock:
+            if lock_path not in cls.registry:
+                cls.registry[lock_path] = cls(lock_path)
+            return cls.registry[lock_path]
+
+    def get_thread_state(self):
+        """
+        Retrieve calling thread's lock depth and lock file handle.
+
+        :return:                Thread local state object.
+        """
+        state = self.thread_state
+        if not hasattr(state, 'depth'):
+            state.depth = 0
+            state.file_object = None
+        return state
+
+    @contextmanager
+    def read_lock(self, timeout=None):
+        """
+        Hold shared lock for the duration of a 'with' block. Re-entrant within a thread.
+
+        :param timeout:         Seconds to wait before giving up. None waits indefinitely.
+        :return:                Shared lock held until block exits.
+        :raises LockTimeout:    Lock not acquired within 'timeout'.
+        """
+        state = self.get_thread_state()
+        if state.depth > 0 or self.writer == threading.get_ident():
+            state.depth += 1
+            try:
+                yield
+            finally:
+                state.depth -= 1
+            return
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while self.writer is not None or self.waiting_writers:
+                if not self.condition.wait(self.remaining(deadline)):
+                    raise exceptions.LockTimeout(f'Read lock not acquired: {self.lock_path}')
+            self.readers += 1
+
+        try:
+            self.lock_file(state, shared=True, deadline=deadline)
+        except BaseException:
+            self.release_reader()
+            raise
+
+        state.depth = 1
+        try:
+            yield
+        finally:
+            state.depth = 0
+            self.unlock_file(state)
+            self.release_reader()
+
+    @contextmanager
+    def write_lock(self, timeout=None):
+        """
+        Hold exclusive lock for the duration of a 'with' block. Re-entrant within a thread.
+
+        :param timeout:         Seconds to wait before giving up. None waits indefinitely.
+        :return:                Exclusive lock held until block exits.
+        :raises LockTimeout:    Lock not acquired within 'timeout'.
+        :raises RuntimeError:   Calling thread holds a read lock (upgrades are not supported).
+        """
+        state = self.get_thread_state()
+        thread_id = threading.get_ident()
+        if self.writer == thread_id:
+            state.depth += 1
+            try:
+                yield
+            finally:
+                state.depth -= 1
+            return
+        if state.depth > 0:
+            raise RuntimeError('Read lock cannot be upgraded to write lock.')
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            self.waiting_writers += 1
+            try:
+                while self.writer is not None or self.readers:
+                    if not self.condition.wait(self.remaining(deadline)):
+                        raise exceptions.LockTimeout(f'Write lock not acquired: {self.lock_path}')
+                self.writer = thread_id
+            finally:
+                self.waiting_writers -= 1
+                self.condition.notify_all()
+
+        try:
+            self.lock_file(state, shared=False, deadline=deadline)
+        except BaseException:
+            self.release_writer()
+            raise
+
+        state.depth = 1
+        try:
+            yield
+        finally:
+            state.depth = 0
+            self.unlock_file(state)
+            self.release_writer()
+
+    def release_reader(self):
+        """
+        Release one in-process shared hold and wake waiting threads.
+
+        :return:                Reader count decremented.
+        """
+        with self.condition:
+            self.readers -= 1
+            self.condition.notify_all()
+
+    def release_writer(self):
+        """
+        Release in-process exclusive hold and wake waiting threads.
+
+        :return:                Writer cleared.
+        """
+        with self.condition:
+            self.writer = None
+            self.condition.notify_all()
+
+    def lock_file(self, state, shared, deadline):
+        """
+        Acquire advisory lock on the lock file through the calling thread's own file handle.
+
+        :param state:           Thread local state object.
+        :param shared:          True for shared (reader) lock. Else exclusive (writer) lock.
+        :param deadline:        'time.monotonic' deadline. None waits indefinitely.
+        :return:                File lock held.
+        :raises LockTimeout:    Lock not acquired before 'deadline'.
+        """
+        if fcntl is None:
+            return
+        if state.file_object is None:
+            state.file_object = open(self.lock_path, 'a+')
+
+        operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if deadline is None:
+            fcntl.flock(state.file_object.fileno(), operation)
+            return
+
+        while True:
+            try:
+                fcntl.flock(state.file_object.fileno(), operation | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise exceptions.LockTimeout(f'File lock not acquired: {self.lock_path}')
+                time.sleep(0.005)
+
+    def unlock_file(self, state):
+        """
+        Release advisory lock held through the calling thread's file handle.
+
+        :param state:           Thread local state object.
+        :return:                File lock released.
+        """
+        if fcntl is not None and state.file_object is not None:
+            fcntl.flock(state.file_object.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def remaining(deadline):
+        """
+        Seconds left until deadline.
+
+        :param deadline:        'time.monotonic' deadline. None waits indefinitely.
+        :return:                Seconds (never negative) or None.
+        """
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
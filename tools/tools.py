@@ -5,6 +5,12 @@ The module includes functions checking and converting data types to string and b
 Functions handling errors and formatting file system address are included.
 """
 
+# Callables taking (error_message, debug), called for every error reported through 'print_error'.
+error_hooks = []
+
+# Placeholder for 'default' parameters: no default value provided (None is a valid default).
+NO_DEFAULT = object()
+
 def check_string(data):
     """
     Determine if data is a string.
@@ -29,10 +35,15 @@ def string_to_bytes(string):
     """
     Reformat string as bytes.
 
-    :param string:  String.
+    :param string:  String containing an escaped bytes literal.
     :return:        String as bytes.
+    :raises TypeError:  String is not a bytes literal.
     """
-    string_as_bytes = eval(string.replace('\\\\', '\\'))
+    import ast
+
+    string_as_bytes = ast.literal_eval(string.replace('\\\\', '\\'))
+    if not isinstance(string_as_bytes, bytes):
+        raise TypeError('Record value is not a bytes literal.')
     return string_as_bytes
 
 def print_error(error_message, debug=None):
@@ -43,6 +54,9 @@ def print_error(error_message, debug=None):
     :param debug:           Debug or troubleshooting key.
     :return:                Formatted print screen of original error message and troubleshooting step(s).
     """
+    for hook in error_hooks:
+        hook(error_message, debug)
+
     message = f'Error:\t\t{error_message}'
 
     if debug is not None:
@@ -51,6 +65,13 @@ def print_error(error_message, debug=None):
             'key': '\nDebug:\t\tProvide key that exists.',
             'file_handle': '\nDebug:\t\tEnter \'append\',\'read\', or \'write\' for optional '
                            '\'mode\' parameter.',
+            'table_format': '\nDebug:\t\tEnter \'text\' or \'json\' for \'table_format\' parameter.',
+            'text_unsafe': '\nDebug:\t\tKeep \'json\' table format for records holding \'"\', \',\', \':\', line '
+                           'breaks, surrounding whitespace or values that are not strings.',
+            'executor': '\nDebug:\t\tEnter \'thread\' or \'process\' for \'executor\' parameter.',
+            'data_format': '\nDebug:\t\tEnter \'ndjson\', \'csv\' or \'records\' for \'data_format\' parameter '
+                           '(\'thread\' or \'process\' for \'executor\').',
+            'number': '\nDebug:\t\tProvide key holding a numeric value.',
             'open_table': '\nDebug:\t\tOpen table using \'open_table\' method after '
                             'creating database object.',
             'exist': '\nDebug:\t\tEnsure directory or file does not exist. Provide alternate name or location.',